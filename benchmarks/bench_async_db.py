@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк: синхронный и асинхронный слой базы данных под конкурентной нагрузкой
+
+Каждое "обновление" делает то же, что и типичный обработчик: get_user,
+get_words_for_review, get_spaced_repetition_stats и ответ в Telegram
+(имитируется asyncio.sleep). Параллельно работает heartbeat-задача,
+которая измеряет максимальную задержку event loop.
+
+Запуск из корня проекта:
+    python benchmarks/bench_async_db.py --updates 500 --users 200
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from database import models, async_models
+
+async def heartbeat(stop: asyncio.Event, lags: list):
+    """Измерение задержек event loop"""
+    interval = 0.001
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append(time.perf_counter() - start - interval)
+
+async def sync_update(user_id: int, api_latency: float):
+    models.get_user(user_id)
+    models.get_words_for_review(user_id, 10)
+    models.get_spaced_repetition_stats(user_id)
+    await asyncio.sleep(api_latency)
+
+async def async_update(user_id: int, api_latency: float):
+    await async_models.get_user(user_id)
+    await async_models.get_words_for_review(user_id, 10)
+    await async_models.get_spaced_repetition_stats(user_id)
+    await asyncio.sleep(api_latency)
+
+async def timed(update, user_id: int, api_latency: float, latencies: list):
+    start = time.perf_counter()
+    await update(user_id, api_latency)
+    latencies.append(time.perf_counter() - start)
+
+async def run(update, updates: int, users: int, api_latency: float):
+    stop = asyncio.Event()
+    lags, latencies = [], []
+    hb = asyncio.create_task(heartbeat(stop, lags))
+    start = time.perf_counter()
+    await asyncio.gather(*(timed(update, 1_000_000 + i % users, api_latency, latencies) for i in range(updates)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await hb
+    latencies.sort()
+    return {
+        'throughput': updates / elapsed,
+        'p50': latencies[len(latencies) // 2],
+        'p99': latencies[int(len(latencies) * 0.99)],
+        'max_lag': max(lags, default=0.0),
+    }
+
+def prepare(users: int):
+    """Подготовка тестовых пользователей и карточек"""
+    models.init_db()
+    if not models.get_words_by_level('A1', 1):
+        for i in range(10):
+            models.add_word(f"bench{i}", "[-]", f"перевод{i}", "Example.", 'A1')
+    words = models.get_words_by_level('A1', 10)
+    for i in range(users):
+        user_id = 1_000_000 + i
+        if models.get_user(user_id):
+            continue
+        models.add_user(user_id, 'A1')
+        for word in words:
+            models.add_word_to_spaced_repetition(user_id, word['word_id'], word['word'])
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--updates', type=int, default=500)
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--api-latency', type=float, default=0.05)
+    args = parser.parse_args()
+
+    prepare(args.users)
+
+    for name, update in (("sync", sync_update), ("async", async_update)):
+        r = await run(update, args.updates, args.users, args.api_latency)
+        print(
+            f"{name:>5}: {r['throughput']:8.1f} обновлений/с, "
+            f"p50 {r['p50'] * 1000:7.1f} мс, p99 {r['p99'] * 1000:7.1f} мс, "
+            f"макс. задержка event loop {r['max_lag'] * 1000:7.1f} мс"
+        )
+
+    await async_models.close_db()
+
+if __name__ == "__main__":
+    asyncio.run(main())
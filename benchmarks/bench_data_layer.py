@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк слоя данных models.py на базах от 10 тыс. до 1 млн пользователей
+
+Для каждого масштаба (--scales, число пользователей) во временном каталоге
+детерминированно (--seed) генерируется база со схемой приложения
+(create_all + миграции): каталог слов, пользователи, по --cards карточек
+spaced_repetition и выученных слов на пользователя (1 млн пользователей x
+20 карточек = 20 млн строк). Даты повторения задаются смещением от
+сегодняшнего дня, поэтому очередь на сегодня одинакова в любой день.
+
+Затем функции models.py вызываются для одной и той же выборки
+пользователей (--samples):
+  cold - первый проход на новом движке с пустым кэшем страниц SQLite и
+         пустым кэшем профилей (кэш ОС при этом не сбрасывается);
+  warm - повторный проход по той же выборке.
+Пишущие функции (update_spaced_repetition, add_learned_word) меняют базу,
+поэтому в warm-проходе add_learned_word добавляет другие слова.
+
+Результаты (мкс: среднее, p50, p95, максимум) печатаются и сохраняются в
+JSON вместе с коммитом и версиями, --compare сравнивает с прошлым файлом.
+
+Запуск из корня проекта:
+    python benchmarks/bench_data_layer.py --scales 10000,100000,1000000 --output data_layer.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, datetime
+from typing import Callable, Dict, List, Optional
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from database import models
+from database.cache import user_cache
+from database.engine import create_sqlite_engine
+from database.migrations import run_migrations
+
+LEVELS = ('A1', 'A2', 'B1', 'B2')
+WORDS_PER_LEVEL = 500
+# Первые CARD_WORDS слов уровня - в карточках, остальные для add_learned_word
+CARD_WORDS = 100
+
+def build_database(path: str, users: int, cards: int, seed: int):
+    """Генерация базы: схема приложения, затем вставка пачками через sqlite3"""
+    if cards > CARD_WORDS:
+        raise ValueError(f"Не больше {CARD_WORDS} карточек на пользователя")
+    engine = create_sqlite_engine(path=path)
+    models.Base.metadata.create_all(engine)
+    with engine.begin() as connection:
+        run_migrations(connection)
+    engine.dispose()
+
+    rnd = random.Random(seed)
+    today = date.today().toordinal()
+    now = datetime.now().isoformat(sep=' ')
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=OFF")
+    conn.execute("PRAGMA synchronous=OFF")
+
+    conn.executemany(
+        "INSERT INTO words (word_id, word, transcription, translation, example, level) VALUES (?, ?, ?, ?, ?, ?)",
+        (
+            (index * WORDS_PER_LEVEL + i + 1, f"{level.lower()}word{i}", f"[w{i}]",
+             f"перевод {i}", f"Example sentence {i}.", level)
+            for index, level in enumerate(LEVELS) for i in range(WORDS_PER_LEVEL)
+        )
+    )
+    conn.executemany(
+        "INSERT INTO users (user_id, level, correct_answers, incorrect_answers, reminder_hour, created_at) "
+        "VALUES (?, ?, ?, ?, 9, ?)",
+        ((user_id, LEVELS[user_id % len(LEVELS)], rnd.randrange(200), rnd.randrange(100), now)
+         for user_id in range(1, users + 1))
+    )
+
+    def cards_of(user_id: int):
+        first = (user_id % len(LEVELS)) * WORDS_PER_LEVEL + 1
+        return [first + offset for offset in rnd.sample(range(CARD_WORDS), cards)]
+
+    def card_rows():
+        for user_id in range(1, users + 1):
+            for word_id in cards_of(user_id):
+                reviews = rnd.randrange(12)
+                yield (
+                    user_id, word_id, f"word{word_id}", rnd.choice((1, 3, 7, 14, 21, 30)),
+                    today + rnd.randint(-10, 30), round(rnd.uniform(1.3, 3.0), 2),
+                    min(reviews, 5), 0, reviews, today - rnd.randint(1, 30) if reviews else None, now
+                )
+
+    conn.executemany(
+        "INSERT INTO spaced_repetition (user_id, word_id, word, interval_days, next_review_date, ease_factor, "
+        "consecutive_correct, consecutive_incorrect, total_reviews, last_review_date, created_at) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        card_rows()
+    )
+    conn.executemany(
+        "INSERT INTO learned_words (user_id, word_id, word, learned_at) VALUES (?, ?, ?, ?)",
+        ((user_id, word_id, f"word{word_id}", now)
+         for user_id in range(1, users + 1) for word_id in cards_of(user_id))
+    )
+    conn.commit()
+    conn.execute("ANALYZE")
+    conn.close()
+
+def bind_models(path: str):
+    """Новый движок для models.py (пустой кэш страниц SQLite и профилей)"""
+    models.Session.kw['bind'].dispose()
+    models.Session.configure(bind=create_sqlite_engine(path=path))
+    user_cache.clear()
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    samples = sorted(samples)
+    return {
+        'mean_us': round(sum(samples) / len(samples) * 1e6, 2),
+        'p50_us': round(samples[len(samples) // 2] * 1e6, 2),
+        'p95_us': round(samples[min(len(samples) - 1, int(len(samples) * 0.95))] * 1e6, 2),
+        'max_us': round(samples[-1] * 1e6, 2),
+    }
+
+def measure(calls: List[Callable[[], object]]) -> Dict[str, float]:
+    timings = []
+    for call in calls:
+        start = time.perf_counter()
+        call()
+        timings.append(time.perf_counter() - start)
+    return summarize(timings)
+
+def card_ids(path: str, user_ids: List[int]) -> List[int]:
+    """Первая карточка каждого пользователя выборки (для update_spaced_repetition)"""
+    conn = sqlite3.connect(path)
+    try:
+        return [
+            conn.execute("SELECT min(id) FROM spaced_repetition WHERE user_id = ?", (user_id,)).fetchone()[0]
+            for user_id in user_ids
+        ]
+    finally:
+        conn.close()
+
+def run_scale(path: str, users: int, samples: int, seed: int) -> Dict[str, Dict[str, Dict[str, float]]]:
+    rnd = random.Random(seed + users)
+    user_ids = [rnd.randint(1, users) for _ in range(samples)]
+    reviews = card_ids(path, user_ids)
+
+    def learned_calls(offset: int):
+        # Слова уровня пользователя за пределами карточек: каждый раз новая строка
+        return [
+            (lambda u=user_id, w=(user_id % len(LEVELS)) * WORDS_PER_LEVEL + CARD_WORDS + 1
+                                 + (offset + i) % (WORDS_PER_LEVEL - CARD_WORDS):
+             models.add_learned_word(u, w, f"word{w}"))
+            for i, user_id in enumerate(user_ids)
+        ]
+
+    functions = {
+        'get_user': lambda _: [lambda u=u: models.get_user(u) for u in user_ids],
+        'get_words_for_review': lambda _: [lambda u=u: models.get_words_for_review(u, 10) for u in user_ids],
+        'get_spaced_repetition_stats': lambda _: [lambda u=u: models.get_spaced_repetition_stats(u) for u in user_ids],
+        'update_spaced_repetition': lambda _: [
+            lambda r=r, u=u: models.update_spaced_repetition(r, True, u) for r, u in zip(reviews, user_ids)
+        ],
+        'add_learned_word': lambda phase: learned_calls(0 if phase == 'cold' else samples),
+    }
+
+    results = {}
+    for name, make_calls in functions.items():
+        bind_models(path)
+        results[name] = {phase: measure(make_calls(phase)) for phase in ('cold', 'warm')}
+    return results
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare(results: Dict, previous: Dict):
+    """Отношение warm p50 к прошлому прогону (меньше 1 - быстрее)"""
+    print(f"\nСравнение с {previous.get('commit')} ({previous.get('timestamp')}), warm p50 сейчас/раньше:")
+    for scale, functions in results['scales'].items():
+        old = previous.get('scales', {}).get(scale)
+        if not old:
+            continue
+        for name, phases in functions.items():
+            if name in old:
+                ratio = phases['warm']['p50_us'] / old[name]['warm']['p50_us']
+                print(f"  {scale:>8} {name:<28} x{ratio:.2f}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--scales', default='10000', help="числа пользователей через запятую")
+    parser.add_argument('--cards', type=int, default=20, help="карточек и выученных слов на пользователя")
+    parser.add_argument('--samples', type=int, default=500, help="вызовов каждой функции за проход")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--workdir', help="каталог для баз (по умолчанию временный, удаляется)")
+    parser.add_argument('--output', help="файл JSON с результатами")
+    parser.add_argument('--compare', help="JSON прошлого прогона для сравнения")
+    args = parser.parse_args()
+
+    scales = [int(scale) for scale in args.scales.split(',')]
+    results = {
+        'commit': git_commit(),
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'sqlite': sqlite3.sqlite_version,
+        'params': {'cards': args.cards, 'samples': args.samples, 'seed': args.seed},
+        'scales': {},
+        'build_seconds': {},
+    }
+
+    tmpdir = None if args.workdir else tempfile.TemporaryDirectory(prefix='wordbot-bench-')
+    workdir = args.workdir or tmpdir.name
+    os.makedirs(workdir, exist_ok=True)
+    try:
+        for users in scales:
+            path = os.path.join(workdir, f"bench_{users}u_{args.cards}c_{args.seed}.db")
+            # База меняется пишущими функциями, поэтому генерируется заново при каждом прогоне
+            if os.path.exists(path):
+                os.remove(path)
+            start = time.perf_counter()
+            build_database(path, users, args.cards, args.seed)
+            built = time.perf_counter() - start
+            print(f"{users} пользователей, {users * args.cards} карточек: база за {built:.1f} с, "
+                  f"{os.path.getsize(path) / 2**20:.0f} МБ")
+
+            scale = run_scale(path, users, args.samples, args.seed)
+            results['scales'][str(users)] = scale
+            results['build_seconds'][str(users)] = round(built, 2)
+            for name, phases in scale.items():
+                cold, warm = phases['cold'], phases['warm']
+                print(f"  {name:<28} cold p50 {cold['p50_us']:9.1f} p95 {cold['p95_us']:9.1f} мкс | "
+                      f"warm p50 {warm['p50_us']:9.1f} p95 {warm['p95_us']:9.1f} мкс")
+            models.Session.kw['bind'].dispose()
+            os.remove(path)
+    finally:
+        if tmpdir is not None:
+            tmpdir.cleanup()
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"\nРезультаты сохранены в {args.output}")
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            compare(results, json.load(f))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк очереди повторения: старая схема против новой
+
+Старая схема: next_review_date хранится как DATE (строка 'YYYY-MM-DD'),
+есть только уникальный индекс (user_id, word_id).
+Новая схема: номер дня (INTEGER) и индекс (user_id, next_review_date).
+
+Обе базы генерируются детерминированно во временном каталоге, затем для
+случайных пользователей выполняются те же запросы, что и в models.py:
+подсчет слов к повторению и выборка очереди с сортировкой.
+
+Запуск:
+    python benchmarks/bench_due_index.py --rows 1000000 --users 10000
+"""
+import argparse
+import os
+import random
+import sqlite3
+import tempfile
+import time
+from datetime import date, timedelta
+
+SCHEMA = """CREATE TABLE spaced_repetition (
+    id INTEGER PRIMARY KEY,
+    user_id INTEGER NOT NULL,
+    word_id INTEGER NOT NULL,
+    word VARCHAR(100) NOT NULL,
+    interval_days INTEGER,
+    next_review_date {day_type} NOT NULL,
+    ease_factor FLOAT,
+    total_reviews INTEGER,
+    UNIQUE (user_id, word_id)
+)"""
+
+def build(path: str, rows: int, users: int, integer_days: bool):
+    """Генерация базы с rows карточками"""
+    conn = sqlite3.connect(path)
+    conn.execute(SCHEMA.format(day_type='INTEGER' if integer_days else 'DATE'))
+    if integer_days:
+        conn.execute("CREATE INDEX ix_spaced_repetition_user_due ON spaced_repetition (user_id, next_review_date)")
+    
+    rnd = random.Random(42)
+    today = date.today()
+    per_user = rows // users
+    
+    def generate():
+        for user_id in range(users):
+            for word_id in range(per_user):
+                due = today + timedelta(days=rnd.randint(-30, 60))
+                yield (
+                    user_id, word_id, f"word{word_id}", 1,
+                    due.toordinal() if integer_days else due.isoformat(),
+                    2.5, 0
+                )
+    
+    conn.executemany(
+        "INSERT INTO spaced_repetition (user_id, word_id, word, interval_days, next_review_date, "
+        "ease_factor, total_reviews) VALUES (?, ?, ?, ?, ?, ?, ?)",
+        generate()
+    )
+    conn.commit()
+    conn.execute("ANALYZE")
+    return conn
+
+def measure(conn, users: int, integer_days: bool, queries: int):
+    """Среднее время запросов очереди в микросекундах"""
+    today = date.today().toordinal() if integer_days else date.today().isoformat()
+    rnd = random.Random(7)
+    user_ids = [rnd.randrange(users) for _ in range(queries)]
+    
+    results = {}
+    for name, sql in (
+        ("due_count", "SELECT count(*) FROM spaced_repetition WHERE user_id = ? AND next_review_date <= ?"),
+        ("review_queue", "SELECT id, word_id FROM spaced_repetition WHERE user_id = ? AND next_review_date <= ? "
+                         "ORDER BY next_review_date LIMIT 10"),
+    ):
+        start = time.perf_counter()
+        for user_id in user_ids:
+            conn.execute(sql, (user_id, today)).fetchall()
+        results[name] = (time.perf_counter() - start) / queries * 1e6
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--users', type=int, default=10_000)
+    parser.add_argument('--queries', type=int, default=2000)
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        for label, integer_days in (("до (DATE, без индекса)", False), ("после (INTEGER + индекс)", True)):
+            path = os.path.join(tmp, f"bench_{int(integer_days)}.db")
+            start = time.perf_counter()
+            conn = build(path, args.rows, args.users, integer_days)
+            build_time = time.perf_counter() - start
+            results = measure(conn, args.users, integer_days, args.queries)
+            conn.close()
+            print(
+                f"{label}: размер {os.path.getsize(path) / 2**20:6.1f} МБ, генерация {build_time:5.1f} с, "
+                f"due_count {results['due_count']:7.1f} мкс, review_queue {results['review_queue']:7.1f} мкс"
+            )
+
+if __name__ == "__main__":
+    main()
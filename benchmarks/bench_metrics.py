@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Микробенчмарк накладных расходов метрик: гистограмма, декоратор timed и MetricsMiddleware
+
+Замеряется стоимость одного наблюдения в гистограмме, вызова async-функции
+через timed и обработки апдейта диспетчером aiogram с MetricsMiddleware и
+без него (обработчик ничего не отправляет, поэтому сеть не нужна).
+
+Запуск из корня проекта:
+    python benchmarks/bench_metrics.py --calls 200000 --updates 5000 --rounds 5
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from aiogram import Bot, Dispatcher
+from aiogram.types import Update
+from database.metrics import Histogram, HistogramFamily, timed
+from bot.metrics import MetricsMiddleware
+
+async def noop(value):
+    return value
+
+def make_update(update_id: int) -> Update:
+    return Update.model_validate({
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id, "date": 1700000000, "text": "/ping",
+            "chat": {"id": 1, "type": "private"},
+            "from": {"id": 1, "is_bot": False, "first_name": "Bench"}
+        }
+    })
+
+async def bench_calls(calls: int):
+    plain = noop
+    wrapped = timed(noop, family=HistogramFamily('bench', "bench", 'function'))
+
+    start = time.perf_counter()
+    for i in range(calls):
+        await plain(i)
+    plain_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for i in range(calls):
+        await wrapped(i)
+    return plain_time, time.perf_counter() - start
+
+async def bench_updates(updates: int, rounds: int):
+    """Лучшее время из rounds прогонов с метриками и без (прогоны чередуются)"""
+    async def cmd_ping(message):
+        return None
+
+    bot = Bot(token="123456:BENCH")
+    dispatchers = {}
+    for with_metrics in (False, True):
+        dp = Dispatcher()
+        if with_metrics:
+            dp.message.middleware(MetricsMiddleware())
+        dp.message.register(cmd_ping)
+        dispatchers[with_metrics] = dp
+    batch = [make_update(i) for i in range(updates)]
+
+    best = {False: float('inf'), True: float('inf')}
+    for _ in range(rounds):
+        for with_metrics, dp in dispatchers.items():
+            start = time.perf_counter()
+            for update in batch:
+                await dp.feed_update(bot, update)
+            best[with_metrics] = min(best[with_metrics], time.perf_counter() - start)
+    await bot.session.close()
+    return best[False], best[True]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--calls', type=int, default=200000, help="вызовов для гистограммы и timed")
+    parser.add_argument('--updates', type=int, default=5000, help="апдейтов через диспетчер за прогон")
+    parser.add_argument('--rounds', type=int, default=5, help="прогонов диспетчера")
+    args = parser.parse_args()
+
+    histogram = Histogram()
+    values = [(i % 1000) / 10000 for i in range(args.calls)]
+    start = time.perf_counter()
+    for value in values:
+        histogram.observe(value)
+    observe = time.perf_counter() - start
+
+    plain, wrapped = asyncio.run(bench_calls(args.calls))
+    without, with_metrics = asyncio.run(bench_updates(args.updates, args.rounds))
+
+    print(f"Histogram.observe:       {observe * 1e9 / args.calls:8.0f} нс/наблюдение")
+    print(f"async-вызов без timed:   {plain * 1e9 / args.calls:8.0f} нс/вызов")
+    print(f"async-вызов с timed:     {wrapped * 1e9 / args.calls:8.0f} нс/вызов "
+          f"(+{(wrapped - plain) * 1e9 / args.calls:.0f} нс)")
+    print(f"апдейт без метрик:       {without * 1e6 / args.updates:8.1f} мкс/апдейт")
+    print(f"апдейт с MetricsMiddleware: {with_metrics * 1e6 / args.updates:5.1f} мкс/апдейт "
+          f"(+{(with_metrics - without) * 1e6 / args.updates:.1f} мкс, "
+          f"{(with_metrics / without - 1) * 100:+.1f}%)")
+
+if __name__ == "__main__":
+    main()
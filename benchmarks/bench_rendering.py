@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Микробенчмарк отрисовки карточек: цепочки .replace и конкатенация против кэша фрагментов
+
+Старый вариант повторяет код review.py до перехода на bot/rendering.py:
+каждое поле экранируется тремя .replace при каждом показе, сообщение /review
+собирается через +=. Новый вариант берет экранированные фрагменты из кэша по
+ID слова и собирает сообщение через join. Перед замером проверяется, что
+тексты совпадают.
+
+Запуск из корня проекта:
+    python benchmarks/bench_rendering.py --words 2000 --renders 20000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from bot.rendering import CardRenderer
+
+class StaticCatalog:
+    """Каталог с неизменной версией (кэш не сбрасывается)"""
+    version = 1
+
+def make_words(count: int, seed: int = 1):
+    rnd = random.Random(seed)
+    alphabet = 'abcdefghijklmnopqrstuvwxyz _*`'
+    text = lambda n: ''.join(rnd.choice(alphabet) for _ in range(n))
+    return [
+        {
+            'word_id': i,
+            'word': text(8),
+            'transcription': text(10),
+            'translation': text(12),
+            'example': text(40),
+            'interval_days': rnd.randint(1, 60),
+        }
+        for i in range(count)
+    ]
+
+def old_review_text(review_words, stats):
+    review_text = "🔄 Интервальное повторение\n\n"
+    review_text += "📊 Статистика:\n"
+    review_text += f"• Всего слов в системе: {stats['total_words']}\n"
+    review_text += f"• Слов для повторения сегодня: {stats['due_today']}\n"
+    review_text += f"• Всего повторений: {stats['total_reviews']}\n\n"
+    review_text += f"📝 Слова для повторения ({len(review_words)}):\n\n"
+    for i, word_data in enumerate(review_words, 1):
+        word = word_data['word'].replace('_', '\\_').replace('*', '\\*').replace('`', '\\`')
+        transcription = word_data['transcription'].replace('_', '\\_').replace('*', '\\*').replace('`', '\\`')
+        translation = word_data['translation'].replace('_', '\\_').replace('*', '\\*').replace('`', '\\`')
+        example = word_data['example'].replace('_', '\\_').replace('*', '\\*').replace('`', '\\`')
+        review_text += (
+            f"{i}. {word} [{transcription}]\n"
+            f"   Перевод: {translation}\n"
+            f"   Пример: {example}\n"
+            f"   Интервал: {word_data['interval_days']} дн.\n\n"
+        )
+    review_text += "💡 Используй /review_test для тестирования этих слов!"
+    return review_text
+
+def new_review_text(renderer, review_words, stats):
+    parts = [
+        "🔄 Интервальное повторение\n\n",
+        "📊 Статистика:\n",
+        f"• Всего слов в системе: {stats['total_words']}\n",
+        f"• Слов для повторения сегодня: {stats['due_today']}\n",
+        f"• Всего повторений: {stats['total_reviews']}\n\n",
+        f"📝 Слова для повторения ({len(review_words)}):\n\n",
+    ]
+    for i, word_data in enumerate(review_words, 1):
+        parts.append(f"{i}. ")
+        parts.append(renderer.render('review_item', word_data))
+        parts.append(f"   Интервал: {word_data['interval_days']} дн.\n\n")
+    parts.append("💡 Используй /review_test для тестирования этих слов!")
+    return "".join(parts)
+
+def measure(fn, batches):
+    start = time.perf_counter()
+    for batch in batches:
+        fn(batch)
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--words', type=int, default=2000, help="размер каталога")
+    parser.add_argument('--renders', type=int, default=20000, help="сколько сообщений /review отрисовать")
+    parser.add_argument('--per-message', type=int, default=5, help="слов в одном сообщении")
+    args = parser.parse_args()
+
+    words = make_words(args.words)
+    rnd = random.Random(2)
+    batches = [rnd.sample(words, args.per_message) for _ in range(args.renders)]
+    stats = {'total_words': 120, 'due_today': 7, 'total_reviews': 480}
+    renderer = CardRenderer(catalog=StaticCatalog())
+
+    for batch in batches[:100]:
+        assert old_review_text(batch, stats) == new_review_text(renderer, batch, stats)
+
+    old = measure(lambda batch: old_review_text(batch, stats), batches)
+    renderer = CardRenderer(catalog=StaticCatalog())
+    new = measure(lambda batch: new_review_text(renderer, batch, stats), batches)
+
+    print(f"Сообщений: {args.renders} по {args.per_message} слов, каталог {args.words} слов")
+    print(f"  .replace + конкатенация: {old * 1e6 / args.renders:8.2f} мкс/сообщение")
+    print(f"  кэш фрагментов + join:   {new * 1e6 / args.renders:8.2f} мкс/сообщение")
+    print(f"  ускорение: x{old / new:.1f}, попаданий в кэш: {renderer.hits}, промахов: {renderer.misses}")
+
+if __name__ == "__main__":
+    main()
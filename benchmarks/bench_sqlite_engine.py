@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк настроек SQLite на пути ответа на тест
+
+Писатели имитируют ответы пользователей (update_test_results +
+update_spaced_repetition), читатели параллельно выполняют
+get_words_for_review и get_spaced_repetition_stats. Каждая конфигурация
+запускается в отдельном процессе со своей временной базой, потому что
+настройки движка читаются из переменных окружения при импорте.
+
+"до"    - настройки SQLite по умолчанию (journal DELETE, synchronous FULL)
+"после" - значения по умолчанию из src/database/config.py (WAL, NORMAL, mmap, кэш)
+
+Запуск:
+    python benchmarks/bench_sqlite_engine.py --seconds 5 --writers 4 --readers 4
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+
+CONFIGS = {
+    "до (по умолчанию SQLite)": {
+        'SQLITE_JOURNAL_MODE': 'DELETE',
+        'SQLITE_SYNCHRONOUS': 'FULL',
+        'SQLITE_MMAP_SIZE': '0',
+        'SQLITE_CACHE_SIZE': '-2000',
+    },
+    "после (config.py)": {},
+}
+
+def worker(args):
+    """Замер в текущем процессе (настройки уже заданы окружением)"""
+    sys.path.append(SRC)
+    from sqlalchemy import text
+    from database.models import (
+        engine, init_db, get_words_for_review, get_spaced_repetition_stats,
+        update_spaced_repetition, update_test_results
+    )
+    
+    init_db()
+    with engine.begin() as connection:
+        connection.execute(text("INSERT INTO words (word, transcription, translation, example, level) "
+                                "VALUES ('w', '-', '-', '-', 'A1')"))
+        word_id = connection.execute(text("SELECT max(word_id) FROM words")).scalar()
+        for user_id in range(args.users):
+            connection.execute(text("INSERT INTO users (user_id, level, correct_answers, incorrect_answers) "
+                                    "VALUES (:u, 'A1', 0, 0)"), {'u': user_id})
+        connection.execute(text(
+            "INSERT INTO spaced_repetition (user_id, word_id, word, interval_days, next_review_date, "
+            "ease_factor, consecutive_correct, consecutive_incorrect, total_reviews) "
+            "SELECT user_id, :w, 'w', 1, CAST(julianday('now', 'localtime') - 1721424.5 AS INTEGER), "
+            "2.5, 0, 0, 0 FROM users"
+        ), {'w': word_id})
+        card_ids = connection.execute(text("SELECT id, user_id FROM spaced_repetition")).all()
+    
+    stop = threading.Event()
+    writes, reads, read_latencies = [0], [0], []
+    lock = threading.Lock()
+    
+    def writer(seed):
+        rnd = random.Random(seed)
+        count = 0
+        while not stop.is_set():
+            card_id, user_id = rnd.choice(card_ids)
+            is_correct = rnd.random() < 0.7
+            update_test_results(user_id, is_correct)
+            update_spaced_repetition(card_id, is_correct, user_id=user_id)
+            count += 1
+        with lock:
+            writes[0] += count
+    
+    def reader(seed):
+        rnd = random.Random(seed)
+        count, latencies = 0, []
+        while not stop.is_set():
+            user_id = rnd.randrange(args.users)
+            start = time.perf_counter()
+            get_words_for_review(user_id, 10)
+            get_spaced_repetition_stats(user_id)
+            latencies.append(time.perf_counter() - start)
+            count += 1
+        with lock:
+            reads[0] += count
+            read_latencies.extend(latencies)
+    
+    threads = [threading.Thread(target=writer, args=(i,)) for i in range(args.writers)]
+    threads += [threading.Thread(target=reader, args=(100 + i,)) for i in range(args.readers)]
+    for thread in threads:
+        thread.start()
+    time.sleep(args.seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    
+    read_latencies.sort()
+    print(json.dumps({
+        'writes_per_sec': writes[0] / args.seconds,
+        'reads_per_sec': reads[0] / args.seconds,
+        'read_p99_ms': read_latencies[int(len(read_latencies) * 0.99)] * 1000 if read_latencies else 0,
+    }))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--writers', type=int, default=4)
+    parser.add_argument('--readers', type=int, default=4)
+    parser.add_argument('--worker', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    
+    if args.worker:
+        worker(args)
+        return
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        for i, (label, overrides) in enumerate(CONFIGS.items()):
+            env = dict(os.environ, DATABASE_PATH=os.path.join(tmp, f"bench_{i}.db"), **overrides)
+            output = subprocess.run(
+                [sys.executable, __file__, '--worker', '--seconds', str(args.seconds), '--users', str(args.users),
+                 '--writers', str(args.writers), '--readers', str(args.readers)],
+                env=env, capture_output=True, text=True, check=True
+            ).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            print(
+                f"{label:>24}: записей {result['writes_per_sec']:8.1f}/с, "
+                f"чтений {result['reads_per_sec']:8.1f}/с, p99 чтения {result['read_p99_ms']:7.1f} мс"
+            )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+Нагрузочный тест: синтетические пользователи через Dispatcher.feed_update без сети
+
+Создается временная база с каталогом слов, диспетчер собирается так же,
+как в bot/main.py (все обработчики, middleware, FSM в SQLite), а Bot
+получает сессию-заглушку: запросы к Telegram API не уходят в сеть, а
+отвечают через --api-latency секунд. Каждый пользователь проходит /start
+и выбор уровня, затем отправляет команды по смеси COMMAND_MIX и отвечает
+на тесты кнопками из последнего сообщения бота. Одновременно активны
+--concurrency пользователей.
+
+Отчет: пропускная способность (апдейтов/с), p50/p95/p99 задержки
+feed_update по типам апдейтов и в целом, ошибки, а также признаки
+конкуренции за базу: доля времени апдейта в SQL-запросах, пик занятых
+соединений пула, ошибки "database is locked" и максимальная задержка
+event loop.
+
+Запуск из корня проекта:
+    python benchmarks/load_test.py --users 200 --concurrency 50 --commands 20
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from typing import Dict, List
+
+# База создается до импорта модулей database: путь берется из окружения при импорте
+_tmpdir = tempfile.TemporaryDirectory(prefix='wordbot-load-')
+os.environ['DATABASE_PATH'] = os.path.join(_tmpdir.name, 'load.db')
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'tests'))
+
+from aiogram import Bot, Dispatcher
+from aiogram.types import Update
+from sqlalchemy.exc import OperationalError
+from database import async_models
+from database.async_models import AsyncSession, async_engine, init_db, close_db
+from database.catalog import word_catalog
+from database import models
+from database.query_stats import count_queries
+from bot import register_all_handlers
+from bot.storage import SQLiteStorage
+from stubs import StubSession, message_update, callback_update
+
+LEVELS = ('A1', 'A2', 'B1', 'B2')
+
+# Доли команд после регистрации; test и review_test продолжаются нажатием кнопки
+COMMAND_MIX = {
+    '/words': 20,
+    '/test': 30,
+    '/review_test': 30,
+    '/review': 10,
+    '/stats': 10,
+}
+
+class UpdateFactory:
+    """Апдейты Telegram от синтетических пользователей"""
+
+    def __init__(self):
+        self._update_id = 0
+
+    def _next_id(self) -> int:
+        self._update_id += 1
+        return self._update_id
+
+    def message(self, user_id: int, text: str) -> Update:
+        return message_update(self._next_id(), user_id, text, date=int(time.time()))
+
+    def callback(self, user_id: int, data: str) -> Update:
+        return callback_update(self._next_id(), user_id, data, date=int(time.time()))
+
+class LoadResult:
+    """Задержки и счетчики прогона"""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.db_time = 0.0
+        self.statements = 0
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.locked = 0
+        self.peak_connections = 0
+        self.max_lag = 0.0
+
+    def all_latencies(self) -> List[float]:
+        return sorted(value for values in self.latencies.values() for value in values)
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+def populate_catalog(words_per_level: int, seed: int):
+    """Каталог слов во временной базе (одна транзакция)"""
+    rnd = random.Random(seed)
+    models.init_db()
+    models.load_catalog(
+        (f"{level.lower()}word{i}", f"[w{i}]", f"перевод {level} {i} {rnd.randint(0, 9999)}",
+         f"Example sentence {i}.", level)
+        for level in LEVELS for i in range(words_per_level)
+    )
+    word_catalog.load()
+
+async def feed(dp: Dispatcher, bot: Bot, update: Update, kind: str, result: LoadResult):
+    start = time.perf_counter()
+    with count_queries() as stats:
+        try:
+            await dp.feed_update(bot, update)
+        except OperationalError as error:
+            result.locked += 'locked' in str(error)
+            result.errors[type(error).__name__] += 1
+        except Exception as error:
+            result.errors[type(error).__name__] += 1
+    result.latencies[kind].append(time.perf_counter() - start)
+    result.db_time += stats.db_time
+    result.statements += stats.statements
+
+async def simulate_user(dp: Dispatcher, bot: Bot, session: StubSession, factory: UpdateFactory,
+                        user_id: int, commands: int, rnd: random.Random, result: LoadResult):
+    """Сценарий одного пользователя: регистрация и commands команд из смеси"""
+    await feed(dp, bot, factory.message(user_id, '/start'), '/start', result)
+    await feed(dp, bot, factory.callback(user_id, f"level_{rnd.choice(LEVELS)}"), 'level_', result)
+
+    names, weights = list(COMMAND_MIX), list(COMMAND_MIX.values())
+    for _ in range(commands):
+        command = rnd.choices(names, weights)[0]
+        await feed(dp, bot, factory.message(user_id, command), command, result)
+        buttons = session.keyboards.get(user_id) or []
+        if command in ('/test', '/review_test') and buttons:
+            answer = rnd.choice(buttons)
+            await feed(dp, bot, factory.callback(user_id, answer), answer.split('_')[0] + '_', result)
+
+async def monitor(stop: asyncio.Event, result: LoadResult):
+    """Задержка event loop и пик занятых соединений пула"""
+    interval = 0.001
+    pool = async_engine.sync_engine.pool
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        result.max_lag = max(result.max_lag, time.perf_counter() - start - interval)
+        result.peak_connections = max(result.peak_connections, pool.checkedout())
+
+async def run(users: int, concurrency: int, commands: int, api_latency: float, seed: int):
+    await init_db()
+    session = StubSession(api_latency, keep_calls=False)
+    bot = Bot(token="123456:LOADTEST", session=session)
+    storage = SQLiteStorage(AsyncSession)
+    dp = Dispatcher(storage=storage)
+    register_all_handlers(dp)
+    factory = UpdateFactory()
+    result = LoadResult()
+
+    slots = asyncio.Semaphore(concurrency)
+
+    async def user_task(index: int):
+        async with slots:
+            rnd = random.Random(seed * 1_000_003 + index)
+            await simulate_user(dp, bot, session, factory, 5_000_000 + index, commands, rnd, result)
+
+    stop = asyncio.Event()
+    watcher = asyncio.create_task(monitor(stop, result))
+    flusher = asyncio.create_task(storage.run())
+    background = [asyncio.create_task(async_models.review_buffer.run())] if async_models.review_buffer else []
+
+    start = time.perf_counter()
+    await asyncio.gather(*(user_task(i) for i in range(users)))
+    elapsed = time.perf_counter() - start
+
+    stop.set()
+    await watcher
+    for task in [flusher] + background:
+        task.cancel()
+    await storage.close()
+    await close_db()
+    return elapsed, result, session.requests
+
+def report(elapsed: float, result: LoadResult, api_requests: int, concurrency: int):
+    latencies = result.all_latencies()
+    total = len(latencies)
+    print(f"Апдейтов: {total} за {elapsed:.2f} с, одновременно пользователей: {concurrency}")
+    print(f"  пропускная способность: {total / elapsed:8.1f} апдейтов/с, вызовов API: {api_requests}")
+    print(f"  задержка: p50 {percentile(latencies, 0.5) * 1000:7.1f} мс, "
+          f"p95 {percentile(latencies, 0.95) * 1000:7.1f} мс, p99 {percentile(latencies, 0.99) * 1000:7.1f} мс")
+    print("  по типам апдейтов:")
+    for kind in sorted(result.latencies):
+        values = sorted(result.latencies[kind])
+        print(f"    {kind:<13} {len(values):6d} шт., p50 {percentile(values, 0.5) * 1000:7.1f} мс, "
+              f"p95 {percentile(values, 0.95) * 1000:7.1f} мс, p99 {percentile(values, 0.99) * 1000:7.1f} мс")
+    busy = sum(latencies)
+    pool = async_engine.sync_engine.pool
+    print("  база данных:")
+    print(f"    SQL-запросов: {result.statements} ({result.statements / max(total, 1):.1f} на апдейт), "
+          f"доля времени апдейтов в SQL: {result.db_time / busy * 100 if busy else 0:.1f}%")
+    print(f"    пик занятых соединений: {result.peak_connections} из {pool.size()} (+ переполнение), "
+          f"ошибок 'database is locked': {result.locked}")
+    print(f"    макс. задержка event loop: {result.max_lag * 1000:.1f} мс")
+    if result.errors:
+        print("  ошибки: " + ", ".join(f"{name}: {count}" for name, count in sorted(result.errors.items())))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--users', type=int, default=200, help="синтетических пользователей")
+    parser.add_argument('--concurrency', type=int, default=50, help="пользователей одновременно")
+    parser.add_argument('--commands', type=int, default=20, help="команд на пользователя после регистрации")
+    parser.add_argument('--api-latency', type=float, default=0.0, help="задержка ответа Telegram API, с")
+    parser.add_argument('--words-per-level', type=int, default=500, help="слов каталога на уровень")
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    try:
+        populate_catalog(args.words_per_level, args.seed)
+        elapsed, result, api_requests = asyncio.run(
+            run(args.users, args.concurrency, args.commands, args.api_latency, args.seed)
+        )
+        report(elapsed, result, api_requests, args.concurrency)
+    finally:
+        _tmpdir.cleanup()
+
+if __name__ == "__main__":
+    main()
@@ -2,6 +2,7 @@
 """
 Точка входа для запуска бота
 """
+import argparse
 import sys
 import os
 
@@ -12,4 +13,8 @@ from bot.main import main
 import asyncio
 
 if __name__ == "__main__":
-    asyncio.run(main()) 
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Запуск бота")
+    parser.add_argument('--mode', choices=['polling', 'webhook'],
+                        help="режим получения апдейтов (по умолчанию BOT_MODE из .env)")
+    args = parser.parse_args()
+    asyncio.run(main(args.mode)) 
\ No newline at end of file
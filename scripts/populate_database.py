@@ -1,10 +1,25 @@
+import argparse
+import csv
 import sys
 import os
+import time
+from typing import List, Optional, Tuple
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
-from database.models import init_db, add_word
+from database.models import init_db, load_catalog
 
-def populate_words():
-    """Заполнение базы данных словами"""
+CSV_COLUMNS = ('word', 'transcription', 'translation', 'example', 'level')
+
+def read_csv(path: str) -> List[Tuple[str, str, str, str, str]]:
+    """Слова из CSV с заголовком word,transcription,translation,example,level"""
+    with open(path, encoding='utf-8', newline='') as f:
+        return [tuple(row[column] for column in CSV_COLUMNS) for row in csv.DictReader(f)]
+
+def populate_words(csv_path: Optional[str] = None):
+    """Заполнение базы данных словами
+
+    Загружается встроенный набор слов и, если указан csv_path, слова из CSV.
+    Повторный запуск не создает дубликатов: слова сравниваются по (word, level).
+    """
     
     # Инициализация базы данных
     init_db()
@@ -288,21 +303,24 @@ def populate_words():
         ("vary", "[ˈveəri]", "варьироваться", "Prices vary significantly.", "B2"),
     ]
     
-    # Добавляем все слова в базу данных
+    # Загружаем все слова в базу данных одной транзакцией
     all_words = a1_words + a2_words + b1_words + b2_words
+    if csv_path:
+        all_words += read_csv(csv_path)
     
-    print("Начинаю заполнение базы данных словами...")
-    
-    for word_data in all_words:
-        word, transcription, translation, example, level = word_data
-        add_word(word, transcription, translation, example, level)
-        print(f"Добавлено слово: {word} ({level})")
+    print(f"Загружаю {len(all_words)} слов...")
+    start = time.perf_counter()
+    stats = load_catalog(all_words)
+    elapsed = time.perf_counter() - start
     
-    print(f"\nБаза данных заполнена! Добавлено {len(all_words)} слов:")
-    print(f"- A1: {len(a1_words)} слов")
-    print(f"- A2: {len(a2_words)} слов")
-    print(f"- B1: {len(b1_words)} слов")
-    print(f"- B2: {len(b2_words)} слов")
+    print(f"\nБаза данных заполнена за {elapsed:.2f} с:")
+    print(f"- добавлено: {stats['inserted']}")
+    print(f"- обновлено: {stats['updated']}")
+    print(f"- без изменений: {stats['unchanged']}")
+    return stats
 
 if __name__ == "__main__":
-    populate_words() 
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Заполнение базы данных словами")
+    parser.add_argument('--csv', help="дополнительный каталог: CSV с колонками " + ",".join(CSV_COLUMNS))
+    args = parser.parse_args()
+    populate_words(args.csv)
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Массовый пересчет расписаний интервального повторения
+
+Нужен после смены алгоритма (SCHEDULER) или правил интервалов: существующие
+карточки пересчитываются пачками без обращения к боту.
+
+Запуск:
+    python scripts/reschedule.py --scheduler sm2 --dry-run
+    python scripts/reschedule.py --scheduler sm2 --checkpoint reschedule.json
+"""
+import argparse
+import json
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+from database.engine import create_sqlite_engine
+from database.migrations import run_migrations
+from database.models import Base
+from database.reschedule import reschedule_cards
+from database.scheduling import get_scheduler
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--db', help="путь к базе (по умолчанию DATABASE_PATH)")
+    parser.add_argument('--scheduler', help="алгоритм: ladder, sm2, fsrs (по умолчанию SCHEDULER)")
+    parser.add_argument('--chunk-size', type=int, default=10000, help="карточек в одной транзакции")
+    parser.add_argument('--dry-run', action='store_true', help="только посчитать расхождения, ничего не записывать")
+    parser.add_argument('--checkpoint', default='reschedule.checkpoint.json',
+                        help="файл контрольной точки для продолжения после остановки")
+    args = parser.parse_args()
+
+    scheduler = get_scheduler(args.scheduler)
+    engine = create_sqlite_engine(args.db)
+    # Схема должна быть актуальной (даты - номера дней)
+    with engine.begin() as connection:
+        Base.metadata.create_all(connection)
+        run_migrations(connection)
+
+    def progress(stats):
+        print(f"  обработано {stats.scanned}, изменено {stats.changed} (последний id {stats.last_id})", file=sys.stderr)
+
+    mode = "пробный прогон" if args.dry_run else "пересчет"
+    print(f"🔄 {mode}: алгоритм {scheduler.name}", file=sys.stderr)
+    stats = reschedule_cards(
+        engine, scheduler,
+        chunk_size=args.chunk_size,
+        dry_run=args.dry_run,
+        checkpoint_path=args.checkpoint,
+        progress=progress
+    )
+    print(json.dumps(stats.as_dict(), ensure_ascii=False, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,23 @@
 from aiogram import Dispatcher
+from .metrics import register_metrics_middleware
+from .middlewares import register_middlewares
 from .start import register_start_handlers
 from .words import register_words_handlers
 from .test import register_test_handlers
 from .stats import register_stats_handlers
 from .help import register_help_handlers
 from .review import register_review_handlers
+from .reminders import register_reminder_handlers
 
 def register_all_handlers(dp: Dispatcher):
     """Регистрация всех обработчиков"""
+    # Измерение подключается первым, чтобы учитывать и отказы незарегистрированным
+    register_metrics_middleware(dp)
+    register_middlewares(dp)
     register_start_handlers(dp)
     register_words_handlers(dp)
     register_test_handlers(dp)
     register_stats_handlers(dp)
     register_help_handlers(dp)
-    register_review_handlers(dp) 
\ No newline at end of file
+    register_review_handlers(dp)
+    register_reminder_handlers(dp) 
\ No newline at end of file
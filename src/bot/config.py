@@ -7,9 +7,39 @@ load_dotenv()
 # Токен бота (замените на свой токен от BotFather)
 BOT_TOKEN = os.getenv('BOT_TOKEN', 'your_bot_token_here')
 
-# Настройки базы данных
-DATABASE_PATH = 'words_bot.db'
-
 # Настройки бота
 WORDS_PER_DAY = 5
-TEST_DELAY_HOURS = 1  # Задержка перед показом теста в часах 
\ No newline at end of file
+TEST_DELAY_HOURS = 1  # Задержка перед показом теста в часах
+
+# Напоминания о повторении
+REMINDERS_ENABLED = os.getenv('REMINDERS_ENABLED', '1') == '1'
+REMINDER_TICK_SECONDS = float(os.getenv('REMINDER_TICK_SECONDS', '60'))
+# Не больше REMINDER_RATE сообщений в секунду и REMINDER_CONCURRENCY пользователей одновременно
+REMINDER_RATE = float(os.getenv('REMINDER_RATE', '25'))
+REMINDER_CONCURRENCY = int(os.getenv('REMINDER_CONCURRENCY', '10'))
+
+# Режим получения апдейтов: polling или webhook
+BOT_MODE = os.getenv('BOT_MODE', 'polling')
+WEBHOOK_HOST = os.getenv('WEBHOOK_HOST', '0.0.0.0')
+WEBHOOK_PORT = int(os.getenv('WEBHOOK_PORT', '8080'))
+WEBHOOK_PATH = os.getenv('WEBHOOK_PATH', '/webhook')
+WEBHOOK_SECRET = os.getenv('WEBHOOK_SECRET') or None
+WEBHOOK_BASE_URL = os.getenv('WEBHOOK_BASE_URL') or None  # публичный адрес, например https://example.com
+WEBHOOK_MAX_CONCURRENCY = int(os.getenv('WEBHOOK_MAX_CONCURRENCY', '100'))
+# Сколько секунд при остановке ждать апдейты, которые еще обрабатываются
+WEBHOOK_DRAIN_TIMEOUT = float(os.getenv('WEBHOOK_DRAIN_TIMEOUT', '30'))
+
+# Хранилище FSM в SQLite: FSM_FLUSH_INTERVAL=0 - сквозная запись, больше 0 -
+# отложенная (при падении теряются изменения за последние FSM_FLUSH_INTERVAL секунд)
+FSM_CACHE_SIZE = int(os.getenv('FSM_CACHE_SIZE', '10000'))
+FSM_FLUSH_INTERVAL = float(os.getenv('FSM_FLUSH_INTERVAL', '0'))
+FSM_FLUSH_BATCH = int(os.getenv('FSM_FLUSH_BATCH', '200'))
+
+# HTTP-эндпоинт метрик Prometheus (0 - выключен)
+METRICS_HOST = os.getenv('METRICS_HOST', '127.0.0.1')
+METRICS_PORT = int(os.getenv('METRICS_PORT', '0'))
+
+# Учет SQL-запросов за апдейт: при QUERY_DEBUG=1 - предупреждение, если
+# обработчик выполнил больше QUERY_BUDGET запросов (флаг query_budget переопределяет)
+QUERY_DEBUG = os.getenv('QUERY_DEBUG', '0') == '1'
+QUERY_BUDGET = int(os.getenv('QUERY_BUDGET', '5'))
@@ -0,0 +1,72 @@
+"""Неправильные варианты ответов для тестов
+
+Для каждого уровня заранее строится пул уникальных переводов (по одному
+слову-представителю на перевод), поэтому выбор k вариантов не обращается
+к базе данных и занимает O(k). Одинаковые переводы (например, два
+"извините" у "sorry" и "excuse me") попадают в пул один раз, так что среди
+вариантов не бывает дублей и совпадений с правильным ответом.
+"""
+import random
+from typing import Dict, List, Optional
+from database.catalog import WordCatalog, word_catalog
+
+class DistractorPool:
+    """Пулы переводов по уровням, перестраиваются при перезагрузке каталога"""
+    
+    def __init__(self, catalog: WordCatalog = word_catalog, rng: Optional[random.Random] = None):
+        self._catalog = catalog
+        self._rng = rng or random.Random()
+        self._version = None
+        self._levels: Dict[str, List[Dict]] = {}
+        self._all: List[Dict] = []
+    
+    def _build(self):
+        levels = {}
+        everything = {}
+        for level in self._catalog.levels():
+            unique = {}
+            for entry in self._catalog.entries_by_level(level):
+                unique.setdefault(entry.translation, entry)
+                everything.setdefault(entry.translation, entry)
+            levels[level] = [
+                {'word_id': entry.word_id, 'translation': entry.translation}
+                for entry in unique.values()
+            ]
+        self._levels = levels
+        self._all = [
+            {'word_id': entry.word_id, 'translation': entry.translation}
+            for entry in everything.values()
+        ]
+        self._version = self._catalog.version
+    
+    def _ensure_fresh(self):
+        if not self._catalog.loaded or self._catalog.version != self._version:
+            self._catalog.levels()  # загружает каталог при первом обращении
+            self._build()
+    
+    def _pick(self, pool: List[Dict], correct_translation: str, k: int, exclude: set) -> List[Dict]:
+        # Берем на один вариант больше: правильный перевод встречается в пуле не более одного раза
+        count = min(len(pool), k + 1 + len(exclude))
+        picked = []
+        for option in self._rng.sample(pool, count):
+            if option['translation'] == correct_translation or option['translation'] in exclude:
+                continue
+            picked.append(dict(option))
+            if len(picked) == k:
+                break
+        return picked
+    
+    def sample(self, level: str, correct_translation: str, k: int = 3) -> List[Dict]:
+        """Выбор k различных неправильных вариантов для уровня
+
+        Если на уровне недостаточно переводов, варианты добираются из других уровней.
+        """
+        self._ensure_fresh()
+        options = self._pick(self._levels.get(level, []), correct_translation, k, set())
+        if len(options) < k:
+            taken = {option['translation'] for option in options}
+            options += self._pick(self._all, correct_translation, k - len(options), taken)
+        return options
+
+# Общий пул процесса
+distractor_pool = DistractorPool()
@@ -1,4 +1,23 @@
 from aiogram import Dispatcher, types, F
+from database.scheduling import scheduler
+
+def _days(count: int) -> str:
+    """Число дней с правильным окончанием"""
+    if count % 10 == 1 and count % 100 != 11:
+        return f"{count} день"
+    if 2 <= count % 10 <= 4 and not 12 <= count % 100 <= 14:
+        return f"{count} дня"
+    return f"{count} дней"
+
+def schedule_help() -> str:
+    """Интервалы текущего алгоритма повторения (считаются тем же планировщиком)"""
+    intervals, after_mistake = scheduler.preview()
+    lines = [f"• {i}-й правильный ответ: повторение через {_days(days)}\n" for i, days in enumerate(intervals, 1)]
+    lines.append(f"• Неправильный ответ: повторение через {_days(after_mistake)}\n")
+    return "".join(lines)
+
+# Алгоритм выбирается при запуске (SCHEDULER), поэтому текст считается один раз
+SCHEDULE_HELP = schedule_help()
 
 async def cmd_help(message: types.Message):
     """Обработчик команды /help"""
@@ -12,7 +31,8 @@ async def cmd_help(message: types.Message):
         "• /help - Показать эту справку\n\n"
         "🔄 Интервальное повторение:\n"
         "• /review - Посмотреть слова для повторения\n"
-        "• /review_test - Пройти тест повторения\n\n"
+        "• /review_test - Пройти тест повторения\n"
+        "• /remind - Настроить напоминания о повторении\n\n"
         "📖 Как использовать бота:\n"
         "1. Напиши /start и выбери свой уровень\n"
         "2. Используй /words для получения слов\n"
@@ -30,13 +50,7 @@ async def cmd_help(message: types.Message):
         "• B1 - Средний\n"
         "• B2 - Выше среднего\n\n"
         "🔄 Алгоритм интервального повторения:\n"
-        "• 1-й правильный ответ: повторение через 1 день\n"
-        "• 2-й правильный ответ: повторение через 3 дня\n"
-        "• 3-й правильный ответ: повторение через неделю\n"
-        "• 4-й правильный ответ: повторение через 2 недели\n"
-        "• 5-й правильный ответ: повторение через 3 недели\n"
-        "• И так далее: интервал увеличивается на неделю\n"
-        "• Неправильный ответ: сброс на 1 день\n\n"
+        f"{SCHEDULE_HELP}\n"
         "📞 Поддержка:\n"
         "Если у тебя есть вопросы, обратись к разработчику."
     )
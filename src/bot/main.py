@@ -1,27 +1,79 @@
 import asyncio
 import logging
+from typing import Optional
 from aiogram import Bot, Dispatcher
-from aiogram.fsm.storage.memory import MemoryStorage
-from .config import BOT_TOKEN
-from database.models import init_db
+from .config import (
+    BOT_TOKEN, FSM_CACHE_SIZE, FSM_FLUSH_INTERVAL, FSM_FLUSH_BATCH, REMINDERS_ENABLED, REMINDER_TICK_SECONDS, BOT_MODE,
+    REMINDER_RATE, REMINDER_CONCURRENCY,
+    WEBHOOK_HOST, WEBHOOK_PORT, WEBHOOK_PATH, WEBHOOK_SECRET, WEBHOOK_BASE_URL, WEBHOOK_MAX_CONCURRENCY,
+    WEBHOOK_DRAIN_TIMEOUT, METRICS_HOST, METRICS_PORT
+)
+from database.async_models import init_db, close_db, review_buffer, AsyncSession
+from database.catalog import word_catalog, watch_catalog
+from .reminders import ReminderScheduler
+from .storage import SQLiteStorage
+from .webhook import run_webhook
+from .metrics import run_metrics_server
 from . import register_all_handlers
 
 # Настройка логирования
 logging.basicConfig(level=logging.INFO)
 
-async def main():
-    """Основная функция запуска бота"""
-    logging.info("Бот запускается...")
+async def main(mode: Optional[str] = None):
+    """Основная функция запуска бота
+
+    mode - polling или webhook (по умолчанию BOT_MODE из окружения)
+    """
+    mode = mode or BOT_MODE
+    if mode not in ('polling', 'webhook'):
+        raise ValueError(f"Неизвестный режим запуска: {mode}")
+    logging.info("Бот запускается (%s)...", mode)
     
     # Инициализация бота без Markdown
     bot = Bot(token=BOT_TOKEN)
-    dp = Dispatcher()
+    # Состояния FSM хранятся в SQLite и переживают перезапуск
+    storage = SQLiteStorage(AsyncSession, FSM_CACHE_SIZE, FSM_FLUSH_INTERVAL, FSM_FLUSH_BATCH)
+    dp = Dispatcher(storage=storage)
+    
+    # Инициализация базы данных и загрузка каталога слов
+    await init_db()
+    word_catalog.load()
+    catalog_watcher = asyncio.create_task(watch_catalog())
+    background = [catalog_watcher, asyncio.create_task(storage.run())]
+    if review_buffer is not None:
+        background.append(asyncio.create_task(review_buffer.run()))
+    if REMINDERS_ENABLED:
+        dp['reminders'] = ReminderScheduler(
+            bot, tick=REMINDER_TICK_SECONDS, rate=REMINDER_RATE, concurrency=REMINDER_CONCURRENCY
+        )
+        background.append(asyncio.create_task(dp['reminders'].run()))
+    if METRICS_PORT:
+        background.append(asyncio.create_task(run_metrics_server(METRICS_HOST, METRICS_PORT)))
     
     # Регистрация всех обработчиков
     register_all_handlers(dp)
     
     # Запуск бота
-    await dp.start_polling(bot)
+    try:
+        if mode == 'webhook':
+            await run_webhook(
+                dp, bot,
+                host=WEBHOOK_HOST,
+                port=WEBHOOK_PORT,
+                path=WEBHOOK_PATH,
+                secret_token=WEBHOOK_SECRET,
+                base_url=WEBHOOK_BASE_URL,
+                max_concurrency=WEBHOOK_MAX_CONCURRENCY,
+                drain_timeout=WEBHOOK_DRAIN_TIMEOUT
+            )
+        else:
+            await dp.start_polling(bot)
+    finally:
+        # run_webhook уже дождался апдейтов в обработке, теперь можно закрывать хранилище и базу
+        for task in background:
+            task.cancel()
+        await storage.close()
+        await close_db()
 
 if __name__ == "__main__":
     asyncio.run(main()) 
\ No newline at end of file
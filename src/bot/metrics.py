@@ -0,0 +1,155 @@
+"""Метрики обработчиков и HTTP-эндпоинт в формате Prometheus
+
+MetricsMiddleware подключается inner-middleware, то есть срабатывает только
+для апдейтов, нашедших обработчик, и записывает задержку и ошибки в
+гистограмму по имени функции-обработчика. Функции базы данных
+измеряются декоратором database.metrics.timed.
+
+QueryAccountingMiddleware (outer-middleware апдейтов) считает SQL-запросы
+всего апдейта, включая загрузку пользователя в UserMiddleware, пишет итог
+в лог и в гистограммы по обработчику (имя обработчика записывает
+HandlerAccountMiddleware). При QUERY_DEBUG=1 предупреждает, если обработчик
+выполнил больше запросов, чем позволяет бюджет: флаг обработчика
+query_budget или QUERY_BUDGET. Учет запросов работает и при
+METRICS_ENABLED=0, тогда пропускаются только гистограммы.
+"""
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Optional
+from aiohttp import web
+from aiogram import BaseMiddleware, Dispatcher, types
+from aiogram.dispatcher.flags import get_flag
+from database.config import METRICS_ENABLED
+from database.metrics import metrics, Histogram, MetricsRegistry
+from database.query_stats import QueryStats, count_queries
+from .config import QUERY_BUDGET, QUERY_DEBUG
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+handler_latency = metrics.histogram('wordbot_handler', "Время выполнения обработчиков бота", 'handler')
+update_queries = metrics.histogram(
+    'wordbot_update', "SQL-запросов за апдейт", 'handler',
+    buckets=(1, 2, 3, 5, 8, 13, 21, 34, 55), unit='queries', errors=False
+)
+update_db_time = metrics.histogram(
+    'wordbot_update_db', "Время SQL-запросов за апдейт", 'handler', errors=False
+)
+
+@dataclass
+class UpdateAccount:
+    """Учет апдейта: обработчик и его бюджет заполняет HandlerAccountMiddleware"""
+    update_id: int
+    stats: QueryStats
+    handler: Optional[str] = None
+    budget: Optional[int] = None
+
+class MetricsMiddleware(BaseMiddleware):
+    """Задержка и ошибки каждого обработчика"""
+
+    def __init__(self):
+        # callback обработчика -> гистограмма, чтобы не искать ее по имени на каждом апдейте
+        self._histograms: Dict[Callable, Histogram] = {}
+
+    async def __call__(self, handler: Callable[[types.TelegramObject, Dict[str, Any]], Awaitable[Any]],
+                       event: types.TelegramObject, data: Dict[str, Any]) -> Any:
+        callback = data['handler'].callback
+        histogram = self._histograms.get(callback)
+        if histogram is None:
+            histogram = self._histograms[callback] = handler_latency.labels(callback.__name__)
+
+        start = time.perf_counter()
+        try:
+            result = await handler(event, data)
+        except Exception:
+            histogram.observe(time.perf_counter() - start, error=True)
+            raise
+        histogram.observe(time.perf_counter() - start)
+        return result
+
+class HandlerAccountMiddleware(BaseMiddleware):
+    """Имя обработчика и его бюджет запросов в учете апдейта"""
+
+    async def __call__(self, handler: Callable[[types.TelegramObject, Dict[str, Any]], Awaitable[Any]],
+                       event: types.TelegramObject, data: Dict[str, Any]) -> Any:
+        account = data.get('update_account')
+        if account is not None:
+            account.handler = data['handler'].callback.__name__
+            account.budget = get_flag(data, 'query_budget')
+        return await handler(event, data)
+
+class QueryAccountingMiddleware(BaseMiddleware):
+    """Подсчет SQL-запросов, строк и времени в БД за апдейт"""
+
+    def __init__(self, budget: int = QUERY_BUDGET, debug: bool = QUERY_DEBUG):
+        self.budget = budget
+        self.debug = debug
+
+    async def __call__(self, handler: Callable[[types.TelegramObject, Dict[str, Any]], Awaitable[Any]],
+                       event: types.Update, data: Dict[str, Any]) -> Any:
+        with count_queries(keep_statements=self.debug) as stats:
+            account = UpdateAccount(event.update_id, stats)
+            data['update_account'] = account
+            try:
+                return await handler(event, data)
+            finally:
+                self._report(account)
+
+    def _report(self, account: UpdateAccount):
+        stats = account.stats
+        if account.handler is None:
+            return
+        if METRICS_ENABLED:
+            update_queries.labels(account.handler).observe(stats.statements)
+            update_db_time.labels(account.handler).observe(stats.db_time)
+        logger.info(
+            "Апдейт id=%s (%s): SQL-запросов %d, строк изменено %d, в БД %.1f мс",
+            account.update_id, account.handler, stats.statements, stats.rows, stats.db_time * 1000
+        )
+        budget = self.budget if account.budget is None else account.budget
+        if self.debug and stats.statements > budget:
+            logger.warning(
+                "Обработчик %s выполнил %d SQL-запросов при бюджете %d:\n%s",
+                account.handler, stats.statements, budget, "\n".join(stats.statement_log)
+            )
+
+def register_metrics_middleware(dp: Dispatcher):
+    """Подключение учета запросов и измерения обработчиков сообщений и callback-запросов
+
+    Учет запросов (и бюджеты QUERY_DEBUG) не зависит от METRICS_ENABLED.
+    """
+    dp.update.outer_middleware(QueryAccountingMiddleware())
+    observers = (dp.message, dp.callback_query)
+    account = HandlerAccountMiddleware()
+    for observer in observers:
+        observer.middleware(account)
+    if not METRICS_ENABLED:
+        return
+    middleware = MetricsMiddleware()
+    for observer in observers:
+        observer.middleware(middleware)
+
+def create_metrics_app(registry: MetricsRegistry = metrics) -> web.Application:
+    """aiohttp-приложение с GET /metrics"""
+    async def handle_metrics(request: web.Request) -> web.Response:
+        return web.Response(body=registry.expose().encode('utf-8'),
+                            headers={'Content-Type': CONTENT_TYPE})
+
+    app = web.Application()
+    app.router.add_get('/metrics', handle_metrics)
+    return app
+
+async def run_metrics_server(host: str, port: int, registry: MetricsRegistry = metrics):
+    """Сервер метрик (до отмены задачи)"""
+    runner = web.AppRunner(create_metrics_app(registry))
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    logging.info("Метрики доступны на http://%s:%s/metrics", host, port)
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
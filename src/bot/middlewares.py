@@ -0,0 +1,40 @@
+from typing import Any, Awaitable, Callable, Dict
+from aiogram import BaseMiddleware, Dispatcher, types
+from aiogram.dispatcher.flags import get_flag
+from database.async_models import get_user
+
+NOT_REGISTERED_TEXT = "Сначала нужно выбрать уровень! Напиши /start"
+
+class UserMiddleware(BaseMiddleware):
+    """Загрузка пользователя один раз на апдейт (outer-middleware)
+
+    Профиль передается в обработчики параметром user (None - пользователь
+    еще не выбрал уровень). Профили кэшируются в get_user (UserCache).
+    """
+
+    async def __call__(self, handler: Callable[[types.TelegramObject, Dict[str, Any]], Awaitable[Any]],
+                       event: types.TelegramObject, data: Dict[str, Any]) -> Any:
+        from_user = data.get('event_from_user')
+        if 'user' not in data:
+            data['user'] = await get_user(from_user.id) if from_user else None
+        return await handler(event, data)
+
+class RegisteredUserMiddleware(BaseMiddleware):
+    """Отсечение незарегистрированных пользователей до вызова обработчика
+
+    Действует на обработчики с флагом user_required.
+    """
+
+    async def __call__(self, handler: Callable[[types.TelegramObject, Dict[str, Any]], Awaitable[Any]],
+                       event: types.TelegramObject, data: Dict[str, Any]) -> Any:
+        if data.get('user') is None and get_flag(data, 'user_required'):
+            # Message.answer отправит сообщение, CallbackQuery.answer - всплывающее уведомление
+            await event.answer(NOT_REGISTERED_TEXT)
+            return None
+        return await handler(event, data)
+
+def register_middlewares(dp: Dispatcher):
+    """Подключение middleware к сообщениям и callback-запросам"""
+    for observer in (dp.message, dp.callback_query):
+        observer.outer_middleware(UserMiddleware())
+        observer.middleware(RegisteredUserMiddleware())
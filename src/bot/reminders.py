@@ -0,0 +1,256 @@
+import asyncio
+import logging
+import time
+from datetime import date, datetime, time as day_time, timedelta
+from typing import Callable, Dict, List, Optional, Set
+from aiogram import Bot, Dispatcher, types, F
+from database.async_models import (
+    get_user, set_reminder_hour, get_due_words_count, get_next_due_date,
+    iter_reminder_schedule, due_date_listeners
+)
+from database.config import DEFAULT_REMINDER_HOUR
+from .timing_wheel import TimingWheel
+
+class TokenBucket:
+    """Ограничение частоты: в среднем не больше rate событий в секунду, подряд - не больше burst"""
+
+    def __init__(self, rate: float, burst: Optional[float] = None, clock: Callable[[], float] = time.monotonic):
+        self.rate = rate
+        self.capacity = burst or max(1.0, rate)
+        self._clock = clock
+        self._tokens = self.capacity
+        self._updated = clock()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        """Ожидание разрешения на одно событие"""
+        async with self._lock:
+            while True:
+                now = self._clock()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+class ReminderScheduler:
+    """Напоминания о словах к повторению на колесе таймеров
+
+    У каждого пользователя не больше одного таймера: ближайшая дата
+    повторения в его час напоминания. При запуске таймеры строятся одним
+    запросом по индексу (user_id, next_review_date), дальше обновляются
+    по событиям async_models (ответ на повторение, добавление слов).
+    Таймер только переносится на более раннее время; если к моменту
+    срабатывания повторять нечего, он переставляется на новую ближайшую дату.
+
+    Сработавшие за тик таймеры ставятся в очередь, которую разбирают
+    concurrency рабочих задач, а сообщения отправляются не чаще rate в
+    секунду (лимит Telegram - около 30). Тик не ждет отправки, поэтому слот
+    колеса с тысячами пользователей не задерживает следующие тики. Ошибка
+    базы у одного пользователя не останавливает остальных: его напоминание
+    повторяется через retry_delay.
+    """
+
+    def __init__(self, bot: Bot, clock: Callable[[], float] = time.time, tick: float = 60.0,
+                 wheel_size: int = 64, levels: int = 4, rate: float = 25.0, concurrency: int = 10,
+                 retry_delay: float = 300.0):
+        self.bot = bot
+        self.clock = clock
+        self.wheel = TimingWheel(tick, wheel_size, levels, start=clock())
+        self.limiter = TokenBucket(rate)
+        self.concurrency = concurrency
+        self.retry_delay = retry_delay
+        self._hours: Dict[int, Optional[int]] = {}
+        # Очередь создается в работающем event loop (Python 3.8 привязывает ее при создании)
+        self._queue: Optional[asyncio.Queue] = None
+        self._queued: Set[int] = set()
+        self._workers: List[asyncio.Task] = []
+        self.sent = 0
+        self.failed = 0
+
+    def fire_time(self, next_due: date, hour: int) -> float:
+        """Время напоминания: день повторения в час пользователя, но не в прошлом"""
+        now = datetime.fromtimestamp(self.clock())
+        when = datetime.combine(max(next_due, now.date()), day_time(hour))
+        if when <= now:
+            when += timedelta(days=1)
+        return when.timestamp()
+
+    def _schedule_earliest(self, user_id: int, next_due: date, hour: int):
+        when = self.fire_time(next_due, hour)
+        current = self.wheel.deadline(user_id)
+        if current is None or when < current:
+            self.wheel.schedule(user_id, when)
+
+    def on_due_date(self, user_id: int, next_due: date):
+        """Подписчик async_models: у карточки пользователя новая дата повторения"""
+        hour = self._hours.get(user_id, DEFAULT_REMINDER_HOUR)
+        if hour is not None:
+            self._schedule_earliest(user_id, next_due, hour)
+
+    async def rebuild(self) -> int:
+        """Построение таймеров всех пользователей по базе"""
+        count = 0
+        async for user_id, next_due, hour in iter_reminder_schedule():
+            # Час нужен и без карточек: первое добавление слов поставит таймер
+            self._hours[user_id] = hour
+            if next_due is not None:
+                self._schedule_earliest(user_id, next_due, hour)
+                count += 1
+        return count
+
+    async def set_hour(self, user_id: int, hour: Optional[int]):
+        """Изменение часа напоминания пользователя"""
+        await set_reminder_hour(user_id, hour)
+        self._hours[user_id] = hour
+        self.wheel.cancel(user_id)
+        if hour is not None:
+            next_due = await get_next_due_date(user_id)
+            if next_due:
+                self.wheel.schedule(user_id, self.fire_time(next_due, hour))
+
+    async def _remind(self, user_id: int):
+        user = await get_user(user_id)
+        hour = user.get('reminder_hour') if user else None
+        self._hours[user_id] = hour
+        if hour is None:
+            return
+
+        due = await get_due_words_count(user_id)
+        if due:
+            await self.limiter.acquire()
+            try:
+                await self.bot.send_message(
+                    user_id,
+                    f"🔔 Пора повторить слова! Сегодня к повторению: {due}\n\n"
+                    "Напиши /review_test, чтобы начать"
+                )
+                self.sent += 1
+            except Exception:
+                logging.exception("Не удалось отправить напоминание пользователю %s", user_id)
+            # Следующее напоминание - завтра, если слова так и не будут повторены
+            self.wheel.schedule(user_id, self.fire_time(self._today(), hour))
+        else:
+            next_due = await get_next_due_date(user_id)
+            if next_due:
+                self.wheel.schedule(user_id, self.fire_time(next_due, hour))
+
+    def _today(self) -> date:
+        return datetime.fromtimestamp(self.clock()).date()
+
+    async def _remind_safe(self, user_id: int):
+        try:
+            await self._remind(user_id)
+        except Exception:
+            self.failed += 1
+            logging.exception("Не удалось обработать напоминание пользователя %s, повтор через %.0f с",
+                              user_id, self.retry_delay)
+            self.wheel.schedule(user_id, self.clock() + self.retry_delay)
+
+    async def _worker(self):
+        while True:
+            user_id = await self._queue.get()
+            self._queued.discard(user_id)
+            try:
+                await self._remind_safe(user_id)
+            finally:
+                self._queue.task_done()
+
+    def _start_workers(self):
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+        if not self._workers:
+            self._workers = [asyncio.create_task(self._worker()) for _ in range(self.concurrency)]
+
+    async def stop(self):
+        """Остановка рабочих задач (напоминания из очереди не отправляются)"""
+        workers, self._workers = self._workers, []
+        for worker in workers:
+            worker.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+
+    def backlog(self) -> int:
+        """Пользователи в очереди на отправку напоминания"""
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def tick(self) -> int:
+        """Постановка сработавших таймеров в очередь; возвращает их количество"""
+        expired = self.wheel.advance(self.clock())
+        if expired:
+            self._start_workers()
+            for user_id in expired:
+                if user_id not in self._queued:
+                    self._queued.add(user_id)
+                    self._queue.put_nowait(user_id)
+        return len(expired)
+
+    async def join(self):
+        """Ожидание обработки всех напоминаний из очереди"""
+        if self._queue is not None:
+            await self._queue.join()
+
+    def until_next_tick(self) -> float:
+        """Секунды до начала следующего тика колеса (тики кратны tick)"""
+        return self.wheel.tick - self.clock() % self.wheel.tick
+
+    def subscribe(self):
+        if self.on_due_date not in due_date_listeners:
+            due_date_listeners.append(self.on_due_date)
+
+    def unsubscribe(self):
+        if self.on_due_date in due_date_listeners:
+            due_date_listeners.remove(self.on_due_date)
+
+    async def run(self):
+        """Фоновая задача: построение таймеров и обработка тиков"""
+        self.subscribe()
+        try:
+            users = await self.rebuild()
+            logging.info("Напоминания: %s пользователей в расписании", users)
+            self._start_workers()
+            while True:
+                await self.tick()
+                # Спим до границы тика, а не tick секунд после обработки, чтобы не накапливать сдвиг
+                await asyncio.sleep(self.until_next_tick())
+        finally:
+            self.unsubscribe()
+            await self.stop()
+
+async def cmd_remind(message: types.Message, user: Dict, reminders: Optional[ReminderScheduler] = None):
+    """Обработчик команды /remind - настройка напоминаний о повторении"""
+    user_id = message.from_user.id
+    args = message.text.split()[1:]
+    if not args:
+        if user['reminder_hour'] is None:
+            status = "выключены"
+        else:
+            status = f"включены, в {user['reminder_hour']}:00"
+        await message.answer(
+            f"🔔 Напоминания о повторении {status}\n\n"
+            "• /remind 20 - напоминать в 20:00\n"
+            "• /remind off - выключить напоминания"
+        )
+        return
+
+    if args[0].lower() == 'off':
+        hour = None
+    elif args[0].isdigit() and 0 <= int(args[0]) <= 23:
+        hour = int(args[0])
+    else:
+        await message.answer("Укажи час от 0 до 23 или off, например: /remind 20")
+        return
+
+    if reminders is not None:
+        await reminders.set_hour(user_id, hour)
+    else:
+        await set_reminder_hour(user_id, hour)
+
+    if hour is None:
+        await message.answer("🔕 Напоминания выключены")
+    else:
+        await message.answer(f"🔔 Буду напоминать о повторении в {hour}:00")
+
+def register_reminder_handlers(dp: Dispatcher):
+    """Регистрация обработчиков команды remind"""
+    dp.message.register(cmd_remind, F.text.startswith("/remind"), flags={"user_required": True})
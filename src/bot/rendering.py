@@ -0,0 +1,78 @@
+"""Отрисовка карточек слов для сообщений бота
+
+Фрагмент карточки (слово, транскрипция, перевод, пример) не зависит от
+пользователя, поэтому он строится один раз на слово и шаблон и берется из
+кэша. Экранирование делается одним проходом str.translate вместо цепочки
+.replace. Кэш сбрасывается, когда меняется версия каталога слов.
+"""
+from typing import Dict, Tuple
+from database.catalog import word_catalog
+
+# Символы, которые экранируются в тексте карточек
+ESCAPE_TABLE = str.maketrans({'_': '\\_', '*': '\\*', '`': '\\`'})
+
+FIELDS = ('word', 'transcription', 'translation', 'example')
+
+# Шаблоны фрагментов: (текст, экранировать ли поля)
+TEMPLATES: Dict[str, Tuple[str, bool]] = {
+    'words_item': ("**{word}** [{transcription}]\n   Перевод: {translation}\n   Пример: {example}\n\n", False),
+    'review_item': ("{word} [{transcription}]\n   Перевод: {translation}\n   Пример: {example}\n", True),
+    'question': ("Слово: {word} [{transcription}]\nПример: {example}\n\nКак переводится это слово?", True),
+    'answer': ("Слово: {word} [{transcription}]\nПеревод: {translation}\nПример: {example}", True),
+}
+
+def escape(text: str) -> str:
+    """Экранирование специальных символов"""
+    return text.translate(ESCAPE_TABLE)
+
+class CardRenderer:
+    """Кэш экранированных полей и готовых фрагментов карточек по ID слова"""
+
+    def __init__(self, catalog=word_catalog, maxsize: int = 50000):
+        self.catalog = catalog
+        self.maxsize = maxsize
+        self._fields: Dict[int, Dict[str, str]] = {}
+        self._fragments: Dict[Tuple[str, int], str] = {}
+        self._version = catalog.version
+        self.hits = 0
+        self.misses = 0
+
+    def _check_version(self):
+        if self.catalog.version != self._version:
+            self.clear()
+            self._version = self.catalog.version
+
+    def clear(self):
+        self._fields.clear()
+        self._fragments.clear()
+
+    def fields(self, word: Dict) -> Dict[str, str]:
+        """Экранированные поля слова"""
+        self._check_version()
+        fields = self._fields.get(word['word_id'])
+        if fields is None:
+            if len(self._fields) >= self.maxsize:
+                self._fields.clear()
+            fields = {name: escape(word[name]) for name in FIELDS}
+            self._fields[word['word_id']] = fields
+        return fields
+
+    def render(self, template: str, word: Dict) -> str:
+        """Фрагмент карточки слова по шаблону"""
+        self._check_version()
+        key = (template, word['word_id'])
+        fragment = self._fragments.get(key)
+        if fragment is not None:
+            self.hits += 1
+            return fragment
+
+        self.misses += 1
+        text, escaped = TEMPLATES[template]
+        fragment = text.format(**(self.fields(word) if escaped else {name: word[name] for name in FIELDS}))
+        if len(self._fragments) >= self.maxsize:
+            self._fragments.clear()
+        self._fragments[key] = fragment
+        return fragment
+
+# Общий экземпляр для обработчиков
+card_renderer = CardRenderer()
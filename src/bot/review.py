@@ -1,21 +1,20 @@
+import random
+from typing import Dict
 from aiogram import Dispatcher, types, F
-from database.models import get_user, get_words_for_review, update_spaced_repetition, get_spaced_repetition_stats
+from database.async_models import (
+    get_words_for_review, update_spaced_repetition, get_spaced_repetition_stats,
+    get_word_by_id
+)
+from database.scheduling import scheduler
+from .distractors import distractor_pool
+from .rendering import card_renderer
 
 async def cmd_review(message: types.Message):
     """Обработчик команды /review - интервальное повторение"""
     user_id = message.from_user.id
     
-    # Получаем информацию о пользователе
-    user = get_user(user_id)
-    
-    if not user:
-        await message.answer(
-            "Сначала нужно выбрать уровень! Напиши /start"
-        )
-        return
-    
     # Получаем слова для повторения
-    review_words = get_words_for_review(user_id, 5)
+    review_words = await get_words_for_review(user_id, 5)
     
     if not review_words:
         await message.answer(
@@ -28,50 +27,38 @@ async def cmd_review(message: types.Message):
         return
     
     # Получаем статистику
-    stats = get_spaced_repetition_stats(user_id)
+    stats = await get_spaced_repetition_stats(user_id)
     
     # Формируем сообщение (без Markdown для избежания ошибок парсинга)
-    review_text = "🔄 Интервальное повторение\n\n"
-    review_text += "📊 Статистика:\n"
-    review_text += f"• Всего слов в системе: {stats['total_words']}\n"
-    review_text += f"• Слов для повторения сегодня: {stats['due_today']}\n"
-    review_text += f"• Всего повторений: {stats['total_reviews']}\n\n"
-    
-    review_text += f"📝 Слова для повторения ({len(review_words)}):\n\n"
+    parts = [
+        "🔄 Интервальное повторение\n\n",
+        "📊 Статистика:\n",
+        f"• Всего слов в системе: {stats['total_words']}\n",
+        f"• Слов для повторения сегодня: {stats['due_today']}\n",
+        f"• Всего повторений: {stats['total_reviews']}\n\n",
+        f"📝 Слова для повторения ({len(review_words)}):\n\n",
+    ]
     
     for i, word_data in enumerate(review_words, 1):
-        # Экранируем специальные символы для безопасности
-        word = word_data['word'].replace('_', '\\_').replace('*', '\\*').replace('`', '\\`')
-        transcription = word_data['transcription'].replace('_', '\\_').replace('*', '\\*').replace('`', '\\`')
-        translation = word_data['translation'].replace('_', '\\_').replace('*', '\\*').replace('`', '\\`')
-        example = word_data['example'].replace('_', '\\_').replace('*', '\\*').replace('`', '\\`')
-        
-        review_text += (
-            f"{i}. {word} [{transcription}]\n"
-            f"   Перевод: {translation}\n"
-            f"   Пример: {example}\n"
-            f"   Интервал: {word_data['interval_days']} дн.\n\n"
+        # Общая часть карточки берется из кэша, интервалы - свои у каждого пользователя
+        parts.append(f"{i}. ")
+        parts.append(card_renderer.render('review_item', word_data))
+        parts.append(
+            f"   Интервал: {word_data['interval_days']} дн. "
+            f"(после верного ответа: {scheduler.predict_interval(word_data, True)} дн.)\n\n"
         )
     
-    review_text += "💡 Используй /review_test для тестирования этих слов!"
+    parts.append("💡 Используй /review_test для тестирования этих слов!")
+    review_text = "".join(parts)
     
     await message.answer(review_text)
 
-async def cmd_review_test(message: types.Message):
+async def cmd_review_test(message: types.Message, user: Dict):
     """Обработчик команды /review_test - тест интервального повторения"""
     user_id = message.from_user.id
     
-    # Получаем информацию о пользователе
-    user = get_user(user_id)
-    
-    if not user:
-        await message.answer(
-            "Сначала нужно выбрать уровень! Напиши /start"
-        )
-        return
-    
     # Получаем слова для повторения
-    review_words = get_words_for_review(user_id, 10)
+    review_words = await get_words_for_review(user_id, 10)
     
     if not review_words:
         await message.answer(
@@ -88,102 +75,79 @@ async def cmd_review_test(message: types.Message):
     # Создаем варианты ответов
     correct_answer = test_word['translation']
     
-    # Получаем другие переводы для создания неправильных вариантов
-    from database.models import get_words_by_level
-    other_words = get_words_by_level(user['level'], 20)
-    wrong_answers = [word['translation'] for word in other_words 
-                    if word['translation'] != correct_answer]
+    # Выбираем 3 случайных неправильных ответа из пула переводов уровня
+    wrong_answers = distractor_pool.sample(user['level'], correct_answer, 3)
     
-    # Выбираем 3 случайных неправильных ответа
-    import random
-    wrong_answers = random.sample(wrong_answers, min(3, len(wrong_answers)))
-    
-    all_answers = [correct_answer] + wrong_answers
+    all_answers = [test_word] + wrong_answers
     random.shuffle(all_answers)
     
     # Создаем клавиатуру с вариантами ответов
+    # В callback_data: ID карточки, ID слова и ID выбранного варианта
     keyboard = types.InlineKeyboardMarkup(inline_keyboard=[
-        [types.InlineKeyboardButton(text=f"{chr(65+i)}) {answer}", callback_data=f"review_{test_word['id']}_{test_word['word']}_{answer}")]
+        [types.InlineKeyboardButton(
+            text=f"{chr(65+i)}) {answer['translation']}",
+            callback_data=f"review_{test_word['id']}_{test_word['word_id']}_{answer['word_id']}"
+        )]
         for i, answer in enumerate(all_answers)
     ])
     
-    # Экранируем специальные символы
-    word = test_word['word'].replace('_', '\\_').replace('*', '\\*').replace('`', '\\`')
-    transcription = test_word['transcription'].replace('_', '\\_').replace('*', '\\*').replace('`', '\\`')
-    example = test_word['example'].replace('_', '\\_').replace('*', '\\*').replace('`', '\\`')
-    
-    test_text = (
-        f"🔄 Повторение: {word}\n\n"
-        f"Слово: {word} [{transcription}]\n"
-        f"Пример: {example}\n\n"
-        f"Как переводится это слово?"
-    )
+    # Текст карточки берем из кэша (поля уже экранированы)
+    test_text = "".join((
+        "🔄 Повторение: ", card_renderer.fields(test_word)['word'], "\n\n",
+        card_renderer.render('question', test_word)
+    ))
     
     await message.answer(test_text, reply_markup=keyboard)
 
 async def process_review_answer(callback: types.CallbackQuery):
     """Обработка ответа на тест повторения"""
-    data = callback.data.split('_')
-    review_id = int(data[1])
-    word = data[2]
-    selected_answer = data[3]
-    
-    # Получаем правильный ответ из базы данных
-    from database.models import get_words_for_review
-    review_words = get_words_for_review(callback.from_user.id, 10)
-    correct_word = None
-    
-    for w in review_words:
-        if w['id'] == review_id and w['word'] == word:
-            correct_word = w
-            break
-    
-    if not correct_word:
+    try:
+        _, review_id, word_id, answer_id = callback.data.split('_')
+        review_id, word_id, answer_id = int(review_id), int(word_id), int(answer_id)
+    except ValueError:
+        await callback.answer("Этот тест устарел, пройди /review_test заново")
+        return
+    
+    # Слово и выбранный вариант берем из каталога по ID
+    correct_word = await get_word_by_id(word_id)
+    selected_word = await get_word_by_id(answer_id)
+    
+    if not correct_word or not selected_word:
         await callback.answer("Ошибка: слово не найдено")
         return
     
     correct_answer = correct_word['translation']
-    is_correct = selected_answer == correct_answer
+    is_correct = selected_word['translation'] == correct_answer
     
-    # Обновляем интервальное повторение
-    from database.models import update_spaced_repetition
-    update_spaced_repetition(review_id, is_correct)
+    # Обновляем карточку по первичному ключу: она должна принадлежать пользователю
+    # и быть карточкой того слова, по которому проверен ответ (callback_data
+    # присылает клиент, word_id в ней можно подменить)
+    card = await update_spaced_repetition(
+        review_id, is_correct, user_id=callback.from_user.id, word_id=word_id
+    )
     
-    # Экранируем специальные символы
-    word = correct_word['word'].replace('_', '\\_').replace('*', '\\*').replace('`', '\\`')
-    transcription = correct_word['transcription'].replace('_', '\\_').replace('*', '\\*').replace('`', '\\`')
-    translation = correct_answer.replace('_', '\\_').replace('*', '\\*').replace('`', '\\`')
-    example = correct_word['example'].replace('_', '\\_').replace('*', '\\*').replace('`', '\\`')
+    if not card:
+        await callback.answer("Этот тест устарел, пройди /review_test заново")
+        return
     
     # Формируем ответ
     if is_correct:
-        result_text = "✅ Верно! Отличная работа!"
+        verdict = "✅ Верно! Отличная работа!"
     else:
-        result_text = f"❌ Неправильно! Правильный ответ: {translation}"
-    
-    result_text += f"\n\nСлово: {word} [{transcription}]\n"
-    result_text += f"Перевод: {translation}\n"
-    result_text += f"Пример: {example}\n\n"
+        verdict = "❌ Неправильно! Правильный ответ: " + card_renderer.fields(correct_word)['translation']
     
-    # Добавляем информацию о следующем повторении
-    if is_correct:
-        if correct_word['consecutive_correct'] == 0:
-            next_interval = 1
-        elif correct_word['consecutive_correct'] == 1:
-            next_interval = 3
-        elif correct_word['consecutive_correct'] == 2:
-            next_interval = 7
-        else:
-            next_interval = 7 + (correct_word['consecutive_correct'] - 1) * 7
-        
-        result_text += f"🔄 Следующее повторение через {next_interval} дней"
+    # Добавляем информацию о следующем повторении (интервал рассчитан планировщиком)
+    if card['interval_days'] == 1:
+        next_review = "🔄 Следующее повторение завтра"
     else:
-        result_text += f"🔄 Следующее повторение завтра"
+        next_review = f"🔄 Следующее повторение через {card['interval_days']} дней"
+    
+    result_text = "".join((verdict, "\n\n", card_renderer.render('answer', correct_word), "\n\n", next_review))
     
     await callback.message.edit_text(result_text)
 
 def register_review_handlers(dp: Dispatcher):
     """Регистрация обработчиков команды review"""
-    dp.message.register(cmd_review, F.text == "/review")
-    dp.message.register(cmd_review_test, F.text == "/review_test")
-    dp.callback_query.register(process_review_answer, F.data.startswith("review_")) 
\ No newline at end of file
+    dp.message.register(cmd_review, F.text == "/review", flags={"user_required": True})
+    dp.message.register(cmd_review_test, F.text == "/review_test", flags={"user_required": True})
+    dp.callback_query.register(process_review_answer, F.data.startswith("review_"), flags={"user_required": True}) 
\ No newline at end of file
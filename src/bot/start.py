@@ -1,18 +1,15 @@
+from typing import Dict, Optional
 from aiogram import Dispatcher, types, F
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
-from database.models import add_user, get_user
+from database.async_models import add_user
 
 class UserLevel(StatesGroup):
     waiting_for_level = State()
 
-async def cmd_start(message: types.Message, state: FSMContext):
+async def cmd_start(message: types.Message, state: FSMContext, user: Optional[Dict] = None):
     """Обработчик команды /start"""
-    user_id = message.from_user.id
-    
-    # Проверяем, существует ли пользователь
-    user = get_user(user_id)
-    
+    # Пользователь загружается в UserMiddleware (None - еще не зарегистрирован)
     if user:
         # Пользователь уже существует
         await message.answer(
@@ -50,7 +47,7 @@ async def process_level_selection(callback: types.CallbackQuery, state: FSMConte
     user_id = callback.from_user.id
     
     # Сохраняем пользователя в базе данных
-    add_user(user_id, level)
+    await add_user(user_id, level)
     
     await state.clear()
     
@@ -1,26 +1,19 @@
+from typing import Dict
 from aiogram import Dispatcher, types, F
-from database.models import get_user, get_spaced_repetition_stats, get_due_words_count
+from database.async_models import (
+    get_spaced_repetition_stats, get_learned_words_count, get_recent_learned_words
+)
 
-async def cmd_stats(message: types.Message):
+async def cmd_stats(message: types.Message, user: Dict):
     """Обработчик команды /stats"""
     user_id = message.from_user.id
     
-    # Получаем информацию о пользователе
-    user = get_user(user_id)
-    
-    if not user:
-        await message.answer(
-            "Сначала нужно выбрать уровень! Напиши /start"
-        )
-        return
-    
     # Получаем статистику
-    words_learned = user['words_learned']
     test_results = user['test_results']
-    spaced_stats = get_spaced_repetition_stats(user_id)
-    due_words = get_due_words_count(user_id)
+    spaced_stats = await get_spaced_repetition_stats(user_id)
+    due_words = spaced_stats['due_today']
     
-    total_words = len(words_learned)
+    total_words = await get_learned_words_count(user_id)
     correct_answers = test_results['correct']
     incorrect_answers = test_results['incorrect']
     total_tests = correct_answers + incorrect_answers
@@ -53,7 +46,7 @@ async def cmd_stats(message: types.Message):
     if total_words > 0:
         stats_text += "📝 Последние выученные слова:\n"
         # Показываем последние 5 слов
-        recent_words = words_learned[-5:] if len(words_learned) > 5 else words_learned
+        recent_words = await get_recent_learned_words(user_id, 5)
         for word in recent_words:
             stats_text += f"• {word}\n"
     
@@ -66,4 +59,4 @@ async def cmd_stats(message: types.Message):
 
 def register_stats_handlers(dp: Dispatcher):
     """Регистрация обработчиков команды stats"""
-    dp.message.register(cmd_stats, F.text == "/stats") 
\ No newline at end of file
+    dp.message.register(cmd_stats, F.text == "/stats", flags={"user_required": True}) 
\ No newline at end of file
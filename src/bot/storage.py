@@ -0,0 +1,208 @@
+"""Хранилище FSM aiogram в SQLite
+
+Состояния и данные FSM хранятся в таблице fsm_storage той же базы, поэтому
+незавершенные сценарии (например, выбор уровня в /start) переживают
+перезапуск и деплой.
+
+Чтения обслуживаются из ограниченного LRU-кэша в памяти; в базу идет
+только первый запрос по ключу. Запись сразу попадает в кэш, а в базу -
+в зависимости от режима.
+
+По умолчанию (flush_interval=0) кэш сквозной (write-through): set_state и
+set_data возвращаются только после коммита, поэтому после ответа бота
+состояние уже на диске. Пишущие одновременно апдейты объединяются в одну
+транзакцию: пока идет коммит, изменения копятся и следующий коммит
+записывает их все.
+
+При flush_interval > 0 запись отложенная (write-behind): изменения пишутся
+пачкой, когда накопилось max_batch ключей или прошло flush_interval секунд.
+Это меньше транзакций, но при падении процесса теряются состояния,
+измененные за последние flush_interval секунд (при штатной остановке
+close() записывает все накопленное).
+
+Не записанные ключи из кэша не вытесняются, но их не больше maxsize: если
+запись в базу не проходит, новое изменение сначала ждет записи
+накопленных и при ошибке базы отклоняется.
+"""
+import asyncio
+import json
+import logging
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, Mapping, Optional, Set, Tuple
+from aiogram.exceptions import DataNotDictLikeError
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, StateType, StorageKey
+from sqlalchemy import select, delete
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from database.models import FSMRecord
+
+class _Record:
+    __slots__ = ('state', 'data')
+
+    def __init__(self, state: Optional[str] = None, data: Optional[Dict[str, Any]] = None):
+        self.state = state
+        self.data = data or {}
+
+class SQLiteStorage(BaseStorage):
+    """Хранилище FSM с кэшем в памяти и пакетной записью в SQLite"""
+
+    def __init__(self, session_factory, maxsize: int = 10000, flush_interval: float = 0.0,
+                 max_batch: int = 200):
+        self._session_factory = session_factory
+        self.maxsize = maxsize
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self._cache: 'OrderedDict[str, _Record]' = OrderedDict()
+        self._dirty: Set[str] = set()
+        self._wakeup = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._closed = False
+        self.hits = 0
+        self.misses = 0
+        self.flushes = 0
+
+    @staticmethod
+    def _key(key: StorageKey) -> str:
+        return ':'.join(
+            '' if part is None else str(part)
+            for part in (key.bot_id, key.chat_id, key.user_id, key.thread_id,
+                         key.business_connection_id, key.destiny)
+        )
+
+    def _evict(self, limit: Optional[int] = None):
+        """Вытеснение самых давно использованных записанных ключей сверх limit (по умолчанию maxsize)"""
+        limit = self.maxsize if limit is None else limit
+        # Не записанный ключ переносится в конец; когда все они просмотрены, вытеснять больше нечего
+        skips = len(self._dirty)
+        while len(self._cache) > limit:
+            cache_key, record = self._cache.popitem(last=False)
+            if cache_key in self._dirty:
+                self._cache[cache_key] = record
+                if not skips:
+                    break
+                skips -= 1
+
+    async def _record(self, key: StorageKey) -> Tuple[str, _Record]:
+        cache_key = self._key(key)
+        record = self._cache.get(cache_key)
+        if record is not None:
+            self._cache.move_to_end(cache_key)
+            self.hits += 1
+            return cache_key, record
+
+        self.misses += 1
+        async with self._session_factory() as session:
+            row = (await session.execute(
+                select(FSMRecord.state, FSMRecord.data).where(FSMRecord.key == cache_key)
+            )).first()
+
+        # Пока шел запрос, ключ мог появиться в кэше - он актуальнее базы
+        record = self._cache.get(cache_key)
+        if record is None:
+            record = _Record(row.state, json.loads(row.data) if row.data else {}) if row else _Record()
+            # Место освобождаем до вставки, чтобы новый ключ не вытеснился сразу
+            self._evict(self.maxsize - 1)
+            self._cache[cache_key] = record
+        return cache_key, record
+
+    async def _reserve(self, cache_key: str):
+        """Ограничение числа не записанных ключей: новый ключ ждет записи накопленных"""
+        if cache_key not in self._dirty and len(self._dirty) >= self.maxsize:
+            await self.flush()
+
+    async def _changed(self, cache_key: str):
+        self._dirty.add(cache_key)
+        if self.flush_interval <= 0:
+            await self.flush()
+        elif len(self._dirty) >= self.max_batch:
+            self._wakeup.set()
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        cache_key, record = await self._record(key)
+        await self._reserve(cache_key)
+        record.state = state.state if isinstance(state, State) else state
+        await self._changed(cache_key)
+
+    async def get_state(self, key: StorageKey) -> Optional[str]:
+        _, record = await self._record(key)
+        return record.state
+
+    async def set_data(self, key: StorageKey, data: Mapping[str, Any]) -> None:
+        if not isinstance(data, dict):
+            raise DataNotDictLikeError(f"Data must be a dict or dict-like object, got {type(data).__name__}")
+        cache_key, record = await self._record(key)
+        await self._reserve(cache_key)
+        record.data = data.copy()
+        await self._changed(cache_key)
+
+    async def get_data(self, key: StorageKey) -> Dict[str, Any]:
+        _, record = await self._record(key)
+        return record.data.copy()
+
+    async def flush(self) -> int:
+        """Запись измененных ключей одной транзакцией"""
+        async with self._flush_lock:
+            if not self._dirty:
+                return 0
+            keys, self._dirty = self._dirty, set()
+
+            upserts, deletes = [], []
+            now = datetime.now()
+            for cache_key in keys:
+                record = self._cache[cache_key]
+                if record.state is None and not record.data:
+                    deletes.append(cache_key)
+                else:
+                    upserts.append({
+                        'key': cache_key,
+                        'state': record.state,
+                        'data': json.dumps(record.data, ensure_ascii=False),
+                        'updated_at': now
+                    })
+
+            try:
+                async with self._session_factory() as session:
+                    # Пачками, чтобы не упереться в лимит параметров SQLite
+                    for start in range(0, len(upserts), 500):
+                        statement = sqlite_insert(FSMRecord).values(upserts[start:start + 500])
+                        await session.execute(statement.on_conflict_do_update(
+                            index_elements=['key'],
+                            set_={
+                                'state': statement.excluded.state,
+                                'data': statement.excluded.data,
+                                'updated_at': statement.excluded.updated_at
+                            }
+                        ))
+                    if deletes:
+                        await session.execute(delete(FSMRecord).where(FSMRecord.key.in_(deletes)))
+                    await session.commit()
+            except Exception:
+                # Не записанные ключи остаются измененными до следующей попытки
+                self._dirty |= keys
+                raise
+
+            self.flushes += 1
+            self._evict()
+            return len(keys)
+
+    async def run(self):
+        """Фоновая запись по таймеру или по заполнению пачки"""
+        if self.flush_interval <= 0:
+            return
+        while not self._closed:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception:
+                logging.exception("Не удалось записать состояния FSM, повтор через %.1f с", self.flush_interval)
+
+    async def close(self) -> None:
+        """Остановка с записью всех изменений"""
+        self._closed = True
+        self._wakeup.set()
+        await self.flush()
@@ -1,22 +1,14 @@
 import random
+from typing import Dict
 from aiogram import Dispatcher, types, F
-from database.models import get_user, get_words_by_level, update_test_results
+from database.async_models import get_words_by_level, get_word_by_id, update_test_results
+from .distractors import distractor_pool
+from .rendering import card_renderer
 
-async def cmd_test(message: types.Message):
+async def cmd_test(message: types.Message, user: Dict):
     """Обработчик команды /test"""
-    user_id = message.from_user.id
-    
-    # Получаем информацию о пользователе
-    user = get_user(user_id)
-    
-    if not user:
-        await message.answer(
-            "Сначала нужно выбрать уровень! Напиши /start"
-        )
-        return
-    
     # Получаем слова для тестирования
-    words = get_words_by_level(user['level'], 20)
+    words = await get_words_by_level(user['level'], 20)
     
     if not words:
         await message.answer(
@@ -30,83 +22,65 @@ async def cmd_test(message: types.Message):
     # Создаем варианты ответов
     correct_answer = test_word['translation']
     
-    # Получаем другие переводы для создания неправильных вариантов
-    wrong_answers = [word['translation'] for word in words 
-                    if word['translation'] != correct_answer]
+    # Выбираем 3 случайных неправильных ответа из пула переводов уровня
+    wrong_answers = distractor_pool.sample(user['level'], correct_answer, 3)
     
-    # Выбираем 3 случайных неправильных ответа
-    wrong_answers = random.sample(wrong_answers, min(3, len(wrong_answers)))
-    
-    all_answers = [correct_answer] + wrong_answers
+    all_answers = [test_word] + wrong_answers
     random.shuffle(all_answers)
     
     # Создаем клавиатуру с вариантами ответов
+    # В callback_data передаем ID слова и ID выбранного варианта, а не сами строки:
+    # так ответ находится по ключу, а слова с пробелами и "_" не ломают разбор
     keyboard = types.InlineKeyboardMarkup(inline_keyboard=[
-        [types.InlineKeyboardButton(text=f"{chr(65+i)}) {answer}", callback_data=f"test_{test_word['word']}_{answer}")]
+        [types.InlineKeyboardButton(
+            text=f"{chr(65+i)}) {answer['translation']}",
+            callback_data=f"test_{test_word['word_id']}_{answer['word_id']}"
+        )]
         for i, answer in enumerate(all_answers)
     ])
     
-    # Экранируем специальные символы
-    word = test_word['word'].replace('_', '\\_').replace('*', '\\*').replace('`', '\\`')
-    transcription = test_word['transcription'].replace('_', '\\_').replace('*', '\\*').replace('`', '\\`')
-    example = test_word['example'].replace('_', '\\_').replace('*', '\\*').replace('`', '\\`')
-    
-    test_text = (
-        f"🧪 Тест: {word}\n\n"
-        f"Слово: {word} [{transcription}]\n"
-        f"Пример: {example}\n\n"
-        f"Как переводится это слово?"
-    )
+    # Текст карточки берем из кэша (поля уже экранированы)
+    test_text = "".join((
+        "🧪 Тест: ", card_renderer.fields(test_word)['word'], "\n\n",
+        card_renderer.render('question', test_word)
+    ))
     
     await message.answer(test_text, reply_markup=keyboard)
 
 async def process_test_answer(callback: types.CallbackQuery):
     """Обработка ответа на тест"""
-    data = callback.data.split('_')
-    word = data[1]
-    selected_answer = data[2]
-    
-    # Получаем правильный ответ из базы данных
-    from database.models import get_words_by_level
-    user = get_user(callback.from_user.id)
-    words = get_words_by_level(user['level'], 100)  # Получаем больше слов для поиска
+    try:
+        _, word_id, answer_id = callback.data.split('_')
+        word_id, answer_id = int(word_id), int(answer_id)
+    except ValueError:
+        await callback.answer("Этот тест устарел, пройди /test заново")
+        return
     
-    # Находим слово, которое тестировалось
-    test_word = None
-    for w in words:
-        if w['word'] == word:
-            test_word = w
-            break
+    # Находим тестируемое слово и выбранный вариант по ID
+    test_word = await get_word_by_id(word_id)
+    selected_word = await get_word_by_id(answer_id)
     
-    if not test_word:
+    if not test_word or not selected_word:
         await callback.answer("Ошибка: слово не найдено")
         return
     
     correct_answer = test_word['translation']
-    is_correct = selected_answer == correct_answer
+    is_correct = selected_word['translation'] == correct_answer
     
     # Обновляем результаты тестов
-    update_test_results(callback.from_user.id, is_correct)
-    
-    # Экранируем специальные символы
-    word = test_word['word'].replace('_', '\\_').replace('*', '\\*').replace('`', '\\`')
-    transcription = test_word['transcription'].replace('_', '\\_').replace('*', '\\*').replace('`', '\\`')
-    translation = correct_answer.replace('_', '\\_').replace('*', '\\*').replace('`', '\\`')
-    example = test_word['example'].replace('_', '\\_').replace('*', '\\*').replace('`', '\\`')
+    await update_test_results(callback.from_user.id, is_correct)
     
     # Формируем ответ
     if is_correct:
-        result_text = "✅ Верно! Отличная работа!"
+        verdict = "✅ Верно! Отличная работа!"
     else:
-        result_text = f"❌ Неправильно! Правильный ответ: {translation}"
+        verdict = "❌ Неправильно! Правильный ответ: " + card_renderer.fields(test_word)['translation']
     
-    result_text += f"\n\nСлово: {word} [{transcription}]\n"
-    result_text += f"Перевод: {translation}\n"
-    result_text += f"Пример: {example}"
+    result_text = "".join((verdict, "\n\n", card_renderer.render('answer', test_word)))
     
     await callback.message.edit_text(result_text)
 
 def register_test_handlers(dp: Dispatcher):
     """Регистрация обработчиков команды test"""
-    dp.message.register(cmd_test, F.text == "/test")
-    dp.callback_query.register(process_test_answer, F.data.startswith("test_")) 
\ No newline at end of file
+    dp.message.register(cmd_test, F.text == "/test", flags={"user_required": True})
+    dp.callback_query.register(process_test_answer, F.data.startswith("test_"), flags={"user_required": True}) 
\ No newline at end of file
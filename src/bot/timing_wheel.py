@@ -0,0 +1,108 @@
+"""Иерархическое колесо таймеров
+
+Время делится на тики длиной tick секунд. Уровень 0 хранит таймеры,
+которые сработают в ближайшие wheel_size тиков, уровень 1 - в ближайшие
+wheel_size**2 тиков (с точностью до wheel_size тиков) и т.д. Когда
+текущий тик доходит до начала ячейки старшего уровня, ее таймеры
+переносятся на младшие уровни. Добавление и отмена таймера - O(1), один
+тик - O(1) плюс сработавшие таймеры; каждый таймер переносится не больше
+levels - 1 раз, сколько бы таймеров ни ждало своей очереди.
+"""
+from typing import Dict, Hashable, List, Optional, Set, Tuple
+
+class TimingWheel:
+    """Таймеры по ключу: у каждого ключа не больше одного срока"""
+
+    def __init__(self, tick: float = 60.0, wheel_size: int = 64, levels: int = 4, start: float = 0.0):
+        self.tick = tick
+        self.wheel_size = wheel_size
+        self.levels = levels
+        self._spans = [wheel_size ** level for level in range(levels + 1)]
+        self._slots: List[List[Set[Hashable]]] = [
+            [set() for _ in range(wheel_size)] for _ in range(levels)
+        ]
+        # Просроченные таймеры и таймеры дальше последнего уровня
+        self._due: Set[Hashable] = set()
+        self._overflow: Set[Hashable] = set()
+        # ключ -> (тик срабатывания, уровень, ячейка); уровень -1 - _due, levels - _overflow
+        self._timers: Dict[Hashable, Tuple[int, int, int]] = {}
+        self._current = self._tick_of(start)
+
+    def __len__(self) -> int:
+        return len(self._timers)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._timers
+
+    def _tick_of(self, timestamp: float) -> int:
+        return int(timestamp // self.tick)
+
+    def deadline(self, key: Hashable) -> Optional[float]:
+        """Время срабатывания таймера (с точностью до тика)"""
+        timer = self._timers.get(key)
+        return timer[0] * self.tick if timer else None
+
+    def _place(self, key: Hashable, expires: int):
+        delta = expires - self._current
+        if delta <= 0:
+            self._due.add(key)
+            self._timers[key] = (expires, -1, 0)
+            return
+        for level in range(self.levels):
+            if delta < self._spans[level + 1]:
+                slot = (expires // self._spans[level]) % self.wheel_size
+                self._slots[level][slot].add(key)
+                self._timers[key] = (expires, level, slot)
+                return
+        self._overflow.add(key)
+        self._timers[key] = (expires, self.levels, 0)
+
+    def schedule(self, key: Hashable, when: float):
+        """Установка (или перенос) таймера ключа на время when"""
+        self.cancel(key)
+        self._place(key, self._tick_of(when))
+
+    def cancel(self, key: Hashable) -> bool:
+        """Отмена таймера ключа"""
+        timer = self._timers.pop(key, None)
+        if timer is None:
+            return False
+        _, level, slot = timer
+        if level < 0:
+            self._due.discard(key)
+        elif level == self.levels:
+            self._overflow.discard(key)
+        else:
+            self._slots[level][slot].discard(key)
+        return True
+
+    def _cascade(self, level: int):
+        """Перенос таймеров текущей ячейки уровня на младшие уровни"""
+        slot = (self._current // self._spans[level]) % self.wheel_size
+        keys, self._slots[level][slot] = self._slots[level][slot], set()
+        for key in keys:
+            self._place(key, self._timers[key][0])
+
+    def advance(self, now: float) -> List[Hashable]:
+        """Продвижение колеса до времени now; возвращает сработавшие ключи"""
+        target = self._tick_of(now)
+        expired = []
+        while self._current < target:
+            self._current += 1
+            if self._overflow and self._current % self._spans[self.levels - 1] == 0:
+                keys, self._overflow = self._overflow, set()
+                for key in keys:
+                    self._place(key, self._timers[key][0])
+            for level in range(self.levels - 1, 0, -1):
+                if self._current % self._spans[level] == 0:
+                    self._cascade(level)
+            slot = self._slots[0][self._current % self.wheel_size]
+            if slot:
+                expired.extend(slot)
+                slot.clear()
+        if self._due:
+            expired.extend(self._due)
+            self._due.clear()
+        for key in expired:
+            del self._timers[key]
+        return expired
@@ -0,0 +1,110 @@
+import asyncio
+import logging
+from typing import Any, Optional
+from aiohttp import web
+from aiogram import Bot, Dispatcher
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+
+class BoundedRequestHandler(SimpleRequestHandler):
+    """Обработчик вебхука с ограничением числа одновременно обрабатываемых апдейтов
+
+    Ответ Telegram отправляется сразу, апдейт обрабатывается в фоне. Если
+    уже обрабатывается max_concurrency апдейтов, запрос ждет свободного
+    места и не отвечает: Telegram сам притормозит отправку, а память не
+    растет от очереди фоновых задач. После начала остановки (drain) новые
+    апдейты получают 503, и Telegram повторит их после перезапуска.
+    """
+
+    def __init__(self, dispatcher: Dispatcher, bot: Bot, max_concurrency: int = 100,
+                 secret_token: Optional[str] = None, **data: Any):
+        super().__init__(dispatcher, bot, handle_in_background=True, secret_token=secret_token, **data)
+        self.max_concurrency = max_concurrency
+        self._slots = asyncio.Semaphore(max_concurrency)
+        self._closing = False
+
+    @property
+    def in_flight(self) -> int:
+        """Количество апдейтов в обработке"""
+        return len(self._background_feed_update_tasks)
+
+    async def _handle_request_background(self, bot: Bot, request: web.Request) -> web.Response:
+        if self._closing:
+            return web.Response(status=503)
+        update = await request.json(loads=bot.session.json_loads)
+        await self._slots.acquire()
+        if self._closing:
+            self._slots.release()
+            return web.Response(status=503)
+        task = asyncio.create_task(self._background_feed_update(bot=bot, update=update))
+        self._background_feed_update_tasks.add(task)
+        task.add_done_callback(self._release)
+        return web.json_response({}, dumps=bot.session.json_dumps)
+
+    def _release(self, task: asyncio.Task):
+        self._background_feed_update_tasks.discard(task)
+        self._slots.release()
+        if not task.cancelled() and task.exception():
+            logging.error("Ошибка обработки апдейта", exc_info=task.exception())
+
+    async def drain(self, timeout: Optional[float] = None) -> int:
+        """Остановка приема апдейтов и ожидание завершения тех, что в обработке
+
+        Не успевшие за timeout секунд апдейты отменяются; возвращает их число.
+        """
+        self._closing = True
+        tasks = set(self._background_feed_update_tasks)
+        if not tasks:
+            return 0
+        _, pending = await asyncio.wait(tasks, timeout=timeout)
+        if pending:
+            logging.warning("Не дождались завершения %d апдейтов за %s с, отменяем", len(pending), timeout)
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+        return len(pending)
+
+# Ключ обработчика в приложении aiohttp
+WEBHOOK_HANDLER = web.AppKey('webhook_handler', BoundedRequestHandler)
+
+def create_webhook_app(dp: Dispatcher, bot: Bot, path: str, secret_token: Optional[str] = None,
+                       max_concurrency: int = 100, **data: Any) -> web.Application:
+    """aiohttp-приложение, принимающее апдейты Telegram по path"""
+    app = web.Application()
+    handler = BoundedRequestHandler(dp, bot, max_concurrency=max_concurrency, secret_token=secret_token, **data)
+    handler.register(app, path=path)
+    app[WEBHOOK_HANDLER] = handler
+    setup_application(app, dp, bot=bot, **data)
+    return app
+
+async def run_webhook(dp: Dispatcher, bot: Bot, host: str, port: int, path: str,
+                      secret_token: Optional[str] = None, base_url: Optional[str] = None,
+                      max_concurrency: int = 100, drain_timeout: float = 30.0):
+    """Запуск сервера вебхука (до отмены задачи)
+
+    Если указан base_url, вебхук регистрируется в Telegram по адресу
+    base_url + path; без него сервер только принимает запросы (например,
+    за обратным прокси, где вебхук уже настроен, или для локальной проверки).
+
+    При остановке сервер перестает принимать соединения и до drain_timeout
+    секунд ждет апдейты в обработке: хранилище FSM и база закрываются
+    вызывающим кодом только после возврата из этой функции.
+    """
+    app = create_webhook_app(dp, bot, path, secret_token, max_concurrency)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    if base_url:
+        await bot.set_webhook(
+            f"{base_url.rstrip('/')}{path}",
+            secret_token=secret_token,
+            allowed_updates=dp.resolve_used_update_types(),
+            max_connections=min(max_concurrency, 100)
+        )
+    logging.info("Вебхук слушает %s:%s%s", host, port, path)
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await site.stop()
+        await app[WEBHOOK_HANDLER].drain(drain_timeout)
+        await runner.cleanup()
@@ -1,22 +1,15 @@
+from typing import Dict
 from aiogram import Dispatcher, types, F
-from database.models import get_user, get_words_by_level, add_learned_word, add_word_to_spaced_repetition
+from database.async_models import get_words_by_level, enroll_words
 from .config import WORDS_PER_DAY
+from .rendering import card_renderer
 
-async def cmd_words(message: types.Message):
+async def cmd_words(message: types.Message, user: Dict):
     """Обработчик команды /words"""
     user_id = message.from_user.id
     
-    # Получаем информацию о пользователе
-    user = get_user(user_id)
-    
-    if not user:
-        await message.answer(
-            "Сначала нужно выбрать уровень! Напиши /start"
-        )
-        return
-    
     # Получаем слова для уровня пользователя
-    words = get_words_by_level(user['level'], WORDS_PER_DAY)
+    words = await get_words_by_level(user['level'], WORDS_PER_DAY)
     
     if not words:
         await message.answer(
@@ -25,30 +18,27 @@ async def cmd_words(message: types.Message):
         )
         return
     
-    # Формируем сообщение со словами
-    words_text = f"📚 Вот твои {len(words)} слов для изучения:\n\n"
-    
+    # Формируем сообщение со словами (карточки берутся из кэша)
+    parts = [f"📚 Вот твои {len(words)} слов для изучения:\n\n"]
     for i, word_data in enumerate(words, 1):
-        words_text += (
-            f"{i}. **{word_data['word']}** [{word_data['transcription']}]\n"
-            f"   Перевод: {word_data['translation']}\n"
-            f"   Пример: {word_data['example']}\n\n"
-        )
-        
-        # Добавляем слово в список выученных
-        add_learned_word(user_id, word_data['word'])
-        
-        # Добавляем слово в систему интервального повторения
-        add_word_to_spaced_repetition(user_id, word_data['word_id'], word_data['word'])
+        parts.append(f"{i}. ")
+        parts.append(card_renderer.render('words_item', word_data))
+    
+    # Добавляем слова в выученные и в систему интервального повторения одной транзакцией
+    added = await enroll_words(user_id, words)
     
-    words_text += (
-        "💡 Эти слова добавлены в систему интервального повторения.\n"
+    if added:
+        parts.append("💡 Эти слова добавлены в систему интервального повторения.\n")
+    else:
+        parts.append("💡 Эти слова уже есть в системе интервального повторения.\n")
+    parts.append(
         "Используй команду /review для повторения слов!\n"
         "Используй команду /test для проверки знаний!"
     )
+    words_text = "".join(parts)
     
     await message.answer(words_text)
 
 def register_words_handlers(dp: Dispatcher):
     """Регистрация обработчиков команды words"""
-    dp.message.register(cmd_words, F.text == "/words") 
\ No newline at end of file
+    dp.message.register(cmd_words, F.text == "/words", flags={"user_required": True}) 
\ No newline at end of file
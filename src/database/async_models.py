@@ -0,0 +1,405 @@
+from sqlalchemy import select, update, func, case
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from datetime import date, datetime, timedelta
+from typing import AsyncIterator, Callable, List, Dict, Optional, Tuple
+from .engine import create_async_sqlite_engine
+from .models import (
+    Base, User, Word, SpacedRepetition, LearnedWord,
+    card_to_dict, card_matches, word_upsert, SCHEDULE_FIELDS
+)
+from .migrations import run_migrations
+from .cache import user_cache
+from .catalog import word_catalog
+from .scheduling import scheduler
+from .write_behind import ReviewWriteBuffer
+from .metrics import timed
+from .config import REVIEW_WRITE_BEHIND, REVIEW_FLUSH_BATCH, REVIEW_FLUSH_INTERVAL, REVIEW_MAX_PENDING
+
+# Асинхронный движок базы данных (aiosqlite), не блокирует event loop бота
+async_engine = create_async_sqlite_engine()
+AsyncSession = async_sessionmaker(bind=async_engine, expire_on_commit=False)
+
+# Буфер отложенной записи ответов на повторение (None - запись сразу)
+review_buffer = (
+    ReviewWriteBuffer(AsyncSession, REVIEW_FLUSH_BATCH, REVIEW_FLUSH_INTERVAL, REVIEW_MAX_PENDING)
+    if REVIEW_WRITE_BEHIND else None
+)
+
+# Подписчики на изменение дат повторения: callback(user_id, next_review_date)
+due_date_listeners: List[Callable[[int, date], None]] = []
+
+def _notify_due_date(user_id: int, next_review_date: date):
+    for listener in due_date_listeners:
+        listener(user_id, next_review_date)
+
+async def init_db():
+    """Инициализация базы данных"""
+    async with async_engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(run_migrations)
+
+async def close_db():
+    """Закрытие соединений с базой данных (с записью отложенных изменений)"""
+    if review_buffer is not None:
+        await review_buffer.close()
+    await async_engine.dispose()
+
+@timed
+async def add_user(user_id: int, level: str = 'A1'):
+    """Добавление нового пользователя"""
+    async with AsyncSession() as session:
+        session.add(User(user_id=user_id, level=level))
+        await session.commit()
+        user_cache.invalidate(user_id)
+
+@timed
+async def get_user(user_id: int, with_words: bool = False) -> Optional[Dict]:
+    """Получение информации о пользователе
+
+    Список выученных слов загружается только при with_words=True.
+    Профиль без списка слов берется из кэша, если он там есть.
+    """
+    if not with_words:
+        cached = user_cache.get(user_id)
+        if cached is not None:
+            return cached
+    # Если профиль изменят, пока идет запрос, прочитанная копия в кэш не попадет
+    generation = user_cache.generation()
+
+    async with AsyncSession() as session:
+        user = await session.get(User, user_id)
+        if user:
+            result = {
+                'user_id': user.user_id,
+                'level': user.level,
+                'test_results': {
+                    'correct': user.correct_answers,
+                    'incorrect': user.incorrect_answers
+                },
+                'reminder_hour': user.reminder_hour,
+                'created_at': user.created_at
+            }
+            if with_words:
+                result['words_learned'] = list(await session.scalars(
+                    select(LearnedWord.word)
+                    .where(LearnedWord.user_id == user_id)
+                    .order_by(LearnedWord.learned_at, LearnedWord.word_id)
+                ))
+            else:
+                user_cache.put(user_id, result, generation)
+            return result
+        return None
+
+@timed
+async def update_user_level(user_id: int, level: str):
+    """Обновление уровня пользователя"""
+    async with AsyncSession() as session:
+        user = await session.get(User, user_id)
+        if user:
+            user.level = level
+            await session.commit()
+            user_cache.update(user_id, lambda cached: cached.update(level=level))
+
+@timed
+async def set_reminder_hour(user_id: int, hour: Optional[int]):
+    """Изменение часа напоминания о повторении (None - выключить)"""
+    async with AsyncSession() as session:
+        await session.execute(
+            update(User).where(User.user_id == user_id).values(reminder_hour=hour)
+        )
+        await session.commit()
+        user_cache.update(user_id, lambda cached: cached.update(reminder_hour=hour))
+
+@timed
+async def add_learned_word(user_id: int, word_id: int, word: str):
+    """Добавление выученного слова"""
+    async with AsyncSession() as session:
+        await session.execute(
+            sqlite_insert(LearnedWord)
+            .values(user_id=user_id, word_id=word_id, word=word)
+            .on_conflict_do_nothing(index_elements=['user_id', 'word_id'])
+        )
+        await session.commit()
+
+@timed
+async def get_learned_words_count(user_id: int) -> int:
+    """Получение количества выученных слов"""
+    async with AsyncSession() as session:
+        return await session.scalar(
+            select(func.count()).select_from(LearnedWord).where(LearnedWord.user_id == user_id)
+        )
+
+@timed
+async def get_recent_learned_words(user_id: int, limit: int = 5) -> List[str]:
+    """Получение последних выученных слов (от старых к новым)"""
+    async with AsyncSession() as session:
+        words = list(await session.scalars(
+            select(LearnedWord.word)
+            .where(LearnedWord.user_id == user_id)
+            .order_by(LearnedWord.learned_at.desc(), LearnedWord.word_id.desc())
+            .limit(limit)
+        ))
+        return words[::-1]
+
+@timed
+async def update_test_results(user_id: int, is_correct: bool):
+    """Обновление результатов тестов (одним UPDATE на стороне SQL)"""
+    async with AsyncSession() as session:
+        column = User.correct_answers if is_correct else User.incorrect_answers
+        await session.execute(
+            update(User).where(User.user_id == user_id).values({column: column + 1})
+        )
+        await session.commit()
+        user_cache.count_test_result(user_id, is_correct)
+
+@timed
+async def get_words_by_level(level: str, limit: int = 5) -> List[Dict]:
+    """Получение слов по уровню (из каталога в памяти)"""
+    return word_catalog.get_words_by_level(level, limit)
+
+@timed
+async def get_word_by_id(word_id: int) -> Optional[Dict]:
+    """Получение слова по ID (из каталога в памяти)"""
+    return word_catalog.get_word_by_id(word_id)
+
+@timed
+async def add_word(word: str, transcription: str, translation: str, example: str, level: str):
+    """Добавление нового слова в базу (существующее слово уровня обновляется)"""
+    async with AsyncSession() as session:
+        await session.execute(word_upsert(), {
+            'word': word,
+            'transcription': transcription,
+            'translation': translation,
+            'example': example,
+            'level': level
+        })
+        await session.commit()
+    word_catalog.invalidate()
+
+# Функции для интервального повторения
+
+@timed
+async def add_word_to_spaced_repetition(user_id: int, word_id: int, word: str):
+    """Добавление слова в систему интервального повторения"""
+    async with AsyncSession() as session:
+        session.add(SpacedRepetition(
+            user_id=user_id,
+            word_id=word_id,
+            word=word,
+            next_review_date=datetime.now().date()
+        ))
+        await session.commit()
+
+@timed
+async def enroll_words(user_id: int, words: List[Dict]) -> List[Dict]:
+    """Добавление пачки слов в выученные и в интервальное повторение одной транзакцией
+
+    Уже добавленные слова пропускаются. Возвращает только добавленные слова.
+    """
+    if not words:
+        return []
+
+    async with AsyncSession() as session:
+        next_review = datetime.now().date()
+        result = await session.execute(
+            sqlite_insert(SpacedRepetition)
+            .values([
+                {
+                    'user_id': user_id,
+                    'word_id': word['word_id'],
+                    'word': word['word'],
+                    'next_review_date': next_review
+                }
+                for word in words
+            ])
+            .on_conflict_do_nothing(index_elements=['user_id', 'word_id'])
+            .returning(SpacedRepetition.word_id)
+        )
+        added_ids = set(result.scalars())
+        added = [word for word in words if word['word_id'] in added_ids]
+
+        await session.execute(
+            sqlite_insert(LearnedWord)
+            .values([
+                {'user_id': user_id, 'word_id': word['word_id'], 'word': word['word']}
+                for word in words
+            ])
+            .on_conflict_do_nothing(index_elements=['user_id', 'word_id'])
+        )
+
+        await session.commit()
+    if added:
+        _notify_due_date(user_id, next_review)
+    return added
+
+@timed
+async def get_words_for_review(user_id: int, limit: int = 10) -> List[Dict]:
+    """Получение слов для повторения на сегодня"""
+    async with AsyncSession() as session:
+        today = datetime.now().date()
+        # Карточки из overlay могут выпасть из очереди - читаем с запасом
+        pending = len(review_buffer.pending_for_user(user_id)) if review_buffer is not None else 0
+        result = await session.execute(
+            select(SpacedRepetition, Word)
+            .join(Word, SpacedRepetition.word_id == Word.word_id)
+            .where(
+                SpacedRepetition.user_id == user_id,
+                SpacedRepetition.next_review_date <= today
+            )
+            .order_by(SpacedRepetition.next_review_date.asc())
+            .limit(limit + pending)
+        )
+        rows = [
+            {
+                'id': sr.id,
+                'word_id': sr.word_id,
+                'word': sr.word,
+                'interval_days': sr.interval_days,
+                'ease_factor': sr.ease_factor,
+                'consecutive_correct': sr.consecutive_correct,
+                'consecutive_incorrect': sr.consecutive_incorrect,
+                'total_reviews': sr.total_reviews,
+                'last_review_date': sr.last_review_date,
+                'transcription': word.transcription,
+                'translation': word.translation,
+                'example': word.example,
+                'level': word.level
+            }
+            for sr, word in result
+        ]
+        if review_buffer is not None:
+            return review_buffer.merge_review_queue(user_id, rows, limit, today)
+        return rows
+
+async def _buffer_answer(review_id: int, is_correct: bool, user_id: Optional[int],
+                         word_id: Optional[int]) -> Optional[Dict]:
+    """Ответ на повторение в режиме write-behind"""
+    base = review_buffer.get(review_id)
+    if base is None:
+        async with AsyncSession() as session:
+            spaced_rep = await session.get(SpacedRepetition, review_id)
+            if not spaced_rep:
+                return None
+            base = card_to_dict(spaced_rep)
+    if not card_matches(base, user_id, word_id):
+        return None
+
+    card = scheduler.schedule(base, is_correct)
+    await review_buffer.record(base, card)
+    _notify_due_date(card['user_id'], card['next_review_date'])
+    return card
+
+@timed
+async def update_spaced_repetition(review_id: int, is_correct: bool, user_id: Optional[int] = None,
+                                   word_id: Optional[int] = None) -> Optional[Dict]:
+    """Обновление интервального повторения после ответа пользователя
+
+    Карточка загружается по первичному ключу; если передан user_id, проверяется,
+    что она принадлежит пользователю, а если word_id - что это карточка того
+    слова, по которому проверялся ответ. Возвращает обновленную карточку или None.
+    В режиме write-behind изменения попадают в overlay и записываются пачкой.
+    """
+    if review_buffer is not None:
+        return await _buffer_answer(review_id, is_correct, user_id, word_id)
+
+    async with AsyncSession() as session:
+        spaced_rep = await session.get(SpacedRepetition, review_id)
+        if not spaced_rep:
+            return None
+        base = card_to_dict(spaced_rep)
+        if not card_matches(base, user_id, word_id):
+            return None
+
+        card = scheduler.schedule(base, is_correct)
+        for field in SCHEDULE_FIELDS:
+            setattr(spaced_rep, field, card[field])
+
+        await session.commit()
+    _notify_due_date(card['user_id'], card['next_review_date'])
+    return card
+
+@timed
+async def get_spaced_repetition_stats(user_id: int) -> Dict:
+    """Получение статистики интервального повторения одним агрегирующим запросом"""
+    async with AsyncSession() as session:
+        today = datetime.now().date()
+        result = await session.execute(
+            select(
+                func.count(),
+                func.sum(case((SpacedRepetition.next_review_date <= today, 1), else_=0)),
+                func.avg(SpacedRepetition.ease_factor),
+                func.sum(SpacedRepetition.total_reviews)
+            ).where(SpacedRepetition.user_id == user_id)
+        )
+        total_words, due_today, avg_ease_factor, total_reviews = result.one()
+
+        stats = {
+            'total_words': total_words,
+            'due_today': due_today or 0,
+            'avg_ease_factor': avg_ease_factor or 0,
+            'total_reviews': total_reviews or 0
+        }
+        if review_buffer is not None:
+            stats = review_buffer.adjust_stats(user_id, stats, today)
+        stats['avg_ease_factor'] = round(stats['avg_ease_factor'], 2)
+        return stats
+
+@timed
+async def get_due_words_count(user_id: int) -> int:
+    """Получение количества слов для повторения сегодня"""
+    async with AsyncSession() as session:
+        today = datetime.now().date()
+        due = await session.scalar(
+            select(func.count()).select_from(SpacedRepetition).where(
+                SpacedRepetition.user_id == user_id,
+                SpacedRepetition.next_review_date <= today
+            )
+        )
+        if review_buffer is not None:
+            return review_buffer.adjust_due_count(user_id, due, today)
+        return due
+
+@timed
+async def get_next_due_date(user_id: int) -> Optional[date]:
+    """Ближайшая дата повторения пользователя (None - карточек нет)
+
+    Карточки из overlay отложенной записи исключаются из минимума по базе:
+    их строки в базе еще содержат старые даты.
+    """
+    pending = review_buffer.pending_for_user(user_id) if review_buffer is not None else []
+    query = (
+        select(func.min(SpacedRepetition.next_review_date))
+        .where(SpacedRepetition.user_id == user_id)
+    )
+    if pending:
+        query = query.where(SpacedRepetition.id.not_in([card['id'] for card in pending]))
+    async with AsyncSession() as session:
+        next_due = await session.scalar(query)
+    dates = [card['next_review_date'] for card in pending] + ([next_due] if next_due else [])
+    return min(dates) if dates else None
+
+async def iter_reminder_schedule(batch_size: int = 10000) -> AsyncIterator[Tuple[int, Optional[date], int]]:
+    """Ближайшая дата повторения и час напоминания для пользователей с напоминаниями
+
+    Минимум по пользователю берется из индекса (user_id, next_review_date),
+    результат читается потоком, без загрузки всей таблицы в память. Дата -
+    None, если карточек у пользователя еще нет.
+    """
+    due = (
+        select(
+            SpacedRepetition.user_id,
+            func.min(SpacedRepetition.next_review_date).label('next_due')
+        )
+        .group_by(SpacedRepetition.user_id)
+        .subquery()
+    )
+    async with AsyncSession() as session:
+        result = await session.stream(
+            select(User.user_id, due.c.next_due, User.reminder_hour)
+            .outerjoin(due, due.c.user_id == User.user_id)
+            .where(User.reminder_hour.is_not(None))
+            .execution_options(yield_per=batch_size)
+        )
+        async for user_id, next_due, reminder_hour in result:
+            yield user_id, next_due, reminder_hour
@@ -0,0 +1,131 @@
+"""Кэш профилей пользователей в памяти процесса"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Optional
+from .config import USER_CACHE_SIZE, USER_CACHE_TTL
+
+def _copy(user: Dict) -> Dict:
+    """Копия профиля, чтобы изменения у вызывающего не попадали в кэш"""
+    return {key: dict(value) if isinstance(value, dict) else value for key, value in user.items()}
+
+class UserCache:
+    """LRU-кэш с ограничением размера и временем жизни записей
+
+    Хранит профили пользователей (результат get_user) по user_id.
+    Счетчики hits/misses/evictions помогают подобрать размер кэша.
+
+    Каждая запись профиля (update, invalidate) получает номер поколения.
+    Читающий из базы берет generation() до запроса и передает его в put():
+    если профиль изменили, пока шел запрос, прочитанная копия устарела и в
+    кэш не попадает. Номера последних записей хранятся для maxsize
+    пользователей; если нужный номер уже вытеснен, put() тоже пропускается.
+    """
+    
+    def __init__(self, maxsize: int = USER_CACHE_SIZE, ttl: float = USER_CACHE_TTL,
+                 clock: Callable[[], float] = time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._written = OrderedDict()
+        self._forgotten = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def get(self, user_id: int) -> Optional[Dict]:
+        """Получение профиля из кэша (None, если нет или устарел)"""
+        with self._lock:
+            entry = self._data.get(user_id)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, user = entry
+            if expires_at <= self._clock():
+                del self._data[user_id]
+                self.misses += 1
+                return None
+            self._data.move_to_end(user_id)
+            self.hits += 1
+            return _copy(user)
+    
+    def generation(self) -> int:
+        """Текущее поколение записей (берется до чтения профиля из базы)"""
+        with self._lock:
+            return self._generation
+    
+    def _written_since(self, user_id: int, generation: int) -> bool:
+        return self._written.get(user_id, 0) > generation or self._forgotten > generation
+    
+    def _bump(self, user_id: int):
+        """Отметка записи профиля (вызывается под блокировкой)"""
+        self._generation += 1
+        self._written[user_id] = self._generation
+        self._written.move_to_end(user_id)
+        while len(self._written) > max(self.maxsize, 1):
+            _, self._forgotten = self._written.popitem(last=False)
+    
+    def put(self, user_id: int, user: Dict, generation: Optional[int] = None):
+        """Сохранение профиля в кэш
+
+        generation - поколение на момент начала чтения из базы: если с тех
+        пор профиль менялся, копия устарела и не сохраняется.
+        """
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            if generation is not None and self._written_since(user_id, generation):
+                return
+            self._data[user_id] = (self._clock() + self.ttl, _copy(user))
+            self._data.move_to_end(user_id)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+    
+    def update(self, user_id: int, apply: Callable[[Dict], None]):
+        """Изменение закэшированного профиля на месте (если он есть)"""
+        with self._lock:
+            self._bump(user_id)
+            entry = self._data.get(user_id)
+            if entry is not None:
+                apply(entry[1])
+    
+    def count_test_result(self, user_id: int, is_correct: bool):
+        """Увеличение счетчика ответов в закэшированном профиле"""
+        key = 'correct' if is_correct else 'incorrect'
+        
+        def apply(user: Dict):
+            user['test_results'][key] += 1
+        
+        self.update(user_id, apply)
+    
+    def invalidate(self, user_id: int):
+        """Удаление профиля из кэша"""
+        with self._lock:
+            self._bump(user_id)
+            self._data.pop(user_id, None)
+    
+    def clear(self):
+        """Очистка кэша (чтения, начатые до нее, в кэш не попадут)"""
+        with self._lock:
+            self._generation += 1
+            self._forgotten = self._generation
+            self._written.clear()
+            self._data.clear()
+    
+    def stats(self) -> Dict:
+        """Счетчики кэша"""
+        with self._lock:
+            return {
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions
+            }
+
+# Общий кэш для синхронного и асинхронного слоя
+user_cache = UserCache()
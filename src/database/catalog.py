@@ -0,0 +1,128 @@
+"""Каталог слов в памяти процесса
+
+Таблица words небольшая и почти не меняется, поэтому она целиком
+загружается один раз при запуске: по уровням хранятся компактные массивы
+word_id, а сами слова - в словаре word_id -> запись. Обработчики получают
+слова без обращения к базе данных.
+
+Изменения таблицы words (например, из scripts/populate_database.py в
+другом процессе) отслеживаются по счетчику catalog_version, который
+увеличивают триггеры (см. migrations.py); refresh_if_changed() перечитывает
+каталог, только если счетчик изменился.
+"""
+import asyncio
+import logging
+from array import array
+from typing import Dict, List, NamedTuple, Optional
+from sqlalchemy import text
+from .config import CATALOG_REFRESH_SECONDS
+from .models import engine, Word, Session
+
+class CatalogEntry(NamedTuple):
+    """Слово из каталога"""
+    word_id: int
+    word: str
+    transcription: str
+    translation: str
+    example: str
+    level: str
+    
+    def as_dict(self) -> Dict:
+        return self._asdict()
+
+class WordCatalog:
+    """Неизменяемый снимок таблицы words с атомарной перезагрузкой"""
+    
+    def __init__(self, bind=engine):
+        self._bind = bind
+        self._entries: Dict[int, CatalogEntry] = {}
+        self._levels: Dict[str, array] = {}
+        self.version: Optional[int] = None
+    
+    @property
+    def loaded(self) -> bool:
+        return self.version is not None
+    
+    def _read_version(self, connection) -> int:
+        return connection.execute(text("SELECT version FROM catalog_version")).scalar() or 0
+    
+    def load(self):
+        """Загрузка всех слов из базы данных"""
+        session = Session(bind=self._bind)
+        try:
+            version = self._read_version(session.connection())
+            entries = {}
+            levels = {}
+            for word in session.query(Word).order_by(Word.word_id):
+                entries[word.word_id] = CatalogEntry(
+                    word.word_id, word.word, word.transcription,
+                    word.translation, word.example, word.level
+                )
+                levels.setdefault(word.level, array('q')).append(word.word_id)
+        finally:
+            session.close()
+        
+        # Подмена ссылок атомарна: читатели видят либо старый, либо новый снимок
+        self._entries, self._levels, self.version = entries, levels, version
+    
+    def refresh_if_changed(self) -> bool:
+        """Перезагрузка каталога, если таблица words изменилась"""
+        with self._bind.connect() as connection:
+            version = self._read_version(connection)
+        if version == self.version:
+            return False
+        self.load()
+        return True
+    
+    def invalidate(self):
+        """Сброс каталога: он будет перечитан при следующем обращении"""
+        self.version = None
+    
+    def _ensure_loaded(self):
+        if not self.loaded:
+            self.load()
+    
+    def levels(self) -> List[str]:
+        """Список уровней, для которых есть слова"""
+        self._ensure_loaded()
+        return list(self._levels)
+    
+    def entries_by_level(self, level: str, limit: Optional[int] = None) -> List[CatalogEntry]:
+        """Записи уровня в порядке word_id"""
+        self._ensure_loaded()
+        entries = self._entries
+        ids = self._levels.get(level, ())
+        if limit is not None:
+            ids = ids[:limit]
+        return [entries[word_id] for word_id in ids]
+    
+    def get_words_by_level(self, level: str, limit: int = 5) -> List[Dict]:
+        """Получение слов по уровню"""
+        return [entry.as_dict() for entry in self.entries_by_level(level, limit)]
+    
+    def get_entry(self, word_id: int) -> Optional[CatalogEntry]:
+        """Запись по ID"""
+        self._ensure_loaded()
+        return self._entries.get(word_id)
+    
+    def get_word_by_id(self, word_id: int) -> Optional[Dict]:
+        """Получение слова по ID"""
+        entry = self.get_entry(word_id)
+        return entry.as_dict() if entry else None
+    
+    def __len__(self) -> int:
+        self._ensure_loaded()
+        return len(self._entries)
+
+# Общий каталог процесса
+word_catalog = WordCatalog()
+
+async def watch_catalog(catalog: WordCatalog = word_catalog, interval: float = CATALOG_REFRESH_SECONDS):
+    """Фоновая проверка изменений каталога"""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            if await asyncio.to_thread(catalog.refresh_if_changed):
+                logging.info("Каталог слов перезагружен: %d слов", len(catalog))
+        except Exception:
+            logging.exception("Не удалось обновить каталог слов")
@@ -1,4 +1,45 @@
 import os
+from dotenv import load_dotenv
+
+# Загружаем переменные окружения
+load_dotenv()
 
 # Настройки базы данных
-DATABASE_PATH = 'words_bot.db' 
\ No newline at end of file
+DATABASE_PATH = os.getenv('DATABASE_PATH', 'words_bot.db')
+
+# Настройки SQLite (применяются к каждому новому соединению)
+SQLITE_JOURNAL_MODE = os.getenv('SQLITE_JOURNAL_MODE', 'WAL')
+SQLITE_SYNCHRONOUS = os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL')
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', '5000'))
+SQLITE_MMAP_SIZE = int(os.getenv('SQLITE_MMAP_SIZE', str(256 * 1024 * 1024)))
+SQLITE_CACHE_SIZE = int(os.getenv('SQLITE_CACHE_SIZE', '-65536'))  # отрицательное значение - в КиБ
+
+# Пул соединений
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '5'))
+DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', '10'))
+DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', '30'))
+
+# Кэш профилей пользователей
+USER_CACHE_SIZE = int(os.getenv('USER_CACHE_SIZE', '10000'))
+USER_CACHE_TTL = float(os.getenv('USER_CACHE_TTL', '300'))
+
+# Интервал проверки изменений каталога слов (секунды)
+CATALOG_REFRESH_SECONDS = float(os.getenv('CATALOG_REFRESH_SECONDS', '60'))
+
+# Отложенная запись ответов на повторение (write-behind)
+REVIEW_WRITE_BEHIND = os.getenv('REVIEW_WRITE_BEHIND', '0') == '1'
+REVIEW_FLUSH_BATCH = int(os.getenv('REVIEW_FLUSH_BATCH', '500'))
+REVIEW_FLUSH_INTERVAL = float(os.getenv('REVIEW_FLUSH_INTERVAL', '1.0'))
+# Не больше REVIEW_MAX_PENDING не записанных карточек (пока база недоступна)
+REVIEW_MAX_PENDING = int(os.getenv('REVIEW_MAX_PENDING', '2000'))
+
+# Алгоритм интервального повторения: ladder (исходный), sm2 или fsrs
+SCHEDULER = os.getenv('SCHEDULER', 'ladder')
+
+# Час напоминания о повторении для новых пользователей (по времени сервера).
+# По умолчанию не задан: напоминания выключены, пока пользователь не включит их /remind
+_default_reminder_hour = os.getenv('DEFAULT_REMINDER_HOUR', '')
+DEFAULT_REMINDER_HOUR = int(_default_reminder_hour) if _default_reminder_hour else None
+
+# Гистограммы задержек обработчиков и функций базы данных
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', '1') == '1'
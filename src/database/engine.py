@@ -0,0 +1,75 @@
+"""Создание движков SQLite с настраиваемыми PRAGMA и пулом соединений
+
+Все параметры по умолчанию берутся из config.py (и переменных окружения),
+но могут быть переопределены аргументами фабрик.
+"""
+from typing import Dict, Optional
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import create_async_engine
+from . import config
+from .query_stats import install_query_tracking
+
+JOURNAL_MODES = {'DELETE', 'TRUNCATE', 'PERSIST', 'MEMORY', 'WAL', 'OFF'}
+SYNCHRONOUS_LEVELS = {'OFF', 'NORMAL', 'FULL', 'EXTRA'}
+
+def sqlite_pragmas(journal_mode: Optional[str] = None, synchronous: Optional[str] = None,
+                   busy_timeout: Optional[int] = None, mmap_size: Optional[int] = None,
+                   cache_size: Optional[int] = None) -> Dict[str, object]:
+    """PRAGMA для нового соединения (с проверкой значений)"""
+    pragmas = {
+        'journal_mode': (journal_mode or config.SQLITE_JOURNAL_MODE).upper(),
+        'synchronous': (synchronous or config.SQLITE_SYNCHRONOUS).upper(),
+        'busy_timeout': int(config.SQLITE_BUSY_TIMEOUT_MS if busy_timeout is None else busy_timeout),
+        'mmap_size': int(config.SQLITE_MMAP_SIZE if mmap_size is None else mmap_size),
+        'cache_size': int(config.SQLITE_CACHE_SIZE if cache_size is None else cache_size),
+    }
+    if pragmas['journal_mode'] not in JOURNAL_MODES:
+        raise ValueError(f"Неизвестный journal_mode: {pragmas['journal_mode']}")
+    if pragmas['synchronous'] not in SYNCHRONOUS_LEVELS:
+        raise ValueError(f"Неизвестный уровень synchronous: {pragmas['synchronous']}")
+    return pragmas
+
+def _install_pragmas(sync_engine, pragmas: Dict[str, object]):
+    """Применение PRAGMA к каждому новому соединению пула"""
+    
+    @event.listens_for(sync_engine, "connect")
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
+
+def _pool_options(pool_size: Optional[int], max_overflow: Optional[int], pool_timeout: Optional[float]) -> Dict:
+    return {
+        'pool_size': config.DB_POOL_SIZE if pool_size is None else pool_size,
+        'max_overflow': config.DB_MAX_OVERFLOW if max_overflow is None else max_overflow,
+        'pool_timeout': config.DB_POOL_TIMEOUT if pool_timeout is None else pool_timeout,
+    }
+
+def create_sqlite_engine(path: Optional[str] = None, pool_size: Optional[int] = None,
+                         max_overflow: Optional[int] = None, pool_timeout: Optional[float] = None,
+                         echo: bool = False, **pragma_overrides):
+    """Синхронный движок SQLite"""
+    engine = create_engine(
+        f'sqlite:///{path or config.DATABASE_PATH}',
+        echo=echo,
+        **_pool_options(pool_size, max_overflow, pool_timeout)
+    )
+    _install_pragmas(engine, sqlite_pragmas(**pragma_overrides))
+    install_query_tracking(engine)
+    return engine
+
+def create_async_sqlite_engine(path: Optional[str] = None, pool_size: Optional[int] = None,
+                               max_overflow: Optional[int] = None, pool_timeout: Optional[float] = None,
+                               echo: bool = False, **pragma_overrides):
+    """Асинхронный движок SQLite (aiosqlite)"""
+    engine = create_async_engine(
+        f'sqlite+aiosqlite:///{path or config.DATABASE_PATH}',
+        echo=echo,
+        **_pool_options(pool_size, max_overflow, pool_timeout)
+    )
+    _install_pragmas(engine.sync_engine, sqlite_pragmas(**pragma_overrides))
+    install_query_tracking(engine.sync_engine)
+    return engine
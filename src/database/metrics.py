@@ -0,0 +1,172 @@
+"""Метрики задержек: гистограммы с фиксированными корзинами
+
+Наблюдение - один bisect по кортежу границ и несколько сложений, без
+блокировок и выделения памяти: обработчики и функции базы выполняются в
+одном event loop. Гистограммы группируются в семейства по имени метрики
+(например, задержки обработчиков) с одной меткой (имя обработчика).
+Текст в формате Prometheus строится только по запросу.
+"""
+import functools
+import inspect
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, List, Optional, Sequence
+from .config import METRICS_ENABLED
+
+# Границы корзин в секундах: от 0.5 мс до 10 с
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+class Histogram:
+    """Гистограмма задержек с числом вызовов и ошибок"""
+    __slots__ = ('buckets', 'counts', 'sum', 'count', 'errors')
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.reset()
+
+    def reset(self):
+        # Последняя корзина - все, что больше самой большой границы (+Inf)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self.errors = 0
+
+    def observe(self, seconds: float, error: bool = False):
+        self.counts[bisect_left(self.buckets, seconds)] += 1
+        self.sum += seconds
+        self.count += 1
+        if error:
+            self.errors += 1
+
+    def cumulative(self) -> List[int]:
+        """Накопленные счетчики по корзинам (как le в Prometheus)"""
+        result, total = [], 0
+        for count in self.counts:
+            total += count
+            result.append(total)
+        return result
+
+    def quantile(self, q: float) -> float:
+        """Оценка квантиля по верхней границе корзины"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        for bound, total in zip(self.buckets + (float('inf'),), self.cumulative()):
+            if total >= rank:
+                return bound
+        return float('inf')
+
+class HistogramFamily:
+    """Гистограммы одной метрики по значениям метки"""
+
+    def __init__(self, name: str, help_text: str, label: str, buckets: Sequence[float] = DEFAULT_BUCKETS,
+                 unit: str = 'seconds', errors: bool = True):
+        self.name = name
+        self.help = help_text
+        self.label = label
+        self.buckets = tuple(buckets)
+        self.unit = unit
+        self.errors = errors
+        self.children: Dict[str, Histogram] = {}
+
+    def labels(self, value: str) -> Histogram:
+        histogram = self.children.get(value)
+        if histogram is None:
+            histogram = self.children[value] = Histogram(self.buckets)
+        return histogram
+
+    def expose(self) -> List[str]:
+        metric = f"{self.name}_{self.unit}"
+        lines = [
+            f"# HELP {metric} {self.help}",
+            f"# TYPE {metric} histogram",
+        ]
+        errors = [
+            f"# HELP {self.name}_errors_total {self.help}: ошибки",
+            f"# TYPE {self.name}_errors_total counter",
+        ]
+        for value in sorted(self.children):
+            histogram = self.children[value]
+            label = f'{self.label}="{_escape_label(value)}"'
+            for bound, total in zip(self.buckets, histogram.cumulative()):
+                lines.append(f'{metric}_bucket{{{label},le="{bound:g}"}} {total}')
+            lines.append(f'{metric}_bucket{{{label},le="+Inf"}} {histogram.count}')
+            lines.append(f'{metric}_sum{{{label}}} {histogram.sum:.6f}')
+            lines.append(f'{metric}_count{{{label}}} {histogram.count}')
+            errors.append(f'{self.name}_errors_total{{{label}}} {histogram.errors}')
+        return lines + errors if self.errors else lines
+
+def _escape_label(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+class MetricsRegistry:
+    """Набор семейств гистограмм процесса"""
+
+    def __init__(self):
+        self.families: Dict[str, HistogramFamily] = {}
+
+    def histogram(self, name: str, help_text: str, label: str, buckets: Sequence[float] = DEFAULT_BUCKETS,
+                  unit: str = 'seconds', errors: bool = True) -> HistogramFamily:
+        """Семейство гистограмм name_unit (со счетчиком name_errors_total, если errors)"""
+        key = f"{name}_{unit}"
+        family = self.families.get(key)
+        if family is None:
+            family = self.families[key] = HistogramFamily(name, help_text, label, buckets, unit, errors)
+        return family
+
+    def reset(self):
+        """Обнуление счетчиков (гистограммы остаются у тех, кто их держит)"""
+        for family in self.families.values():
+            for histogram in family.children.values():
+                histogram.reset()
+
+    def expose(self) -> str:
+        """Все метрики в текстовом формате Prometheus"""
+        lines = []
+        for name in sorted(self.families):
+            lines.extend(self.families[name].expose())
+        return "\n".join(lines) + "\n"
+
+# Общий реестр процесса
+metrics = MetricsRegistry()
+
+db_latency = metrics.histogram('wordbot_db', "Время выполнения функций базы данных", 'function')
+
+def timed(func: Optional[Callable] = None, *, family: HistogramFamily = db_latency, name: Optional[str] = None):
+    """Декоратор: задержка и ошибки функции (обычной или async) в гистограмме
+
+    Гистограмма выбирается один раз при декорировании. При METRICS_ENABLED=0
+    функция возвращается без обертки.
+    """
+    if func is None:
+        return lambda f: timed(f, family=family, name=name)
+    if not METRICS_ENABLED:
+        return func
+
+    histogram = family.labels(name or func.__name__)
+    clock = time.perf_counter
+
+    if inspect.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            start = clock()
+            try:
+                result = await func(*args, **kwargs)
+            except Exception:
+                histogram.observe(clock() - start, error=True)
+                raise
+            histogram.observe(clock() - start)
+            return result
+        return async_wrapper
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        start = clock()
+        try:
+            result = func(*args, **kwargs)
+        except Exception:
+            histogram.observe(clock() - start, error=True)
+            raise
+        histogram.observe(clock() - start)
+        return result
+    return wrapper
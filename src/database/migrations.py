@@ -0,0 +1,175 @@
+"""Миграции существующих баз данных
+
+Каждая миграция идемпотентна: проверяет текущую схему и ничего не делает,
+если изменения уже применены. Вызываются из init_db() после create_all.
+"""
+import json
+import logging
+from datetime import datetime, timedelta
+from sqlalchemy import inspect, text, Integer
+
+# ALTER TABLE ... DROP COLUMN появился в SQLite 3.35.0
+DROP_COLUMN_SQLITE_VERSION = (3, 35, 0)
+
+def _columns(connection, table: str) -> set:
+    return {column['name'] for column in inspect(connection).get_columns(table)}
+
+def _require_drop_column(connection, table: str, column: str):
+    """Проверка версии SQLite до начала миграции, которая удаляет столбец"""
+    version = connection.execute(text("SELECT sqlite_version()")).scalar()
+    if tuple(int(part) for part in version.split('.')) < DROP_COLUMN_SQLITE_VERSION:
+        raise RuntimeError(
+            f"Для миграции {table}.{column} нужен SQLite "
+            f"{'.'.join(map(str, DROP_COLUMN_SQLITE_VERSION))} или новее (DROP COLUMN), "
+            f"установлен {version}. Обновите SQLite или Python и запустите бота снова"
+        )
+
+def migrate_learned_words(connection):
+    """Перенос users.words_learned (JSON) в таблицу learned_words
+
+    Слова, которых нет в каталоге, перенести некуда: они пропускаются,
+    их количество пишется в лог. Возвращает количество пропущенных слов.
+    """
+    if 'words_learned' not in _columns(connection, 'users'):
+        return 0
+    _require_drop_column(connection, 'users', 'words_learned')
+    
+    # Одно и то же слово может встречаться на разных уровнях - берем первое
+    word_ids = {}
+    for word_id, word in connection.execute(text("SELECT word_id, word FROM words ORDER BY word_id")):
+        word_ids.setdefault(word, word_id)
+    
+    rows = []
+    skipped = {}
+    users = connection.execute(text("SELECT user_id, words_learned, created_at FROM users"))
+    for user_id, words_learned, created_at in users:
+        created_at = datetime.fromisoformat(created_at) if created_at else datetime.now()
+        for i, word in enumerate(json.loads(words_learned or '[]')):
+            if word in word_ids:
+                # Точное время изучения неизвестно, сохраняем хотя бы порядок
+                rows.append({
+                    'user_id': user_id,
+                    'word_id': word_ids[word],
+                    'word': word,
+                    'learned_at': (created_at + timedelta(microseconds=i)).strftime('%Y-%m-%d %H:%M:%S.%f')
+                })
+            else:
+                skipped[word] = skipped.get(word, 0) + 1
+    
+    if rows:
+        connection.execute(
+            text(
+                "INSERT OR IGNORE INTO learned_words (user_id, word_id, word, learned_at) "
+                "VALUES (:user_id, :word_id, :word, :learned_at)"
+            ),
+            rows
+        )
+    if skipped:
+        logging.warning(
+            "Миграция выученных слов: пропущено %d записей (%d слов нет в каталоге): %s",
+            sum(skipped.values()), len(skipped), ', '.join(sorted(skipped)[:20])
+        )
+    connection.execute(text("ALTER TABLE users DROP COLUMN words_learned"))
+    return sum(skipped.values())
+
+def migrate_test_results(connection):
+    """Перенос users.test_results (JSON) в целочисленные счетчики"""
+    columns = _columns(connection, 'users')
+    if 'test_results' not in columns:
+        return
+    _require_drop_column(connection, 'users', 'test_results')
+    
+    for column in ('correct_answers', 'incorrect_answers'):
+        if column not in columns:
+            connection.execute(text(f"ALTER TABLE users ADD COLUMN {column} INTEGER NOT NULL DEFAULT 0"))
+    
+    connection.execute(text(
+        "UPDATE users SET "
+        "correct_answers = COALESCE(json_extract(test_results, '$.correct'), 0), "
+        "incorrect_answers = COALESCE(json_extract(test_results, '$.incorrect'), 0) "
+        "WHERE test_results IS NOT NULL"
+    ))
+    connection.execute(text("ALTER TABLE users DROP COLUMN test_results"))
+
+def migrate_review_day_numbers(connection):
+    """Перевод дат в spaced_repetition на номера дней и индекс очереди повторения
+
+    SQLite не умеет менять тип столбца, поэтому таблица пересоздается
+    по текущей модели (вместе с индексом (user_id, next_review_date)).
+    """
+    from .models import SpacedRepetition
+    
+    columns = {column['name']: column for column in inspect(connection).get_columns('spaced_repetition')}
+    if isinstance(columns['next_review_date']['type'], Integer):
+        return
+    
+    # julianday('0001-01-01') = 1721425.5, а date(1, 1, 1).toordinal() = 1
+    to_day = "CAST(julianday({0}) - 1721424.5 AS INTEGER)"
+    connection.execute(text("ALTER TABLE spaced_repetition RENAME TO spaced_repetition_old"))
+    SpacedRepetition.__table__.create(connection)
+    connection.execute(text(
+        "INSERT INTO spaced_repetition (id, user_id, word_id, word, interval_days, next_review_date, "
+        "ease_factor, consecutive_correct, consecutive_incorrect, total_reviews, last_review_date, created_at) "
+        "SELECT id, user_id, word_id, word, interval_days, "
+        f"{to_day.format('next_review_date')}, "
+        "ease_factor, consecutive_correct, consecutive_incorrect, total_reviews, "
+        f"{to_day.format('last_review_date')}, "
+        "created_at FROM spaced_repetition_old"
+    ))
+    connection.execute(text("DROP TABLE spaced_repetition_old"))
+
+def migrate_reminder_hour(connection):
+    """Добавление users.reminder_hour (час напоминания о повторении)
+
+    У существующих пользователей напоминания выключены (NULL): на них они
+    не подписывались и включают их сами командой /remind.
+    """
+    if 'reminder_hour' in _columns(connection, 'users'):
+        return
+    connection.execute(text("ALTER TABLE users ADD COLUMN reminder_hour INTEGER"))
+
+def migrate_word_natural_key(connection):
+    """Удаление повторов (word, level) в words и уникальный индекс по ним
+
+    Повторы появлялись при повторном запуске populate_database.py. Ссылки
+    карточек и выученных слов переносятся на самое раннее слово; если у
+    пользователя уже есть запись с ним, дубликат удаляется.
+    """
+    indexes = {index['name'] for index in inspect(connection).get_indexes('words')}
+    if 'ux_words_word_level' in indexes:
+        return
+
+    duplicates = connection.execute(text(
+        "SELECT w.word_id, k.keep_id FROM words w "
+        "JOIN (SELECT word, level, min(word_id) AS keep_id FROM words GROUP BY word, level HAVING count(*) > 1) k "
+        "ON w.word = k.word AND w.level = k.level AND w.word_id != k.keep_id"
+    )).all()
+    if duplicates:
+        remap = [{'old': old, 'keep': keep} for old, keep in duplicates]
+        for table in ('spaced_repetition', 'learned_words'):
+            connection.execute(text(f"UPDATE OR IGNORE {table} SET word_id = :keep WHERE word_id = :old"), remap)
+            connection.execute(text(f"DELETE FROM {table} WHERE word_id = :old"), remap)
+        connection.execute(text("DELETE FROM words WHERE word_id = :old"), remap)
+    connection.execute(text("CREATE UNIQUE INDEX ux_words_word_level ON words (word, level)"))
+
+def ensure_catalog_version(connection):
+    """Счетчик изменений таблицы words для перезагрузки каталога в памяти"""
+    connection.execute(text(
+        "CREATE TABLE IF NOT EXISTS catalog_version ("
+        "id INTEGER PRIMARY KEY CHECK (id = 1), version INTEGER NOT NULL)"
+    ))
+    connection.execute(text("INSERT OR IGNORE INTO catalog_version (id, version) VALUES (1, 0)"))
+    for event in ('INSERT', 'UPDATE', 'DELETE'):
+        connection.execute(text(
+            f"CREATE TRIGGER IF NOT EXISTS words_catalog_{event.lower()} AFTER {event} ON words "
+            "BEGIN UPDATE catalog_version SET version = version + 1; END"
+        ))
+
+def run_migrations(connection):
+    """Применение всех миграций"""
+    migrate_learned_words(connection)
+    migrate_test_results(connection)
+    migrate_review_day_numbers(connection)
+    migrate_reminder_hour(connection)
+    migrate_word_natural_key(connection)
+    ensure_catalog_version(connection)
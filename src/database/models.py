@@ -1,30 +1,54 @@
-from sqlalchemy import create_engine, Column, Integer, String, Text, DateTime, Date, Float, ForeignKey, UniqueConstraint
+from sqlalchemy import Column, Integer, String, Text, DateTime, Float, ForeignKey, UniqueConstraint, Index, func, case, or_, select
+from sqlalchemy.types import TypeDecorator
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, relationship
-from datetime import datetime, timedelta
-import json
-from typing import List, Dict, Optional
-from .config import DATABASE_PATH
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from datetime import date, datetime, timedelta
+from typing import Iterable, List, Dict, Optional, Tuple
+from .engine import create_sqlite_engine
+from .config import DEFAULT_REMINDER_HOUR
+from .migrations import run_migrations
+from .cache import user_cache
+from .scheduling import scheduler
 
 # Создаем базовый класс для моделей
 Base = declarative_base()
 
 # Создаем движок базы данных
-engine = create_engine(f'sqlite:///{DATABASE_PATH}', echo=False)
+engine = create_sqlite_engine()
 Session = sessionmaker(bind=engine)
 
+class DayNumber(TypeDecorator):
+    """Дата, хранящаяся как номер дня (date.toordinal())
+
+    Целое число занимает меньше места в индексе и сравнивается быстрее строки.
+    """
+    impl = Integer
+    cache_ok = True
+    
+    def process_bind_param(self, value, dialect):
+        return value.toordinal() if value is not None else None
+    
+    def process_result_value(self, value, dialect):
+        return date.fromordinal(value) if value is not None else None
+
 class User(Base):
     """Модель пользователя"""
     __tablename__ = 'users'
     
     user_id = Column(Integer, primary_key=True)
     level = Column(String(10), nullable=False, default='A1')
-    words_learned = Column(Text, default='[]')
-    test_results = Column(Text, default='{"correct": 0, "incorrect": 0}')
+    correct_answers = Column(Integer, nullable=False, default=0, server_default='0')
+    incorrect_answers = Column(Integer, nullable=False, default=0, server_default='0')
+    # Час напоминания о повторении (None - напоминания выключены)
+    reminder_hour = Column(Integer, default=DEFAULT_REMINDER_HOUR)
     created_at = Column(DateTime, default=datetime.now)
     
     # Связь с интервальным повторением
     spaced_repetitions = relationship("SpacedRepetition", back_populates="user")
+    
+    # Связь с выученными словами
+    learned_words = relationship("LearnedWord", back_populates="user")
 
 class Word(Base):
     """Модель слова"""
@@ -39,6 +63,9 @@ class Word(Base):
     
     # Связь с интервальным повторением
     spaced_repetitions = relationship("SpacedRepetition", back_populates="word_obj")
+    
+    # Естественный ключ слова: одно написание на уровень
+    __table_args__ = (Index('ux_words_word_level', 'word', 'level', unique=True),)
 
 class SpacedRepetition(Base):
     """Модель интервального повторения"""
@@ -49,24 +76,53 @@ class SpacedRepetition(Base):
     word_id = Column(Integer, ForeignKey('words.word_id'), nullable=False)
     word = Column(String(100), nullable=False)  # Дублируем слово для удобства
     interval_days = Column(Integer, default=1)
-    next_review_date = Column(Date, nullable=False)
+    next_review_date = Column(DayNumber, nullable=False)
     ease_factor = Column(Float, default=2.5)
     consecutive_correct = Column(Integer, default=0)
     consecutive_incorrect = Column(Integer, default=0)
     total_reviews = Column(Integer, default=0)
-    last_review_date = Column(Date)
+    last_review_date = Column(DayNumber)
     created_at = Column(DateTime, default=datetime.now)
     
     # Связи
     user = relationship("User", back_populates="spaced_repetitions")
     word_obj = relationship("Word", back_populates="spaced_repetitions")
     
-    # Уникальное ограничение
-    __table_args__ = (UniqueConstraint('user_id', 'word_id'),)
+    # Уникальное ограничение и индекс очереди повторения
+    __table_args__ = (
+        UniqueConstraint('user_id', 'word_id'),
+        Index('ix_spaced_repetition_user_due', 'user_id', 'next_review_date'),
+    )
+
+class LearnedWord(Base):
+    """Модель выученного слова"""
+    __tablename__ = 'learned_words'
+    
+    user_id = Column(Integer, ForeignKey('users.user_id'), primary_key=True)
+    word_id = Column(Integer, ForeignKey('words.word_id'), primary_key=True)
+    word = Column(String(100), nullable=False)  # Дублируем слово для удобства
+    learned_at = Column(DateTime, nullable=False, default=datetime.now)
+    
+    # Связи
+    user = relationship("User", back_populates="learned_words")
+    
+    # Индекс для выборки последних выученных слов пользователя
+    __table_args__ = (Index('ix_learned_words_user_learned_at', 'user_id', 'learned_at', 'word_id'),)
+
+class FSMRecord(Base):
+    """Состояние и данные FSM aiogram (см. bot/storage.py)"""
+    __tablename__ = 'fsm_storage'
+    
+    key = Column(String(255), primary_key=True)  # bot_id:chat_id:user_id:thread_id:business_connection_id:destiny
+    state = Column(String(255))
+    data = Column(Text)  # JSON
+    updated_at = Column(DateTime, nullable=False, default=datetime.now, onupdate=datetime.now)
 
 def init_db():
     """Инициализация базы данных"""
     Base.metadata.create_all(engine)
+    with engine.begin() as connection:
+        run_migrations(connection)
 
 def add_user(user_id: int, level: str = 'A1'):
     """Добавление нового пользователя"""
@@ -75,25 +131,49 @@ def add_user(user_id: int, level: str = 'A1'):
         user = User(user_id=user_id, level=level)
         session.add(user)
         session.commit()
+        user_cache.invalidate(user_id)
     except Exception as e:
         session.rollback()
         raise e
     finally:
         session.close()
 
-def get_user(user_id: int) -> Optional[Dict]:
-    """Получение информации о пользователе"""
+def get_user(user_id: int, with_words: bool = False) -> Optional[Dict]:
+    """Получение информации о пользователе
+
+    Список выученных слов загружается только при with_words=True.
+    Профиль без списка слов берется из кэша, если он там есть.
+    """
+    if not with_words:
+        cached = user_cache.get(user_id)
+        if cached is not None:
+            return cached
+    # Если профиль изменят, пока идет запрос, прочитанная копия в кэш не попадет
+    generation = user_cache.generation()
+    
     session = Session()
     try:
         user = session.query(User).filter(User.user_id == user_id).first()
         if user:
-            return {
+            result = {
                 'user_id': user.user_id,
                 'level': user.level,
-                'words_learned': json.loads(user.words_learned),
-                'test_results': json.loads(user.test_results),
+                'test_results': {
+                    'correct': user.correct_answers,
+                    'incorrect': user.incorrect_answers
+                },
+                'reminder_hour': user.reminder_hour,
                 'created_at': user.created_at
             }
+            if with_words:
+                result['words_learned'] = [
+                    row.word for row in session.query(LearnedWord.word).filter(
+                        LearnedWord.user_id == user_id
+                    ).order_by(LearnedWord.learned_at, LearnedWord.word_id)
+                ]
+            else:
+                user_cache.put(user_id, result, generation)
+            return result
         return None
     finally:
         session.close()
@@ -106,42 +186,75 @@ def update_user_level(user_id: int, level: str):
         if user:
             user.level = level
             session.commit()
+            user_cache.update(user_id, lambda cached: cached.update(level=level))
+    except Exception as e:
+        session.rollback()
+        raise e
+    finally:
+        session.close()
+
+def set_reminder_hour(user_id: int, hour: Optional[int]):
+    """Изменение часа напоминания о повторении (None - выключить)"""
+    session = Session()
+    try:
+        session.query(User).filter(User.user_id == user_id).update({User.reminder_hour: hour})
+        session.commit()
+        user_cache.update(user_id, lambda cached: cached.update(reminder_hour=hour))
     except Exception as e:
         session.rollback()
         raise e
     finally:
         session.close()
 
-def add_learned_word(user_id: int, word: str):
+def add_learned_word(user_id: int, word_id: int, word: str):
     """Добавление выученного слова"""
     session = Session()
     try:
-        user = session.query(User).filter(User.user_id == user_id).first()
-        if user:
-            words_learned = json.loads(user.words_learned)
-            if word not in words_learned:
-                words_learned.append(word)
-                user.words_learned = json.dumps(words_learned)
-                session.commit()
+        session.execute(
+            sqlite_insert(LearnedWord)
+            .values(user_id=user_id, word_id=word_id, word=word)
+            .on_conflict_do_nothing(index_elements=['user_id', 'word_id'])
+        )
+        session.commit()
     except Exception as e:
         session.rollback()
         raise e
     finally:
         session.close()
 
+def get_learned_words_count(user_id: int) -> int:
+    """Получение количества выученных слов"""
+    session = Session()
+    try:
+        return session.query(func.count()).select_from(LearnedWord).filter(
+            LearnedWord.user_id == user_id
+        ).scalar()
+    finally:
+        session.close()
+
+def get_recent_learned_words(user_id: int, limit: int = 5) -> List[str]:
+    """Получение последних выученных слов (от старых к новым)"""
+    session = Session()
+    try:
+        rows = session.query(LearnedWord.word).filter(
+            LearnedWord.user_id == user_id
+        ).order_by(
+            LearnedWord.learned_at.desc(), LearnedWord.word_id.desc()
+        ).limit(limit).all()
+        return [row.word for row in reversed(rows)]
+    finally:
+        session.close()
+
 def update_test_results(user_id: int, is_correct: bool):
-    """Обновление результатов тестов"""
+    """Обновление результатов тестов (одним UPDATE на стороне SQL)"""
     session = Session()
     try:
-        user = session.query(User).filter(User.user_id == user_id).first()
-        if user:
-            test_results = json.loads(user.test_results)
-            if is_correct:
-                test_results['correct'] += 1
-            else:
-                test_results['incorrect'] += 1
-            user.test_results = json.dumps(test_results)
-            session.commit()
+        column = User.correct_answers if is_correct else User.incorrect_answers
+        session.query(User).filter(User.user_id == user_id).update(
+            {column: column + 1}, synchronize_session=False
+        )
+        session.commit()
+        user_cache.count_test_result(user_id, is_correct)
     except Exception as e:
         session.rollback()
         raise e
@@ -185,19 +298,74 @@ def get_word_by_id(word_id: int) -> Optional[Dict]:
     finally:
         session.close()
 
+# Поля слова, которые обновляются при повторной загрузке по (word, level)
+WORD_FIELDS = ('transcription', 'translation', 'example')
+
+def word_upsert():
+    """INSERT слова с обновлением по (word, level); неизменившиеся строки не трогаются"""
+    statement = sqlite_insert(Word)
+    return statement.on_conflict_do_update(
+        index_elements=['word', 'level'],
+        set_={field: statement.excluded[field] for field in WORD_FIELDS},
+        where=or_(*(Word.__table__.c[field] != statement.excluded[field] for field in WORD_FIELDS))
+    )
+
 def add_word(word: str, transcription: str, translation: str, example: str, level: str):
-    """Добавление нового слова в базу"""
+    """Добавление нового слова в базу (существующее слово уровня обновляется)"""
     session = Session()
     try:
-        new_word = Word(
-            word=word,
-            transcription=transcription,
-            translation=translation,
-            example=example,
-            level=level
-        )
-        session.add(new_word)
+        session.execute(word_upsert(), {
+            'word': word,
+            'transcription': transcription,
+            'translation': translation,
+            'example': example,
+            'level': level
+        })
+        session.commit()
+    except Exception as e:
+        session.rollback()
+        raise e
+    finally:
+        session.close()
+
+def load_catalog(words: Iterable[Tuple[str, str, str, str, str]], batch_size: int = 5000, bind=None) -> Dict[str, int]:
+    """Загрузка каталога слов одной транзакцией
+
+    words - кортежи (word, transcription, translation, example, level).
+    Слова сравниваются с базой по (word, level): новые добавляются,
+    изменившиеся обновляются, остальные не трогаются, поэтому повторная
+    загрузка того же каталога ничего не меняет. Запись - executemany
+    пачками по batch_size. Возвращает счетчики inserted, updated, unchanged.
+    """
+    incoming = {}
+    for word, transcription, translation, example, level in words:
+        # Повтор ключа во входных данных: побеждает последняя запись
+        incoming[(word, level)] = (transcription, translation, example)
+    
+    session = Session(bind=bind) if bind is not None else Session()
+    try:
+        existing = {
+            (row.word, row.level): (row.transcription, row.translation, row.example)
+            for row in session.execute(
+                select(Word.word, Word.level, Word.transcription, Word.translation, Word.example)
+            )
+        }
+        
+        stats = {'inserted': 0, 'updated': 0, 'unchanged': 0}
+        rows = []
+        for (word, level), fields in incoming.items():
+            current = existing.get((word, level))
+            if current == fields:
+                stats['unchanged'] += 1
+                continue
+            stats['inserted' if current is None else 'updated'] += 1
+            rows.append(dict(zip(('word', 'level') + WORD_FIELDS, (word, level) + fields)))
+        
+        statement = word_upsert()
+        for start in range(0, len(rows), batch_size):
+            session.execute(statement, rows[start:start + batch_size])
         session.commit()
+        return stats
     except Exception as e:
         session.rollback()
         raise e
@@ -227,6 +395,53 @@ def add_word_to_spaced_repetition(user_id: int, word_id: int, word: str):
     finally:
         session.close()
 
+def enroll_words(user_id: int, words: List[Dict]) -> List[Dict]:
+    """Добавление пачки слов в выученные и в интервальное повторение одной транзакцией
+
+    Уже добавленные слова пропускаются (INSERT OR IGNORE по (user_id, word_id)).
+    Возвращает только те слова, которые были добавлены.
+    """
+    if not words:
+        return []
+    
+    session = Session()
+    try:
+        next_review = datetime.now().date()
+        
+        result = session.execute(
+            sqlite_insert(SpacedRepetition)
+            .values([
+                {
+                    'user_id': user_id,
+                    'word_id': word['word_id'],
+                    'word': word['word'],
+                    'next_review_date': next_review
+                }
+                for word in words
+            ])
+            .on_conflict_do_nothing(index_elements=['user_id', 'word_id'])
+            .returning(SpacedRepetition.word_id)
+        )
+        added_ids = set(result.scalars())
+        added = [word for word in words if word['word_id'] in added_ids]
+        
+        session.execute(
+            sqlite_insert(LearnedWord)
+            .values([
+                {'user_id': user_id, 'word_id': word['word_id'], 'word': word['word']}
+                for word in words
+            ])
+            .on_conflict_do_nothing(index_elements=['user_id', 'word_id'])
+        )
+        
+        session.commit()
+        return added
+    except Exception as e:
+        session.rollback()
+        raise e
+    finally:
+        session.close()
+
 def get_words_for_review(user_id: int, limit: int = 10) -> List[Dict]:
     """Получение слов для повторения на сегодня"""
     session = Session()
@@ -255,6 +470,7 @@ def get_words_for_review(user_id: int, limit: int = 10) -> List[Dict]:
                 'consecutive_correct': sr.consecutive_correct,
                 'consecutive_incorrect': sr.consecutive_incorrect,
                 'total_reviews': sr.total_reviews,
+                'last_review_date': sr.last_review_date,
                 'transcription': word.transcription,
                 'translation': word.translation,
                 'example': word.example,
@@ -265,53 +481,57 @@ def get_words_for_review(user_id: int, limit: int = 10) -> List[Dict]:
     finally:
         session.close()
 
-def update_spaced_repetition(review_id: int, is_correct: bool):
-    """Обновление интервального повторения после ответа пользователя"""
+def card_to_dict(spaced_rep: SpacedRepetition) -> Dict:
+    """Преобразование карточки интервального повторения в словарь"""
+    return {
+        'id': spaced_rep.id,
+        'user_id': spaced_rep.user_id,
+        'word_id': spaced_rep.word_id,
+        'word': spaced_rep.word,
+        'interval_days': spaced_rep.interval_days,
+        'next_review_date': spaced_rep.next_review_date,
+        'ease_factor': spaced_rep.ease_factor,
+        'consecutive_correct': spaced_rep.consecutive_correct,
+        'consecutive_incorrect': spaced_rep.consecutive_incorrect,
+        'total_reviews': spaced_rep.total_reviews,
+        'last_review_date': spaced_rep.last_review_date
+    }
+
+def card_matches(card: Dict, user_id: Optional[int] = None, word_id: Optional[int] = None) -> bool:
+    """Карточка принадлежит пользователю и относится к ожидаемому слову"""
+    return ((user_id is None or card['user_id'] == user_id)
+            and (word_id is None or card['word_id'] == word_id))
+
+# Поля карточки, которые меняются после ответа
+SCHEDULE_FIELDS = (
+    'interval_days', 'next_review_date', 'ease_factor', 'consecutive_correct',
+    'consecutive_incorrect', 'total_reviews', 'last_review_date'
+)
+
+def update_spaced_repetition(review_id: int, is_correct: bool, user_id: Optional[int] = None,
+                             word_id: Optional[int] = None) -> Optional[Dict]:
+    """Обновление интервального повторения после ответа пользователя
+
+    Карточка загружается по первичному ключу; если передан user_id, проверяется,
+    что она принадлежит пользователю, а если word_id - что это карточка того
+    слова, по которому проверялся ответ. Возвращает обновленную карточку или None.
+    """
     session = Session()
     try:
-        spaced_rep = session.query(SpacedRepetition).filter(SpacedRepetition.id == review_id).first()
+        spaced_rep = session.get(SpacedRepetition, review_id)
         
         if not spaced_rep:
-            return
-        
-        # Обновляем счетчики
-        if is_correct:
-            spaced_rep.consecutive_correct += 1
-            spaced_rep.consecutive_incorrect = 0
-        else:
-            spaced_rep.consecutive_incorrect += 1
-            spaced_rep.consecutive_correct = 0
-        
-        spaced_rep.total_reviews += 1
-        spaced_rep.last_review_date = datetime.now().date()
-        
-        # Вычисляем новый интервал и ease factor
-        if is_correct:
-            # Увеличиваем интервал по новому алгоритму
-            if spaced_rep.consecutive_correct == 0:  # Первый правильный ответ
-                spaced_rep.interval_days = 1
-            elif spaced_rep.consecutive_correct == 1:  # Второй правильный ответ
-                spaced_rep.interval_days = 3
-            elif spaced_rep.consecutive_correct == 2:  # Третий правильный ответ
-                spaced_rep.interval_days = 7
-            else:
-                # После третьего правильного ответа интервал увеличивается на неделю
-                spaced_rep.interval_days = 7 + (spaced_rep.consecutive_correct - 2) * 7
-            
-            # Увеличиваем ease factor (но не более 2.5)
-            spaced_rep.ease_factor = min(2.5, spaced_rep.ease_factor + 0.1)
-        else:
-            # Сбрасываем интервал
-            spaced_rep.interval_days = 1
-            spaced_rep.consecutive_correct = 0
-            
-            # Уменьшаем ease factor (но не менее 1.3)
-            spaced_rep.ease_factor = max(1.3, spaced_rep.ease_factor - 0.2)
+            return None
+        base = card_to_dict(spaced_rep)
+        if not card_matches(base, user_id, word_id):
+            return None
         
-        # Вычисляем следующую дату повторения
-        spaced_rep.next_review_date = datetime.now().date() + timedelta(days=spaced_rep.interval_days)
+        card = scheduler.schedule(base, is_correct)
+        for field in SCHEDULE_FIELDS:
+            setattr(spaced_rep, field, card[field])
         
         session.commit()
+        return card
     except Exception as e:
         session.rollback()
         raise e
@@ -319,35 +539,23 @@ def update_spaced_repetition(review_id: int, is_correct: bool):
         session.close()
 
 def get_spaced_repetition_stats(user_id: int) -> Dict:
-    """Получение статистики интервального повторения"""
+    """Получение статистики интервального повторения одним агрегирующим запросом"""
     session = Session()
     try:
         today = datetime.now().date()
         
-        # Общая статистика
-        total_words = session.query(SpacedRepetition).filter(SpacedRepetition.user_id == user_id).count()
-        due_today = session.query(SpacedRepetition).filter(
-            SpacedRepetition.user_id == user_id,
-            SpacedRepetition.next_review_date <= today
-        ).count()
-        
-        # Средний ease factor
-        avg_ease_result = session.query(SpacedRepetition.ease_factor).filter(
-            SpacedRepetition.user_id == user_id
-        ).all()
-        avg_ease_factor = sum(row[0] for row in avg_ease_result) / len(avg_ease_result) if avg_ease_result else 0
-        
-        # Общее количество повторений
-        total_reviews_result = session.query(SpacedRepetition.total_reviews).filter(
-            SpacedRepetition.user_id == user_id
-        ).all()
-        total_reviews = sum(row[0] for row in total_reviews_result) if total_reviews_result else 0
+        total_words, due_today, avg_ease_factor, total_reviews = session.query(
+            func.count(),
+            func.sum(case((SpacedRepetition.next_review_date <= today, 1), else_=0)),
+            func.avg(SpacedRepetition.ease_factor),
+            func.sum(SpacedRepetition.total_reviews)
+        ).filter(SpacedRepetition.user_id == user_id).one()
         
         return {
             'total_words': total_words,
-            'due_today': due_today,
-            'avg_ease_factor': round(avg_ease_factor, 2),
-            'total_reviews': total_reviews
+            'due_today': due_today or 0,
+            'avg_ease_factor': round(avg_ease_factor or 0, 2),
+            'total_reviews': total_reviews or 0
         }
     finally:
         session.close()
@@ -362,4 +570,14 @@ def get_due_words_count(user_id: int) -> int:
             SpacedRepetition.next_review_date <= today
         ).count()
     finally:
-        session.close() 
\ No newline at end of file
+        session.close() 
+
+def get_next_due_date(user_id: int) -> Optional[date]:
+    """Ближайшая дата повторения пользователя (None - карточек нет)"""
+    session = Session()
+    try:
+        return session.query(func.min(SpacedRepetition.next_review_date)).filter(
+            SpacedRepetition.user_id == user_id
+        ).scalar()
+    finally:
+        session.close()
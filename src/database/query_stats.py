@@ -0,0 +1,70 @@
+"""Учет SQL-запросов в пределах апдейта (или любого другого блока кода)
+
+Обработчики событий движка SQLAlchemy (before/after_cursor_execute)
+добавляют каждый запрос ко всем активным счетчикам текущего контекста
+asyncio. Счетчики вкладываются: счетчик апдейта и счетчик теста видят одни
+и те же запросы. Вне count_queries() обработчики событий ничего не делают,
+поэтому фоновые задачи (запись буфера, каталог) не попадают в учет апдейтов.
+
+rows - число строк, измененных INSERT/UPDATE/DELETE: SQLite не сообщает
+количество строк SELECT до их чтения.
+"""
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Iterator, List, Optional, Tuple
+from sqlalchemy import event
+
+@dataclass
+class QueryStats:
+    """Счетчики SQL-запросов"""
+    statements: int = 0
+    rows: int = 0
+    db_time: float = 0.0
+    # Для отладки: тексты запросов, если счетчик создан с keep_statements=True
+    keep_statements: bool = False
+    statement_log: List[str] = field(default_factory=list)
+
+    def record(self, statement: str, rows: int, elapsed: float):
+        self.statements += 1
+        if rows > 0:
+            self.rows += rows
+        self.db_time += elapsed
+        if self.keep_statements:
+            self.statement_log.append(statement)
+
+_active: ContextVar[Tuple[QueryStats, ...]] = ContextVar('query_stats', default=())
+
+@contextmanager
+def count_queries(keep_statements: bool = False) -> Iterator[QueryStats]:
+    """Подсчет запросов, выполненных внутри блока (в том числе во вложенных await)"""
+    stats = QueryStats(keep_statements=keep_statements)
+    token = _active.set(_active.get() + (stats,))
+    try:
+        yield stats
+    finally:
+        _active.reset(token)
+
+def current_query_stats() -> Optional[QueryStats]:
+    """Самый внутренний активный счетчик (None, если учет не ведется)"""
+    active = _active.get()
+    return active[-1] if active else None
+
+def install_query_tracking(sync_engine):
+    """Подключение учета запросов к движку (для async-движка - к его sync_engine)"""
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def before_execute(conn, cursor, statement, parameters, context, executemany):
+        if _active.get():
+            context._query_started = time.perf_counter()
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def after_execute(conn, cursor, statement, parameters, context, executemany):
+        active = _active.get()
+        if not active:
+            return
+        started = getattr(context, '_query_started', None)
+        elapsed = time.perf_counter() - started if started is not None else 0.0
+        for stats in active:
+            stats.record(statement, cursor.rowcount, elapsed)
@@ -0,0 +1,150 @@
+"""Массовый пересчет расписаний после смены алгоритма повторения
+
+Таблица spaced_repetition читается пачками по первичному ключу (keyset),
+каждая пачка пересчитывается векторно (Scheduler.reschedule_batch) и
+записывается одной транзакцией. После каждой пачки в файл контрольной точки
+записывается последний обработанный id, поэтому прерванный пересчет
+продолжается с места остановки. В режиме dry_run база и контрольная точка не
+меняются, считается только статистика расхождений.
+"""
+import json
+import os
+from dataclasses import dataclass, asdict
+from datetime import date, datetime
+from typing import Callable, Optional
+import numpy as np
+from sqlalchemy import Integer, select, update, bindparam, type_coerce
+from .models import SpacedRepetition
+from .scheduling import BATCH_FIELDS, Scheduler
+
+@dataclass
+class RescheduleStats:
+    """Статистика пересчета"""
+    scanned: int = 0
+    changed: int = 0
+    longer: int = 0
+    shorter: int = 0
+    total_delta_days: int = 0
+    due_before: int = 0
+    due_after: int = 0
+    last_id: int = 0
+
+    @property
+    def mean_delta_days(self) -> float:
+        return self.total_delta_days / self.changed if self.changed else 0.0
+
+    def as_dict(self) -> dict:
+        return {**asdict(self), 'mean_delta_days': round(self.mean_delta_days, 2)}
+
+def _load_checkpoint(path: str, scheduler_name: str) -> int:
+    """Последний обработанный id из контрольной точки (0 - начать сначала)"""
+    if not path or not os.path.exists(path):
+        return 0
+    with open(path, encoding='utf-8') as f:
+        checkpoint = json.load(f)
+    if checkpoint['scheduler'] != scheduler_name:
+        raise ValueError(
+            f"Контрольная точка создана для алгоритма {checkpoint['scheduler']}, "
+            f"а пересчет запущен для {scheduler_name}"
+        )
+    return checkpoint['last_id']
+
+def _save_checkpoint(path: str, scheduler_name: str, last_id: int):
+    """Атомарная запись контрольной точки"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({'scheduler': scheduler_name, 'last_id': last_id}, f)
+    os.replace(tmp_path, path)
+
+def _read_chunk(connection, after_id: int, chunk_size: int):
+    """Пачка карточек с id > after_id в виде массивов (даты - номера дней)"""
+    columns = SpacedRepetition.__table__.c
+    rows = connection.execute(
+        select(
+            columns.id,
+            *(type_coerce(columns[field], Integer) if field.endswith('_date') else columns[field]
+              for field in BATCH_FIELDS + ('next_review_date',))
+        )
+        .where(columns.id > after_id)
+        .order_by(columns.id)
+        .limit(chunk_size)
+    ).all()
+    if not rows:
+        return None
+    ids, *values = zip(*rows)
+    chunk = {
+        field: np.array([0 if value is None else value for value in column])
+        for field, column in zip(BATCH_FIELDS + ('next_review_date',), values)
+    }
+    chunk['id'] = np.array(ids, dtype=np.int64)
+    return chunk
+
+def reschedule_cards(engine, scheduler: Scheduler, chunk_size: int = 10000, dry_run: bool = False,
+                     checkpoint_path: Optional[str] = None, today: Optional[date] = None,
+                     progress: Optional[Callable[[RescheduleStats], None]] = None) -> RescheduleStats:
+    """Пересчет interval_days, ease_factor и next_review_date всех карточек
+
+    Возвращает статистику расхождений между старым и новым расписанием.
+    После успешного завершения контрольная точка удаляется.
+    """
+    today = (today or datetime.now().date()).toordinal()
+    stats = RescheduleStats()
+    last_id = 0 if dry_run else _load_checkpoint(checkpoint_path, scheduler.name)
+    stats.last_id = last_id
+
+    table = SpacedRepetition.__table__
+    statement = (
+        update(table)
+        .where(table.c.id == bindparam('card_id'))
+        .values(
+            interval_days=bindparam('new_interval'),
+            ease_factor=bindparam('new_ease'),
+            next_review_date=bindparam('new_next_review', type_=Integer),
+        )
+    )
+
+    while True:
+        with engine.begin() as connection:
+            chunk = _read_chunk(connection, last_id, chunk_size)
+            if chunk is None:
+                break
+            result = scheduler.reschedule_batch(chunk)
+
+            interval_delta = result['interval_days'] - chunk['interval_days']
+            changed = (
+                (interval_delta != 0)
+                | (result['next_review_date'] != chunk['next_review_date'])
+                | ~np.isclose(result['ease_factor'], chunk['ease_factor'].astype(float))
+            )
+            stats.scanned += len(chunk['id'])
+            stats.changed += int(changed.sum())
+            stats.longer += int((interval_delta > 0).sum())
+            stats.shorter += int((interval_delta < 0).sum())
+            stats.total_delta_days += int(interval_delta[changed].sum())
+            stats.due_before += int((chunk['next_review_date'] <= today).sum())
+            stats.due_after += int((result['next_review_date'] <= today).sum())
+
+            if not dry_run and changed.any():
+                connection.execute(statement, [
+                    {
+                        'card_id': int(card_id),
+                        'new_interval': int(interval),
+                        'new_ease': float(ease),
+                        'new_next_review': int(next_review),
+                    }
+                    for card_id, interval, ease, next_review in zip(
+                        chunk['id'][changed], result['interval_days'][changed],
+                        result['ease_factor'][changed], result['next_review_date'][changed]
+                    )
+                ])
+
+        last_id = int(chunk['id'][-1])
+        stats.last_id = last_id
+        if checkpoint_path and not dry_run:
+            _save_checkpoint(checkpoint_path, scheduler.name, last_id)
+        if progress:
+            progress(stats)
+
+    if checkpoint_path and not dry_run and os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+    return stats
@@ -0,0 +1,315 @@
+"""Алгоритмы интервального повторения
+
+Каждый планировщик умеет две вещи:
+- schedule() - пересчет одной карточки (словарь) после ответа, без NumPy;
+- schedule_batch() - тот же расчет для массивов карточек (NumPy), нужен для
+  массового пересчета расписаний.
+
+Оба пути дают одинаковый результат. Даты в пакетном режиме передаются
+порядковыми номерами дней (date.toordinal()), 0 - повторений еще не было.
+"""
+import math
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from . import config
+
+EASE_MIN = 1.3
+EASE_MAX = 2.5
+MAX_INTERVAL_DAYS = 36500
+
+# Поля пакета карточек, которые нужны для пересчета
+BATCH_FIELDS = (
+    'interval_days', 'ease_factor', 'consecutive_correct',
+    'consecutive_incorrect', 'total_reviews', 'last_review_date'
+)
+
+class Scheduler:
+    """Базовый планировщик: счетчики карточки общие, интервал и ease - у наследников"""
+    name = None
+
+    def _step(self, card: Dict, is_correct: bool, elapsed: int) -> Tuple[int, float]:
+        """Новый интервал и ease factor для одной карточки (состояние до ответа)"""
+        raise NotImplementedError
+
+    def _step_batch(self, cards: Dict[str, np.ndarray], is_correct: np.ndarray,
+                    elapsed: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Новые интервалы и ease factor для массивов карточек"""
+        raise NotImplementedError
+
+    def schedule(self, card: Dict, is_correct: bool, today: Optional[date] = None) -> Dict:
+        """Новое состояние карточки после ответа"""
+        today = today or datetime.now().date()
+        last_review = card.get('last_review_date')
+        elapsed = (today - last_review).days if last_review else card['interval_days']
+        interval, ease = self._step(card, is_correct, max(elapsed, 0))
+
+        card = dict(card)
+        if is_correct:
+            card['consecutive_correct'] += 1
+            card['consecutive_incorrect'] = 0
+        else:
+            card['consecutive_incorrect'] += 1
+            card['consecutive_correct'] = 0
+        card['total_reviews'] += 1
+        card['last_review_date'] = today
+        card['interval_days'] = interval
+        card['ease_factor'] = ease
+        card['next_review_date'] = today + timedelta(days=interval)
+        return card
+
+    def schedule_batch(self, cards: Dict[str, np.ndarray], is_correct: np.ndarray,
+                       today: Optional[date] = None) -> Dict[str, np.ndarray]:
+        """Новое состояние массивов карточек после ответов"""
+        today = (today or datetime.now().date()).toordinal()
+        is_correct = np.asarray(is_correct, dtype=bool)
+        cards = {field: np.asarray(cards[field]) for field in BATCH_FIELDS}
+
+        last_review = cards['last_review_date'].astype(np.int64)
+        elapsed = np.where(last_review > 0, today - last_review, cards['interval_days'])
+        interval, ease = self._step_batch(cards, is_correct, np.maximum(elapsed, 0))
+
+        return {
+            'interval_days': interval,
+            'ease_factor': ease,
+            'consecutive_correct': np.where(is_correct, cards['consecutive_correct'] + 1, 0),
+            'consecutive_incorrect': np.where(is_correct, 0, cards['consecutive_incorrect'] + 1),
+            'total_reviews': cards['total_reviews'] + 1,
+            'last_review_date': np.full(len(is_correct), today, dtype=np.int64),
+            'next_review_date': today + interval,
+        }
+
+    def predict_interval(self, card: Dict, is_correct: bool, today: Optional[date] = None) -> int:
+        """Интервал, который получит карточка при таком ответе"""
+        return self.schedule(card, is_correct, today)['interval_days']
+
+    def preview(self, correct_answers: int = 5) -> Tuple[List[int], int]:
+        """Интервалы новой карточки после серии верных ответов (каждый - вовремя)
+        и интервал после неверного ответа в конце серии"""
+        today = date.today()
+        card = {
+            'interval_days': 1, 'ease_factor': EASE_MAX, 'consecutive_correct': 0,
+            'consecutive_incorrect': 0, 'total_reviews': 0, 'last_review_date': None
+        }
+        intervals = []
+        for _ in range(correct_answers):
+            card = self.schedule(card, True, today)
+            intervals.append(card['interval_days'])
+            today = card['next_review_date']
+        return intervals, self.predict_interval(card, False, today)
+
+    def reschedule(self, card: Dict) -> Dict:
+        """Расписание, которое этот алгоритм дал бы карточке с ее текущей серией ответов
+
+        Истории ответов в базе нет, поэтому текущая серия верных ответов
+        проигрывается заново с новой карточки (каждое повторение - вовремя),
+        а ease factor карточки сохраняется и только приводится к [1.3, 2.5].
+        Результат зависит только от состояния карточки, повторный пересчет
+        ничего не меняет. Карточки без повторений не трогаются.
+        """
+        card = dict(card)
+        card['ease_factor'] = min(EASE_MAX, max(EASE_MIN, card['ease_factor']))
+        if not card['total_reviews'] or not card['last_review_date']:
+            return card
+
+        state = {'interval_days': 1, 'ease_factor': card['ease_factor'], 'consecutive_correct': 0, 'total_reviews': 0}
+        interval, _ = self._step(state, False, 0)
+        for streak in range(card['consecutive_correct']):
+            interval, _ = self._step(state, True, state['interval_days'])
+            state.update(interval_days=interval, consecutive_correct=streak + 1, total_reviews=streak + 1)
+
+        card['interval_days'] = interval
+        card['next_review_date'] = card['last_review_date'] + timedelta(days=interval)
+        return card
+
+    def reschedule_batch(self, cards: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+        """Векторный вариант reschedule(): interval_days, ease_factor и next_review_date"""
+        cards = {field: np.asarray(cards[field]) for field in BATCH_FIELDS + ('next_review_date',)}
+        count = len(cards['interval_days'])
+        ease = np.clip(cards['ease_factor'].astype(float), EASE_MIN, EASE_MAX)
+        streak = cards['consecutive_correct']
+
+        state = {
+            'interval_days': np.ones(count, dtype=np.int64),
+            'ease_factor': ease,
+            'consecutive_correct': np.zeros(count, dtype=np.int64),
+            'total_reviews': np.zeros(count, dtype=np.int64),
+        }
+        interval, _ = self._step_batch(state, np.zeros(count, dtype=bool), state['interval_days'])
+        # Шаг за шагом проигрываем серии всех карточек; короткие серии перестают меняться
+        for step in range(int(streak.max(initial=0))):
+            stepped, _ = self._step_batch(state, np.ones(count, dtype=bool), state['interval_days'])
+            active = streak > step
+            interval = np.where(active, stepped, interval)
+            state['interval_days'] = np.where(active, stepped, state['interval_days'])
+            state['consecutive_correct'] = state['total_reviews'] = np.full(count, step + 1, dtype=np.int64)
+
+        last_review = cards['last_review_date'].astype(np.int64)
+        reviewed = (cards['total_reviews'] > 0) & (last_review > 0)
+        interval = np.where(reviewed, interval, cards['interval_days']).astype(np.int64)
+        return {
+            'interval_days': interval,
+            'ease_factor': ease,
+            'next_review_date': np.where(reviewed, last_review + interval, cards['next_review_date']).astype(np.int64),
+        }
+
+class LadderScheduler(Scheduler):
+    """Исходная лестница интервалов бота: 3, 7, затем +7 дней за каждый верный ответ"""
+    name = 'ladder'
+
+    def _step(self, card, is_correct, elapsed):
+        if not is_correct:
+            return 1, max(EASE_MIN, card['ease_factor'] - 0.2)
+        streak = card['consecutive_correct'] + 1
+        if streak == 1:
+            interval = 3
+        else:
+            interval = 7 + (streak - 2) * 7
+        return interval, min(EASE_MAX, card['ease_factor'] + 0.1)
+
+    def _step_batch(self, cards, is_correct, elapsed):
+        streak = cards['consecutive_correct'] + 1
+        interval = np.where(is_correct, np.where(streak == 1, 3, 7 + (streak - 2) * 7), 1)
+        ease = np.where(
+            is_correct,
+            np.minimum(EASE_MAX, cards['ease_factor'] + 0.1),
+            np.maximum(EASE_MIN, cards['ease_factor'] - 0.2)
+        )
+        return interval.astype(np.int64), ease
+
+class SM2Scheduler(Scheduler):
+    """SM-2 (SuperMemo): 1, 6, затем предыдущий интервал * ease factor
+
+    Верный ответ считается оценкой 5, неверный - оценкой 2.
+    """
+    name = 'sm2'
+
+    def __init__(self, correct_quality: int = 5, incorrect_quality: int = 2):
+        self.correct_quality = correct_quality
+        self.incorrect_quality = incorrect_quality
+
+    @staticmethod
+    def _ease_delta(quality: int) -> float:
+        return 0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02)
+
+    def _step(self, card, is_correct, elapsed):
+        quality = self.correct_quality if is_correct else self.incorrect_quality
+        ease = max(EASE_MIN, card['ease_factor'] + self._ease_delta(quality))
+        if not is_correct:
+            return 1, ease
+        repetition = card['consecutive_correct']
+        if repetition == 0:
+            interval = 1
+        elif repetition == 1:
+            interval = 6
+        else:
+            interval = min(MAX_INTERVAL_DAYS, round(card['interval_days'] * card['ease_factor']))
+        return interval, ease
+
+    def _step_batch(self, cards, is_correct, elapsed):
+        delta = np.where(
+            is_correct,
+            self._ease_delta(self.correct_quality),
+            self._ease_delta(self.incorrect_quality)
+        )
+        ease = np.maximum(EASE_MIN, cards['ease_factor'] + delta)
+        repetition = cards['consecutive_correct']
+        grown = np.minimum(MAX_INTERVAL_DAYS, np.rint(cards['interval_days'] * cards['ease_factor']))
+        interval = np.where(repetition == 0, 1, np.where(repetition == 1, 6, grown))
+        return np.where(is_correct, interval, 1).astype(np.int64), ease
+
+class FSRSScheduler(Scheduler):
+    """Планировщик в стиле FSRS (степенная кривая забывания, стабильность и сложность)
+
+    Отдельных колонок для стабильности и сложности нет, поэтому они
+    восстанавливаются из карточки: стабильность - текущий интервал (при
+    целевой вероятности вспомнить 0.9 интервал равен стабильности), сложность
+    (1..10) - линейное отображение ease_factor (2.5 -> 1, 1.3 -> 10).
+    Верный ответ считается оценкой Good, неверный - Again.
+    """
+    name = 'fsrs'
+
+    # Веса FSRS v4 по умолчанию
+    WEIGHTS = (0.4, 0.6, 2.4, 5.8, 4.93, 0.94, 0.86, 0.01, 1.49, 0.14, 0.94,
+               2.18, 0.05, 0.34, 1.26, 0.29, 2.61)
+
+    def __init__(self, request_retention: float = 0.9, weights: Tuple[float, ...] = WEIGHTS):
+        self.request_retention = request_retention
+        self.w = weights
+        self._interval_factor = 9 * (1 / request_retention - 1)
+
+    def _initial_difficulty(self, grade):
+        return self.w[4] - (grade - 3) * self.w[5]
+
+    @staticmethod
+    def _difficulty_from_ease(ease):
+        # У SM-2 ease не ограничен сверху: после смены алгоритма ease > EASE_MAX
+        # дал бы отрицательную сложность (и комплексную степень), поэтому 1..10
+        difficulty = 1 + (EASE_MAX - ease) / (EASE_MAX - EASE_MIN) * 9
+        if isinstance(difficulty, np.ndarray):
+            return np.clip(difficulty, 1.0, 10.0)
+        return min(10.0, max(1.0, difficulty))
+
+    @staticmethod
+    def _ease_from_difficulty(difficulty):
+        return EASE_MAX - (difficulty - 1) / 9 * (EASE_MAX - EASE_MIN)
+
+    def _step(self, card, is_correct, elapsed):
+        w = self.w
+        grade = 3 if is_correct else 1
+        if card['total_reviews'] == 0:
+            stability = w[2] if is_correct else w[0]
+            difficulty = self._initial_difficulty(grade)
+        else:
+            old_stability = max(card['interval_days'], 0.1)
+            old_difficulty = self._difficulty_from_ease(card['ease_factor'])
+            retrievability = (1 + elapsed / (9 * old_stability)) ** -1
+            if is_correct:
+                stability = old_stability * (1 + math.exp(w[8]) * (11 - old_difficulty)
+                                             * old_stability ** -w[9]
+                                             * (math.exp(w[10] * (1 - retrievability)) - 1))
+            else:
+                stability = min(old_stability, w[11] * old_difficulty ** -w[12]
+                                * ((old_stability + 1) ** w[13] - 1)
+                                * math.exp(w[14] * (1 - retrievability)))
+            difficulty = old_difficulty - w[6] * (grade - 3)
+            difficulty = w[7] * self._initial_difficulty(3) + (1 - w[7]) * difficulty
+        difficulty = min(10.0, max(1.0, difficulty))
+        interval = min(MAX_INTERVAL_DAYS, max(1, round(stability * self._interval_factor)))
+        return interval, self._ease_from_difficulty(difficulty)
+
+    def _step_batch(self, cards, is_correct, elapsed):
+        w = self.w
+        grade = np.where(is_correct, 3, 1)
+        old_stability = np.maximum(cards['interval_days'], 0.1)
+        old_difficulty = self._difficulty_from_ease(cards['ease_factor'])
+        retrievability = (1 + elapsed / (9 * old_stability)) ** -1
+
+        recall = old_stability * (1 + np.exp(w[8]) * (11 - old_difficulty)
+                                  * old_stability ** -w[9]
+                                  * (np.exp(w[10] * (1 - retrievability)) - 1))
+        forget = np.minimum(old_stability, w[11] * old_difficulty ** -w[12]
+                            * ((old_stability + 1) ** w[13] - 1)
+                            * np.exp(w[14] * (1 - retrievability)))
+        difficulty = old_difficulty - w[6] * (grade - 3)
+        difficulty = w[7] * self._initial_difficulty(3) + (1 - w[7]) * difficulty
+
+        first = cards['total_reviews'] == 0
+        stability = np.where(first, np.where(is_correct, w[2], w[0]),
+                             np.where(is_correct, recall, forget))
+        difficulty = np.where(first, self._initial_difficulty(grade), difficulty)
+        difficulty = np.clip(difficulty, 1.0, 10.0)
+        interval = np.clip(np.rint(stability * self._interval_factor), 1, MAX_INTERVAL_DAYS)
+        return interval.astype(np.int64), self._ease_from_difficulty(difficulty)
+
+SCHEDULERS = {cls.name: cls for cls in (LadderScheduler, SM2Scheduler, FSRSScheduler)}
+
+def get_scheduler(name: Optional[str] = None) -> Scheduler:
+    """Планировщик по имени (по умолчанию - из config.SCHEDULER)"""
+    name = (name or config.SCHEDULER).lower()
+    if name not in SCHEDULERS:
+        raise ValueError(f"Неизвестный алгоритм повторения: {name}")
+    return SCHEDULERS[name]()
+
+# Планировщик, которым пользуется бот
+scheduler = get_scheduler()
@@ -0,0 +1,161 @@
+"""Отложенная запись результатов повторения (write-behind)
+
+Ответ на /review_test сразу применяется к карточке в памяти (overlay), а в
+SQLite изменения попадают пачками одной транзакцией: когда накопилось
+max_batch карточек или прошло flush_interval секунд. Чтения асинхронного
+слоя (очередь повторения и статистика) учитывают overlay, поэтому
+пользователь видит свои ответы сразу.
+
+Худший случай потери данных при аварийном завершении процесса - ответы за
+последние flush_interval секунд. Пока база отвечает ошибкой, карточки
+остаются в overlay, поэтому их число ограничено max_pending: новая карточка
+сверх лимита ждет записи накопленных, а если запись не удалась, ответ
+отклоняется с ошибкой. Значит, при аварии теряется не больше max_pending
+карточек. При штатной остановке close() записывает все накопленное.
+"""
+import asyncio
+import logging
+from datetime import date
+from typing import Dict, List, Optional, Set
+from sqlalchemy import update
+from .models import SpacedRepetition, SCHEDULE_FIELDS
+
+class _Entry:
+    """Карточка в overlay: состояние в базе (base) и актуальное состояние (card)"""
+    __slots__ = ('base', 'card')
+    
+    def __init__(self, base: Dict, card: Dict):
+        self.base = base
+        self.card = card
+
+class ReviewWriteBuffer:
+    """Overlay карточек интервального повторения с пакетной записью в базу"""
+    
+    def __init__(self, session_factory, max_batch: int = 500, flush_interval: float = 1.0,
+                 max_pending: Optional[int] = None):
+        self._session_factory = session_factory
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self.max_pending = max(max_pending or 4 * max_batch, max_batch)
+        self._pending: Dict[int, _Entry] = {}
+        self._by_user: Dict[int, Set[int]] = {}
+        self._wakeup = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._closed = False
+        self.flushes = 0
+        self.flushed_cards = 0
+    
+    def __len__(self) -> int:
+        return len(self._pending)
+    
+    def get(self, card_id: int) -> Optional[Dict]:
+        """Актуальное состояние карточки из overlay"""
+        entry = self._pending.get(card_id)
+        return dict(entry.card) if entry else None
+    
+    async def record(self, base: Dict, card: Dict):
+        """Сохранение нового состояния карточки
+
+        base - состояние, которое сейчас лежит в базе (используется, только если
+        карточки еще нет в overlay). Новая карточка при заполненном overlay ждет
+        записи накопленных; ошибка записи передается вызывающему.
+        """
+        while card['id'] not in self._pending and len(self._pending) >= self.max_pending:
+            await self.flush()
+        entry = self._pending.get(card['id'])
+        self._pending[card['id']] = _Entry(entry.base if entry else base, card)
+        self._by_user.setdefault(card['user_id'], set()).add(card['id'])
+        if len(self._pending) >= self.max_batch:
+            self._wakeup.set()
+    
+    def pending_for_user(self, user_id: int) -> List[Dict]:
+        """Карточки пользователя, еще не записанные в базу"""
+        return [self._pending[card_id].card for card_id in self._by_user.get(user_id, ())]
+    
+    def merge_review_queue(self, user_id: int, rows: List[Dict], limit: int, today: date) -> List[Dict]:
+        """Наложение overlay на очередь повторения, прочитанную из базы"""
+        card_ids = self._by_user.get(user_id)
+        if not card_ids:
+            return rows[:limit]
+        merged = []
+        for row in rows:
+            entry = self._pending.get(row['id'])
+            if entry:
+                if entry.card['next_review_date'] > today:
+                    continue
+                row = {**row, **{field: entry.card[field] for field in SCHEDULE_FIELDS if field in row}}
+            merged.append(row)
+        return merged[:limit]
+    
+    def adjust_stats(self, user_id: int, stats: Dict, today: date) -> Dict:
+        """Поправка агрегированной статистики на карточки из overlay"""
+        card_ids = self._by_user.get(user_id)
+        if not card_ids or not stats['total_words']:
+            return stats
+        stats = dict(stats)
+        ease_delta = 0.0
+        for card_id in card_ids:
+            entry = self._pending[card_id]
+            stats['due_today'] += (entry.card['next_review_date'] <= today) - (entry.base['next_review_date'] <= today)
+            stats['total_reviews'] += entry.card['total_reviews'] - entry.base['total_reviews']
+            ease_delta += entry.card['ease_factor'] - entry.base['ease_factor']
+        stats['avg_ease_factor'] += ease_delta / stats['total_words']
+        return stats
+    
+    def adjust_due_count(self, user_id: int, due: int, today: date) -> int:
+        """Поправка количества слов к повторению на карточки из overlay"""
+        for card_id in self._by_user.get(user_id, ()):
+            entry = self._pending[card_id]
+            due += (entry.card['next_review_date'] <= today) - (entry.base['next_review_date'] <= today)
+        return due
+    
+    async def flush(self) -> int:
+        """Запись накопленных карточек одной транзакцией"""
+        async with self._flush_lock:
+            snapshot = dict(self._pending)
+            if not snapshot:
+                return 0
+            
+            rows = [
+                {'id': card_id, **{field: entry.card[field] for field in SCHEDULE_FIELDS}}
+                for card_id, entry in snapshot.items()
+            ]
+            async with self._session_factory() as session:
+                await session.execute(update(SpacedRepetition), rows)
+                await session.commit()
+            
+            # Удаляем записанное; карточки, измененные во время записи, остаются
+            for card_id, entry in snapshot.items():
+                current = self._pending.get(card_id)
+                if current is entry:
+                    del self._pending[card_id]
+                    user_cards = self._by_user.get(entry.card['user_id'])
+                    if user_cards is not None:
+                        user_cards.discard(card_id)
+                        if not user_cards:
+                            del self._by_user[entry.card['user_id']]
+                elif current is not None:
+                    current.base = entry.card
+            
+            self.flushes += 1
+            self.flushed_cards += len(rows)
+            return len(rows)
+    
+    async def run(self):
+        """Фоновая запись по таймеру или по заполнению пачки"""
+        while not self._closed:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception:
+                logging.exception("Не удалось записать результаты повторения, повтор через %.1f с", self.flush_interval)
+    
+    async def close(self):
+        """Остановка с записью всех накопленных карточек"""
+        self._closed = True
+        self._wakeup.set()
+        await self.flush()
@@ -0,0 +1,86 @@
+"""
+Заглушки для тестов: сессия Telegram API без сети, апдейты и управляемые часы
+
+Используются тестами и нагрузочным тестом (benchmarks/load_test.py), чтобы
+прогонять апдейты через Dispatcher.feed_update без обращения к Telegram.
+"""
+
+import asyncio
+import time
+from typing import Dict, List, Optional
+from aiogram.client.session.base import BaseSession
+from aiogram.methods import SendMessage, EditMessageText
+from aiogram.types import Update, Message, Chat
+
+class StubSession(BaseSession):
+    """Сессия Telegram API без сети: ответ через latency секунд
+
+    Запоминает вызовы API (calls, если keep_calls) и последнюю клавиатуру
+    в каждом чате, чтобы пользователь мог нажать на кнопку.
+    """
+
+    def __init__(self, latency: float = 0.0, keep_calls: bool = True):
+        super().__init__()
+        self.latency = latency
+        self.keep_calls = keep_calls
+        self.calls = []
+        self.requests = 0
+        self.keyboards: Dict[int, List[str]] = {}
+        self._message_ids = 0
+
+    async def make_request(self, bot, method, timeout=None):
+        self.requests += 1
+        if self.keep_calls:
+            self.calls.append(method)
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if isinstance(method, (SendMessage, EditMessageText)):
+            markup = method.reply_markup
+            self.keyboards[method.chat_id] = [
+                button.callback_data for row in markup.inline_keyboard for button in row
+            ] if markup is not None and hasattr(markup, 'inline_keyboard') else []
+            self._message_ids += 1
+            return Message(message_id=self._message_ids, date=int(time.time()), text=method.text,
+                           chat=Chat(id=method.chat_id or 0, type='private'))
+        return True
+
+    async def stream_content(self, *args, **kwargs):
+        yield b''
+
+    async def close(self):
+        pass
+
+def _user(user_id: int) -> Dict:
+    return {"id": user_id, "is_bot": False, "first_name": "Test"}
+
+def message_update(update_id: int, user_id: int, text: str, date: int = 1700000000) -> Update:
+    """Текстовое сообщение пользователя в личном чате"""
+    return Update.model_validate({
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id, "date": date, "text": text,
+            "chat": {"id": user_id, "type": "private"}, "from": _user(user_id)
+        }
+    })
+
+def callback_update(update_id: int, user_id: int, data: str, date: Optional[int] = None) -> Update:
+    """Нажатие на кнопку; с date - под сообщением бота в чате пользователя"""
+    callback = {
+        "id": str(update_id), "chat_instance": str(user_id), "data": data,
+        "from": _user(user_id)
+    }
+    if date is not None:
+        callback["message"] = {
+            "message_id": update_id, "date": date, "text": "...",
+            "chat": {"id": user_id, "type": "private"}
+        }
+    return Update.model_validate({"update_id": update_id, "callback_query": callback})
+
+class FakeClock:
+    """Часы, которые двигает тест"""
+
+    def __init__(self, now: float = 0.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
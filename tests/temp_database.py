@@ -0,0 +1,44 @@
+"""
+Временная база для тестов, которые добавляют слова и пользователей
+
+Модули database при импорте подключаются к DATABASE_PATH, а тесты
+выполняются в одном процессе, поэтому переменную окружения поздно менять
+в самом тесте. temporary_database() подменяет движки обоих слоев и
+каталога слов на файл во временном каталоге и восстанавливает их при
+выходе, так что тестовые слова не попадают в рабочий каталог.
+"""
+
+import asyncio
+import os
+import tempfile
+from contextlib import contextmanager
+from database import async_models, models
+from database.cache import user_cache
+from database.catalog import word_catalog
+from database.engine import create_async_sqlite_engine, create_sqlite_engine
+
+@contextmanager
+def temporary_database():
+    """Схема приложения во временном файле на время блока with"""
+    saved = models.engine, async_models.async_engine, word_catalog._bind
+    with tempfile.TemporaryDirectory(prefix='wordbot-test-') as tmp:
+        path = os.path.join(tmp, 'test.db')
+        engine = create_sqlite_engine(path)
+        async_engine = create_async_sqlite_engine(path)
+        models.engine = word_catalog._bind = engine
+        models.Session.configure(bind=engine)
+        async_models.async_engine = async_engine
+        async_models.AsyncSession.configure(bind=async_engine)
+        word_catalog.invalidate()
+        user_cache.clear()
+        try:
+            models.init_db()
+            yield engine
+        finally:
+            models.engine, async_models.async_engine, word_catalog._bind = saved
+            models.Session.configure(bind=saved[0])
+            async_models.AsyncSession.configure(bind=saved[1])
+            word_catalog.invalidate()
+            user_cache.clear()
+            asyncio.run(async_engine.dispose())
+            engine.dispose()
@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""
+Тестовый скрипт для проверки асинхронного слоя базы данных
+"""
+
+import asyncio
+from database import async_models
+from database.models import get_user
+
+async def _check_user_roundtrip():
+    await async_models.init_db()
+
+    test_user_id = 55555
+    if not await async_models.get_user(test_user_id):
+        await async_models.add_user(test_user_id, 'A1')
+
+    await async_models.update_user_level(test_user_id, 'B1')
+    user = await async_models.get_user(test_user_id)
+    assert user['level'] == 'B1'
+
+    before = user['test_results']['correct']
+    await async_models.update_test_results(test_user_id, True)
+    user = await async_models.get_user(test_user_id)
+    assert user['test_results']['correct'] == before + 1
+
+    # Синхронный слой видит те же данные
+    assert get_user(test_user_id)['test_results'] == user['test_results']
+
+    stats = await async_models.get_spaced_repetition_stats(test_user_id)
+    assert stats['due_today'] == await async_models.get_due_words_count(test_user_id)
+
+    await async_models.close_db()
+
+def test_async_user_roundtrip():
+    """Тестирование асинхронных функций работы с пользователем"""
+    print("⚡ Тестирование асинхронного слоя БД...")
+    asyncio.run(_check_user_roundtrip())
+    print("✅ Асинхронный слой БД работает корректно")
+
+if __name__ == "__main__":
+    test_async_user_roundtrip()
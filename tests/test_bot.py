@@ -5,7 +5,7 @@
 
 from database.models import init_db, get_words_by_level, get_user, add_user
 import sqlite3
-from config import DATABASE_PATH
+from database.config import DATABASE_PATH
 
 def test_database():
     """Тестирование базы данных"""
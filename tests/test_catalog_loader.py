@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Тестовый скрипт для проверки пакетной идемпотентной загрузки каталога слов
+"""
+
+from sqlalchemy import create_engine, text
+from database.models import Base, load_catalog
+from database.migrations import run_migrations
+
+CATALOG = [
+    ("hello", "[həˈloʊ]", "привет", "Hello, how are you?", "A1"),
+    ("water", "[ˈwɔːtər]", "вода", "I need some water.", "A1"),
+    ("water", "[ˈwɔːtər]", "вода", "Water is wet.", "A2"),
+]
+
+def _database():
+    engine = create_engine('sqlite://')
+    Base.metadata.create_all(engine)
+    with engine.begin() as connection:
+        run_migrations(connection)
+    return engine
+
+def _version(engine) -> int:
+    with engine.connect() as connection:
+        return connection.execute(text("SELECT version FROM catalog_version")).scalar()
+
+def test_load_catalog():
+    """Тестирование счетчиков загрузки и отсутствия дубликатов при повторе"""
+    print("📦 Тестирование загрузки каталога...")
+    engine = _database()
+
+    assert load_catalog(CATALOG, bind=engine) == {'inserted': 3, 'updated': 0, 'unchanged': 0}
+    version = _version(engine)
+
+    # Повторная загрузка ничего не меняет, даже счетчик версии каталога
+    assert load_catalog(CATALOG, bind=engine) == {'inserted': 0, 'updated': 0, 'unchanged': 3}
+    assert _version(engine) == version
+
+    changed = CATALOG[:2] + [
+        ("water", "[ˈwɔːtə]", "вода", "Water is wet.", "A2"),
+        ("house", "[haʊs]", "дом", "This is my house.", "A1"),
+        # Повтор ключа во входных данных: побеждает последняя запись
+        ("house", "[haʊs]", "дом", "My house is small.", "A1"),
+    ]
+    assert load_catalog(changed, batch_size=1, bind=engine) == {'inserted': 1, 'updated': 1, 'unchanged': 2}
+
+    with engine.connect() as connection:
+        rows = connection.execute(text(
+            "SELECT word, level, transcription, example FROM words ORDER BY word_id"
+        )).all()
+    assert [tuple(row) for row in rows] == [
+        ("hello", "A1", "[həˈloʊ]", "Hello, how are you?"),
+        ("water", "A1", "[ˈwɔːtər]", "I need some water."),
+        ("water", "A2", "[ˈwɔːtə]", "Water is wet."),
+        ("house", "A1", "[haʊs]", "My house is small."),
+    ]
+    print("✅ Каталог загружается без дубликатов")
+
+if __name__ == "__main__":
+    test_load_catalog()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Тестовый скрипт для проверки выбора неправильных вариантов ответа
+"""
+
+import random
+from sqlalchemy import create_engine
+from sqlalchemy.pool import StaticPool
+from database.models import Base, Session, Word
+from database.migrations import run_migrations
+from database.catalog import WordCatalog
+from bot.distractors import DistractorPool
+
+WORDS = [
+    ("sorry", "извините", "A1"),
+    ("excuse me", "извините", "A1"),
+    ("water", "вода", "A1"),
+    ("food", "еда", "A1"),
+    ("house", "дом", "A1"),
+    ("car", "машина", "A1"),
+    ("achieve", "достигать", "B1"),
+]
+
+def _catalog() -> WordCatalog:
+    """Каталог на базе данных в памяти"""
+    engine = create_engine('sqlite://', poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    with engine.begin() as connection:
+        run_migrations(connection)
+    session = Session(bind=engine)
+    for word, translation, level in WORDS:
+        session.add(Word(word=word, transcription="-", translation=translation, example="-", level=level))
+    session.commit()
+    session.close()
+    return WordCatalog(bind=engine)
+
+def test_distinct_distractors():
+    """Тестирование уникальности вариантов"""
+    print("🎲 Тестирование неправильных вариантов ответа...")
+    
+    pool = DistractorPool(_catalog(), random.Random(1))
+    
+    for _ in range(200):
+        options = pool.sample('A1', "вода", 3)
+        translations = [option['translation'] for option in options]
+        assert len(options) == 3
+        assert "вода" not in translations
+        assert len(set(translations)) == 3
+    
+    # Правильный ответ "извините" не должен появиться и через второе слово с тем же переводом
+    for _ in range(200):
+        options = pool.sample('A1', "извините", 3)
+        assert all(option['translation'] != "извините" for option in options)
+    
+    print("✅ Варианты различны и не совпадают с правильным ответом")
+
+def test_small_level_fallback():
+    """Тестирование добора вариантов из других уровней"""
+    print("🎲 Тестирование маленького уровня...")
+    
+    pool = DistractorPool(_catalog(), random.Random(2))
+    options = pool.sample('B1', "достигать", 3)
+    translations = [option['translation'] for option in options]
+    
+    assert len(options) == 3
+    assert len(set(translations)) == 3 and "достигать" not in translations
+    print("✅ Варианты добираются из других уровней")
+
+if __name__ == "__main__":
+    test_distinct_distractors()
+    test_small_level_fallback()
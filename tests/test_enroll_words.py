@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Тестовый скрипт для проверки пакетного добавления слов (/words)
+"""
+
+from database.models import (
+    init_db, add_user, add_word, get_user, get_words_by_level, enroll_words,
+    get_spaced_repetition_stats
+)
+
+def test_enroll_words():
+    """Тестирование пакетного добавления слов одной транзакцией"""
+    print("📚 Тестирование пакетного добавления слов...")
+    
+    # Инициализация БД
+    init_db()
+    
+    if not get_words_by_level('A1', 5):
+        for i in range(5):
+            add_word(f"enroll{i}", "[-]", f"перевод{i}", "Example.", 'A1')
+    
+    # Создаем тестового пользователя
+    test_user_id = 44444
+    if not get_user(test_user_id):
+        add_user(test_user_id, 'A1')
+    
+    words = get_words_by_level('A1', 5)
+    before = get_spaced_repetition_stats(test_user_id)['total_words']
+    
+    added = enroll_words(test_user_id, words)
+    print(f"   Добавлено при первом вызове: {len(added)}")
+    
+    # Повторный вызов не падает на уникальном ограничении и ничего не добавляет
+    assert enroll_words(test_user_id, words) == []
+    
+    stats = get_spaced_repetition_stats(test_user_id)
+    assert stats['total_words'] == before + len(added)
+    assert stats['total_words'] >= len(words)
+    
+    words_learned = get_user(test_user_id, with_words=True)['words_learned']
+    for word in words:
+        assert words_learned.count(word['word']) == 1
+    
+    print("✅ Пакетное добавление слов работает корректно")
+
+if __name__ == "__main__":
+    test_enroll_words()
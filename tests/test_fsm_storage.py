@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Тестовый скрипт для проверки хранилища FSM в SQLite
+"""
+
+import asyncio
+from aiogram.fsm.context import FSMContext
+from aiogram.fsm.storage.base import StorageKey
+from sqlalchemy import select, func
+from bot.start import UserLevel
+from bot.storage import SQLiteStorage
+from database import async_models
+from database.models import FSMRecord
+
+async def _rows() -> int:
+    async with async_models.AsyncSession() as session:
+        return await session.scalar(select(func.count()).select_from(FSMRecord).where(FSMRecord.key.like('42:%')))
+
+async def _check_storage():
+    await async_models.init_db()
+    storage = SQLiteStorage(async_models.AsyncSession, maxsize=2, flush_interval=60, max_batch=100)
+    keys = [StorageKey(bot_id=42, chat_id=user_id, user_id=user_id) for user_id in range(1, 5)]
+
+    # Запись попадает в кэш, в базу - только при flush
+    state = FSMContext(storage, keys[0])
+    await state.set_state(UserLevel.waiting_for_level)
+    await state.update_data(step=1, word='привет')
+    assert await state.get_state() == UserLevel.waiting_for_level.state
+    assert await _rows() == 0
+
+    # Измененные ключи не вытесняются, а их не больше maxsize:
+    # третий ключ сначала ждет записи двух накопленных
+    await storage.set_state(keys[1], UserLevel.waiting_for_level)
+    assert len(storage._cache) == 2 and await _rows() == 0
+    await storage.set_state(keys[2], UserLevel.waiting_for_level)
+    assert await _rows() == 2
+    assert len(storage._dirty) == 1 and len(storage._cache) == 2
+    await storage.set_state(keys[3], UserLevel.waiting_for_level)
+    assert await storage.flush() == 2
+    assert await _rows() == 4
+    assert len(storage._cache) == 2
+
+    # Горячие чтения не ходят в базу
+    misses = storage.misses
+    for _ in range(10):
+        await storage.get_state(keys[3])
+    assert storage.misses == misses
+
+    # Очистка состояния удаляет строку
+    await storage.set_state(keys[3], None)
+    await storage.close()
+    assert await _rows() == 3
+
+    # "Перезапуск": новое хранилище читает сохраненное состояние
+    restarted = SQLiteStorage(async_models.AsyncSession, flush_interval=0)
+    assert await restarted.get_state(keys[0]) == UserLevel.waiting_for_level.state
+    assert await restarted.get_data(keys[0]) == {'step': 1, 'word': 'привет'}
+    assert await restarted.get_state(keys[3]) is None
+
+    # flush_interval=0 - сквозная запись: после set_state строка уже в базе,
+    # одновременные изменения пишутся общими транзакциями
+    for key in keys:
+        await FSMContext(restarted, key).clear()
+    assert await _rows() == 0
+    many = [StorageKey(bot_id=42, chat_id=100 + i, user_id=100 + i) for i in range(20)]
+    flushes = restarted.flushes
+    await asyncio.gather(*(restarted.set_state(key, UserLevel.waiting_for_level) for key in many))
+    assert await _rows() == 20
+    assert restarted.flushes - flushes < 20
+    await asyncio.gather(*(restarted.set_state(key, None) for key in many))
+    assert await _rows() == 0
+    await restarted.close()
+
+    # Если база недоступна, изменения сверх maxsize отклоняются, а не копятся в памяти
+    failing = False
+
+    def session_factory():
+        if failing:
+            raise ConnectionError("база недоступна")
+        return async_models.AsyncSession()
+
+    bounded = SQLiteStorage(session_factory, maxsize=2, flush_interval=60)
+    await bounded.set_state(keys[0], UserLevel.waiting_for_level)
+    await bounded.set_state(keys[1], UserLevel.waiting_for_level)
+    assert await bounded.get_state(keys[2]) is None
+    failing = True
+    try:
+        await bounded.set_state(keys[2], UserLevel.waiting_for_level)
+        raise AssertionError("изменение сверх maxsize должно ждать записи")
+    except ConnectionError:
+        pass
+    assert len(bounded._dirty) == 2
+    assert await bounded.get_state(keys[2]) is None
+    failing = False
+    await bounded.close()
+    assert await _rows() == 2
+    for key in keys[:2]:
+        await bounded.set_state(key, None)
+    await bounded.flush()
+    return storage.hits, storage.misses
+
+def test_sqlite_fsm_storage():
+    """Тестирование кэша, пакетной записи и восстановления состояний FSM"""
+    print("💾 Тестирование хранилища FSM...")
+    hits, misses = asyncio.run(_check_storage())
+    print(f"✅ Состояния сохраняются в SQLite (кэш: {hits} попаданий, {misses} промахов)")
+
+if __name__ == "__main__":
+    test_sqlite_fsm_storage()
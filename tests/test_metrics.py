@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Тестовый скрипт для проверки гистограмм задержек и эндпоинта /metrics
+"""
+
+import asyncio
+from aiohttp.test_utils import TestClient, TestServer
+from aiogram import Bot, Dispatcher, F, types
+from database import async_models
+from database.metrics import Histogram, HistogramFamily, MetricsRegistry, db_latency, timed
+from bot.metrics import MetricsMiddleware, create_metrics_app, handler_latency, CONTENT_TYPE
+
+def test_histogram():
+    """Тестирование корзин, квантилей и формата Prometheus"""
+    print("📊 Тестирование гистограммы...")
+    histogram = Histogram(buckets=(0.01, 0.1, 1.0))
+    for value in (0.005, 0.01, 0.05, 0.5, 3.0):
+        histogram.observe(value)
+    histogram.observe(0.2, error=True)
+
+    assert histogram.counts == [2, 1, 2, 1]
+    assert histogram.cumulative() == [2, 3, 5, 6]
+    assert histogram.count == 6 and histogram.errors == 1
+    assert histogram.quantile(0.5) == 0.1
+    assert histogram.quantile(0.99) == float('inf')
+
+    registry = MetricsRegistry()
+    family = registry.histogram('demo', "Демо", 'handler', buckets=(0.01, 0.1, 1.0))
+    family.labels('cmd_"x"').observe(0.05)
+    text = registry.expose()
+    assert '# TYPE demo_seconds histogram' in text
+    assert 'demo_seconds_bucket{handler="cmd_\\"x\\"",le="0.01"} 0' in text
+    assert 'demo_seconds_bucket{handler="cmd_\\"x\\"",le="0.1"} 1' in text
+    assert 'demo_seconds_count{handler="cmd_\\"x\\""} 1' in text
+    assert 'demo_errors_total{handler="cmd_\\"x\\""} 0' in text
+
+    # Обнуление не отвязывает гистограммы, которые уже держат декораторы
+    held = family.labels('cmd_"x"')
+    registry.reset()
+    assert family.labels('cmd_"x"') is held and held.count == 0
+    print("✅ Гистограмма работает корректно")
+
+def test_timed():
+    """Тестирование декоратора timed для обычных и async-функций"""
+    print("⏱ Тестирование timed...")
+    family = HistogramFamily('timed_test', "Тест", 'function')
+
+    @timed(family=family)
+    def double(value):
+        return value * 2
+
+    @timed(family=family, name='fails')
+    async def broken():
+        raise RuntimeError("boom")
+
+    assert double(21) == 42 and double.__name__ == 'double'
+    try:
+        asyncio.run(broken())
+        assert False, "исключение должно пробрасываться"
+    except RuntimeError:
+        pass
+
+    assert family.children['double'].count == 1
+    assert family.children['fails'].count == 1 and family.children['fails'].errors == 1
+
+    # Функции async_models измеряются под своими именами
+    assert 'get_user' in db_latency.children
+    assert async_models.get_user.__name__ == 'get_user'
+    print("✅ timed работает корректно")
+
+async def _check_middleware_and_endpoint():
+    dp = Dispatcher()
+    bot = Bot(token="123456:TEST")
+    dp.message.middleware(MetricsMiddleware())
+
+    async def cmd_ping(message: types.Message):
+        return None
+
+    async def cmd_crash(message: types.Message):
+        raise ValueError("crash")
+
+    dp.message.register(cmd_ping, F.text == "/ping")
+    dp.message.register(cmd_crash, F.text == "/crash")
+
+    def update(update_id: int, text: str) -> types.Update:
+        return types.Update.model_validate({
+            "update_id": update_id,
+            "message": {
+                "message_id": update_id, "date": 1700000000, "text": text,
+                "chat": {"id": 1, "type": "private"},
+                "from": {"id": 1, "is_bot": False, "first_name": "Test"}
+            }
+        })
+
+    before = handler_latency.labels('cmd_ping').count
+    for i in range(3):
+        await dp.feed_update(bot, update(i, "/ping"))
+    try:
+        await dp.feed_update(bot, update(10, "/crash"))
+    except ValueError:
+        pass
+    assert handler_latency.labels('cmd_ping').count == before + 3
+    assert handler_latency.labels('cmd_crash').errors >= 1
+
+    client = TestClient(TestServer(create_metrics_app()))
+    await client.start_server()
+    try:
+        response = await client.get('/metrics')
+        assert response.status == 200
+        assert response.headers['Content-Type'] == CONTENT_TYPE
+        text = await response.text()
+    finally:
+        await client.close()
+        await bot.session.close()
+
+    assert f'wordbot_handler_seconds_count{{handler="cmd_ping"}} {before + 3}' in text
+    assert 'wordbot_handler_errors_total{handler="cmd_crash"}' in text
+    assert '# TYPE wordbot_db_seconds histogram' in text
+    return text.count('\n')
+
+def test_middleware_and_endpoint():
+    """Тестирование MetricsMiddleware и выдачи метрик по HTTP"""
+    print("🌐 Тестирование MetricsMiddleware и /metrics...")
+    lines = asyncio.run(_check_middleware_and_endpoint())
+    print(f"✅ /metrics отдает {lines} строк")
+
+if __name__ == "__main__":
+    test_histogram()
+    test_timed()
+    test_middleware_and_endpoint()
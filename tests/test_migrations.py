@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+Тестовый скрипт для проверки миграций старой схемы базы данных
+"""
+
+from datetime import date
+from sqlalchemy import create_engine, text
+from database.models import Base
+from database import migrations
+from database.migrations import run_migrations, migrate_learned_words
+
+OLD_SCHEMA = [
+    """CREATE TABLE users (
+        user_id INTEGER PRIMARY KEY,
+        level VARCHAR(10) NOT NULL,
+        words_learned TEXT,
+        test_results TEXT,
+        created_at DATETIME
+    )""",
+    """CREATE TABLE words (
+        word_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        word VARCHAR(100) NOT NULL,
+        transcription VARCHAR(100) NOT NULL,
+        translation VARCHAR(200) NOT NULL,
+        example TEXT NOT NULL,
+        level VARCHAR(10) NOT NULL
+    )""",
+    """CREATE TABLE spaced_repetition (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER NOT NULL,
+        word_id INTEGER NOT NULL,
+        word VARCHAR(100) NOT NULL,
+        interval_days INTEGER,
+        next_review_date DATE NOT NULL,
+        ease_factor FLOAT,
+        consecutive_correct INTEGER,
+        consecutive_incorrect INTEGER,
+        total_reviews INTEGER,
+        last_review_date DATE,
+        created_at DATETIME,
+        UNIQUE (user_id, word_id)
+    )""",
+]
+
+def _old_database():
+    """Создание базы данных в старом формате (JSON-поля в users)"""
+    engine = create_engine('sqlite://')
+    with engine.begin() as connection:
+        for statement in OLD_SCHEMA:
+            connection.execute(text(statement))
+        for i, word in enumerate(["hello", "goodbye", "water"], 1):
+            connection.execute(text(
+                "INSERT INTO words (word_id, word, transcription, translation, example, level) "
+                "VALUES (:id, :word, '-', '-', '-', 'A1')"
+            ), {'id': i, 'word': word})
+        connection.execute(text(
+            "INSERT INTO users (user_id, level, words_learned, test_results, created_at) "
+            "VALUES (1, 'A1', :words, :results, '2024-01-01 10:00:00.000000')"
+        ), {'words': '["water", "hello", "unknown"]', 'results': '{"correct": 3, "incorrect": 2}'})
+        connection.execute(text(
+            "INSERT INTO spaced_repetition (user_id, word_id, word, interval_days, next_review_date, "
+            "ease_factor, consecutive_correct, consecutive_incorrect, total_reviews, last_review_date) "
+            "VALUES (1, 1, 'hello', 3, '2024-01-04', 2.5, 1, 0, 1, '2024-01-01')"
+        ))
+    return engine
+
+def _migrate(engine):
+    Base.metadata.create_all(engine)
+    with engine.begin() as connection:
+        run_migrations(connection)
+
+def test_migrate_learned_words():
+    """Тестирование переноса words_learned в таблицу learned_words"""
+    print("🗃 Тестирование миграции выученных слов...")
+    
+    engine = _old_database()
+    _migrate(engine)
+    # Повторный запуск ничего не меняет
+    _migrate(engine)
+    
+    with engine.connect() as connection:
+        rows = connection.execute(text(
+            "SELECT word FROM learned_words WHERE user_id = 1 ORDER BY learned_at"
+        )).scalars().all()
+        columns = [row[1] for row in connection.execute(text("PRAGMA table_info(users)"))]
+    
+    assert rows == ["water", "hello"]
+    assert 'words_learned' not in columns
+    print("✅ Миграция выученных слов прошла успешно")
+
+def test_migrate_learned_words_reports_skipped():
+    """Тестирование подсчета слов, которых нет в каталоге"""
+    print("🗃 Тестирование пропущенных слов при миграции...")
+    
+    engine = _old_database()
+    Base.metadata.create_all(engine)
+    with engine.begin() as connection:
+        # "unknown" нет в каталоге
+        assert migrate_learned_words(connection) == 1
+        assert migrate_learned_words(connection) == 0
+    print("✅ Пропущенные слова посчитаны")
+
+def test_migrate_requires_drop_column():
+    """Тестирование понятной ошибки на SQLite без DROP COLUMN"""
+    print("🗃 Тестирование проверки версии SQLite...")
+    
+    engine = _old_database()
+    saved = migrations.DROP_COLUMN_SQLITE_VERSION
+    migrations.DROP_COLUMN_SQLITE_VERSION = (99, 0, 0)
+    try:
+        _migrate(engine)
+        assert False, "миграция должна остановиться"
+    except RuntimeError as error:
+        assert 'SQLite 99.0.0' in str(error)
+    finally:
+        migrations.DROP_COLUMN_SQLITE_VERSION = saved
+    
+    # Ничего не перенесено: после обновления SQLite миграция пройдет заново
+    with engine.connect() as connection:
+        columns = [row[1] for row in connection.execute(text("PRAGMA table_info(users)"))]
+        learned = connection.execute(text("SELECT count(*) FROM learned_words")).scalar()
+    assert 'words_learned' in columns and learned == 0
+    _migrate(engine)
+    print("✅ Ошибка версии SQLite понятна")
+
+def test_migrate_test_results():
+    """Тестирование переноса test_results в целочисленные счетчики"""
+    print("🗃 Тестирование миграции результатов тестов...")
+    
+    engine = _old_database()
+    _migrate(engine)
+    _migrate(engine)
+    
+    with engine.connect() as connection:
+        row = connection.execute(text(
+            "SELECT correct_answers, incorrect_answers FROM users WHERE user_id = 1"
+        )).one()
+        columns = [row[1] for row in connection.execute(text("PRAGMA table_info(users)"))]
+    
+    assert tuple(row) == (3, 2)
+    assert 'test_results' not in columns
+    # Существующим пользователям напоминания не включаются без их согласия
+    with engine.connect() as connection:
+        hour = connection.execute(text("SELECT reminder_hour FROM users WHERE user_id = 1")).scalar()
+    assert hour is None
+    print("✅ Миграция результатов тестов прошла успешно")
+
+def test_migrate_review_day_numbers():
+    """Тестирование перевода дат повторения в номера дней"""
+    print("🗃 Тестирование миграции дат интервального повторения...")
+    
+    engine = _old_database()
+    _migrate(engine)
+    _migrate(engine)
+    
+    with engine.connect() as connection:
+        row = connection.execute(text(
+            "SELECT next_review_date, last_review_date FROM spaced_repetition WHERE user_id = 1"
+        )).one()
+        indexes = connection.execute(text(
+            "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'spaced_repetition'"
+        )).scalars().all()
+    
+    assert tuple(row) == (date(2024, 1, 4).toordinal(), date(2024, 1, 1).toordinal())
+    assert 'ix_spaced_repetition_user_due' in indexes
+    print("✅ Миграция дат интервального повторения прошла успешно")
+
+def test_migrate_word_natural_key():
+    """Тестирование удаления повторов (word, level) в каталоге слов"""
+    print("🗃 Тестирование миграции уникальности слов...")
+    
+    engine = _old_database()
+    with engine.begin() as connection:
+        # Каталог загружен дважды: hello (1) и hello (4), water (3) и water (5)
+        connection.execute(text(
+            "INSERT INTO words (word_id, word, transcription, translation, example, level) VALUES "
+            "(4, 'hello', '-', '-', '-', 'A1'), (5, 'water', '-', '-', '-', 'A1'), (6, 'water', '-', '-', '-', 'A2')"
+        ))
+        connection.execute(text(
+            "INSERT INTO spaced_repetition (user_id, word_id, word, interval_days, next_review_date) VALUES "
+            "(1, 4, 'hello', 1, '2024-01-02'), (1, 5, 'water', 1, '2024-01-02')"
+        ))
+    _migrate(engine)
+    _migrate(engine)
+    
+    with engine.connect() as connection:
+        words = connection.execute(text("SELECT word_id, word, level FROM words ORDER BY word_id")).all()
+        cards = connection.execute(text(
+            "SELECT word_id, interval_days FROM spaced_repetition WHERE user_id = 1 ORDER BY word_id"
+        )).all()
+        indexes = connection.execute(text(
+            "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'words'"
+        )).scalars().all()
+    
+    assert [tuple(row) for row in words] == [
+        (1, 'hello', 'A1'), (2, 'goodbye', 'A1'), (3, 'water', 'A1'), (6, 'water', 'A2')
+    ]
+    # Карточка hello уже была у слова 1 - дубликат удален; water перенесена на слово 3
+    assert [tuple(row) for row in cards] == [(1, 3), (3, 1)]
+    assert 'ux_words_word_level' in indexes
+    print("✅ Миграция уникальности слов прошла успешно")
+
+if __name__ == "__main__":
+    test_migrate_learned_words()
+    test_migrate_learned_words_reports_skipped()
+    test_migrate_requires_drop_column()
+    test_migrate_test_results()
+    test_migrate_review_day_numbers()
+    test_migrate_word_natural_key()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Тестовый скрипт для проверки учета SQL-запросов за апдейт
+"""
+
+import asyncio
+import logging
+from aiogram import Bot, Dispatcher
+from bot import register_all_handlers
+from bot import metrics as bot_metrics
+from bot.metrics import MetricsMiddleware, QueryAccountingMiddleware, update_queries
+from database import async_models
+from database.catalog import word_catalog
+from database.query_stats import count_queries, current_query_stats
+from stubs import StubSession, message_update
+from temp_database import temporary_database
+
+# Бюджеты запросов по командам для зарегистрированного пользователя
+# (включая загрузку профиля в UserMiddleware, если его нет в кэше)
+COMMAND_BUDGETS = {
+    "/words": 3,
+    "/stats": 3,
+    "/review": 2,
+    "/review_test": 1,
+    "/help": 0,
+}
+
+class ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+async def _check_counts():
+    for i in range(10):
+        await async_models.add_word(f"qword{i}", "[t]", f"перевод{i}", "Example.", 'A1')
+    word_catalog.load()
+
+    bot = Bot(token="123456:TEST", session=StubSession())
+    dp = Dispatcher()
+    register_all_handlers(dp)
+
+    user_id = 424242
+    await async_models.add_user(user_id, 'A1')
+
+    counts = {}
+    for update_id, (command, budget) in enumerate(COMMAND_BUDGETS.items(), 1):
+        with count_queries() as stats:
+            await dp.feed_update(bot, message_update(update_id, user_id, command))
+        counts[command] = stats.statements
+        assert stats.statements <= budget, f"{command}: {stats.statements} запросов при бюджете {budget}"
+    assert update_queries.labels('cmd_words').count >= 1
+
+    # Вне count_queries запросы никуда не учитываются
+    assert current_query_stats() is None
+    await async_models.get_due_words_count(user_id)
+
+    # В режиме отладки превышение бюджета дает предупреждение со списком запросов
+    warnings = await _budget_warnings(dp, bot, 100, user_id)
+    assert len(warnings) == 1 and 'cmd_stats' in warnings[0].getMessage()
+    assert 'SELECT' in warnings[0].getMessage()
+
+    # Без гистограмм (METRICS_ENABLED=0) учет запросов и бюджеты продолжают работать
+    bot_metrics.METRICS_ENABLED = False
+    try:
+        plain = Dispatcher()
+        register_all_handlers(plain)
+        assert not [m for m in plain.message.middleware if isinstance(m, MetricsMiddleware)]
+        observed = update_queries.labels('cmd_stats').count
+        warnings = await _budget_warnings(plain, bot, 101, user_id)
+        assert len(warnings) == 1 and 'cmd_stats' in warnings[0].getMessage()
+        assert update_queries.labels('cmd_stats').count == observed
+    finally:
+        bot_metrics.METRICS_ENABLED = True
+    await bot.session.close()
+    return counts
+
+async def _budget_warnings(dp, bot, update_id, user_id):
+    """Предупреждения о бюджете запросов при /stats с бюджетом 1"""
+    accounting, = [m for m in dp.update.outer_middleware if isinstance(m, QueryAccountingMiddleware)]
+    log = ListHandler()
+    logger = logging.getLogger('bot.metrics')
+    logger.addHandler(log)
+    accounting.budget, accounting.debug = 1, True
+    try:
+        await dp.feed_update(bot, message_update(update_id, user_id, "/stats"))
+    finally:
+        accounting.budget, accounting.debug = 5, False
+        logger.removeHandler(log)
+    return [r for r in log.records if r.levelno == logging.WARNING]
+
+def test_query_counts():
+    """Тестирование числа SQL-запросов по командам"""
+    print("🧮 Тестирование учета SQL-запросов...")
+    with temporary_database():
+        counts = asyncio.run(_check_counts())
+    for command, statements in counts.items():
+        print(f"   {command}: {statements} запросов")
+    print("✅ Команды укладываются в бюджет запросов")
+
+if __name__ == "__main__":
+    test_query_counts()
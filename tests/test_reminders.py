@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Тестовый скрипт для проверки колеса таймеров и напоминаний о повторении
+"""
+
+import asyncio
+import random
+import time as clock_time
+from datetime import date, datetime, time, timedelta
+from bot import reminders as reminders_module
+from bot.timing_wheel import TimingWheel
+from bot.reminders import ReminderScheduler
+from database import async_models
+from stubs import FakeClock
+from temp_database import temporary_database
+
+class StubBot:
+    """Бот, который только запоминает отправленные сообщения"""
+    def __init__(self):
+        self.messages = []
+
+    async def send_message(self, chat_id, text, **kwargs):
+        self.messages.append((chat_id, text))
+
+def test_timing_wheel_matches_brute_force():
+    """Колесо выдает те же таймеры, что и перебор (включая перенос между уровнями)"""
+    print("⏱️ Тестирование колеса таймеров...")
+    rnd = random.Random(5)
+    wheel = TimingWheel(tick=1.0, wheel_size=4, levels=3)
+    deadlines = {}
+    now = 0
+    fired = 0
+
+    for _ in range(3000):
+        action = rnd.random()
+        key = rnd.randint(0, 200)
+        if action < 0.5:
+            when = now + rnd.randint(0, 150)
+            wheel.schedule(key, when)
+            deadlines[key] = when
+        elif action < 0.6:
+            assert wheel.cancel(key) == (key in deadlines)
+            deadlines.pop(key, None)
+        else:
+            now += rnd.randint(0, 7)
+            expected = {k for k, when in deadlines.items() if when <= now}
+            expired = wheel.advance(now)
+            assert sorted(expired) == sorted(expected)
+            for k in expected:
+                del deadlines[k]
+            fired += len(expired)
+        assert len(wheel) == len(deadlines)
+
+    print(f"✅ Сработало таймеров: {fired}")
+
+async def _check_reminders():
+    user_id = 77777
+    await async_models.add_user(user_id, 'A2')
+    await async_models.add_word("remind", "[rɪˈmaɪnd]", "напоминать", "Remind me later.", 'A2')
+    # Напоминания включает сам пользователь; у него еще нет карточек
+    assert (await async_models.get_user(user_id))['reminder_hour'] is None
+    await async_models.set_reminder_hour(user_id, 9)
+
+    today = datetime.now().date()
+    clock = FakeClock(datetime.combine(today, time(8)).timestamp())
+    bot = StubBot()
+    reminders = ReminderScheduler(bot, clock=clock)
+    reminders.subscribe()
+    try:
+        await reminders.rebuild()
+
+        # Добавление слов ставит напоминание на сегодня в 9:00
+        words = await async_models.get_words_by_level('A2', 100)
+        await async_models.enroll_words(user_id, words)
+        nine = datetime.combine(today, time(9)).timestamp()
+        assert reminders.wheel.deadline(user_id) == nine
+
+        clock.now += 30 * 60
+        await reminders.tick()
+        await reminders.join()
+        assert not [m for m in bot.messages if m[0] == user_id]
+
+        clock.now = nine + 60
+        await reminders.tick()
+        await reminders.join()
+        mine = [m for m in bot.messages if m[0] == user_id]
+        assert len(mine) == 1 and "к повторению" in mine[0][1]
+        tomorrow = datetime.combine(today + timedelta(days=1), time(9)).timestamp()
+        assert reminders.wheel.deadline(user_id) == tomorrow
+
+        # Пользователь повторил все слова - завтра напоминания не будет
+        for card in await async_models.get_words_for_review(user_id, 1000):
+            await async_models.update_spaced_repetition(card['id'], True, user_id=user_id)
+        clock.now = tomorrow + 60
+        await reminders.tick()
+        await reminders.join()
+        assert len([m for m in bot.messages if m[0] == user_id]) == 1
+        next_due = await async_models.get_next_due_date(user_id)
+        assert reminders.wheel.deadline(user_id) == reminders.fire_time(next_due, 9)
+
+        # Выключенные напоминания снимают таймер
+        await reminders.set_hour(user_id, None)
+        assert user_id not in reminders.wheel
+        reminders.on_due_date(user_id, today)
+        assert user_id not in reminders.wheel
+        await reminders.set_hour(user_id, 9)
+    finally:
+        reminders.unsubscribe()
+        await reminders.stop()
+    return len(bot.messages)
+
+def test_reminders_with_fake_clock():
+    """Напоминание приходит в час пользователя и переставляется после повторения"""
+    print("🔔 Тестирование напоминаний о повторении...")
+    with temporary_database():
+        sent = asyncio.run(_check_reminders())
+    print(f"✅ Отправлено напоминаний: {sent}")
+
+class SlowBot:
+    """Бот с задержкой отправки: считает одновременные отправки"""
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.sent = []
+        self.active = 0
+        self.peak = 0
+
+    async def send_message(self, chat_id, text, **kwargs):
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        await asyncio.sleep(self.delay)
+        self.active -= 1
+        self.sent.append(chat_id)
+
+async def _check_burst():
+    broken_user = 13
+
+    async def fake_get_user(user_id):
+        return {'user_id': user_id, 'reminder_hour': 9}
+
+    async def fake_due_count(user_id):
+        if user_id == broken_user:
+            raise RuntimeError("database is locked")
+        return 3
+
+    original = reminders_module.get_user, reminders_module.get_due_words_count
+    reminders_module.get_user, reminders_module.get_due_words_count = fake_get_user, fake_due_count
+    try:
+        clock = FakeClock(datetime.combine(date.today(), time(9)).timestamp())
+        bot = SlowBot(0.005)
+        reminders = ReminderScheduler(bot, clock=clock, rate=50, concurrency=5, retry_delay=120)
+        users = range(1, 61)
+        for user_id in users:
+            reminders.wheel.schedule(user_id, clock.now)
+
+        # Тик только ставит пользователей в очередь и не ждет отправки
+        start = clock_time.perf_counter()
+        assert await reminders.tick() == len(users)
+        assert clock_time.perf_counter() - start < 0.05
+        assert reminders.backlog() > 0 and len(bot.sent) < len(users) - 1
+        await reminders.join()
+        elapsed = clock_time.perf_counter() - start
+        assert reminders.backlog() == 0
+    finally:
+        reminders_module.get_user, reminders_module.get_due_words_count = original
+        await reminders.stop()
+
+    # Ошибка базы у одного пользователя не мешает остальным, его напоминание повторится
+    assert sorted(bot.sent) == [user_id for user_id in users if user_id != broken_user]
+    assert reminders.failed == 1
+    assert reminders.wheel.deadline(broken_user) == clock.now + 120
+    # Не больше 5 пользователей одновременно, 59 сообщений при 50/с и запасе 50 - не быстрее 0.18 с
+    assert bot.peak <= 5
+    assert elapsed >= 0.15
+    return elapsed
+
+def test_reminder_burst_is_rate_limited():
+    """Пачка напоминаний: параллельно, с ограничением частоты и без падения на ошибке"""
+    print("🚦 Тестирование пачки напоминаний...")
+    elapsed = asyncio.run(_check_burst())
+
+    # Тики выровнены по границам колеса, поэтому время обработки не копится
+    reminders = ReminderScheduler(StubBot(), clock=FakeClock(125.5), tick=60)
+    assert reminders.until_next_tick() == 54.5
+    print(f"✅ 59 напоминаний за {elapsed:.2f} с, ошибка одного пользователя не остановила остальных")
+
+if __name__ == "__main__":
+    test_timing_wheel_matches_brute_force()
+    test_reminders_with_fake_clock()
+    test_reminder_burst_is_rate_limited()
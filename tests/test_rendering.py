@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Тестовый скрипт для проверки отрисовки карточек слов
+"""
+
+from bot.rendering import CardRenderer, escape
+
+class FakeCatalog:
+    version = 1
+
+WORD = {
+    'word_id': 7,
+    'word': 'snake_case',
+    'transcription': '[sneɪk*keɪs]',
+    'translation': 'змеиный `регистр`',
+    'example': 'Use snake_case for names.'
+}
+
+def test_card_rendering():
+    """Тестирование экранирования, кэша фрагментов и сброса по версии каталога"""
+    print("🖼️ Тестирование отрисовки карточек...")
+    assert escape('a_b*c`d') == 'a\\_b\\*c\\`d'
+
+    catalog = FakeCatalog()
+    renderer = CardRenderer(catalog=catalog)
+
+    # Тот же текст, что давали цепочки .replace в обработчиках
+    old = lambda text: text.replace('_', '\\_').replace('*', '\\*').replace('`', '\\`')
+    answer = renderer.render('answer', WORD)
+    assert answer == (
+        f"Слово: {old(WORD['word'])} [{old(WORD['transcription'])}]\n"
+        f"Перевод: {old(WORD['translation'])}\n"
+        f"Пример: {old(WORD['example'])}"
+    )
+    assert renderer.render('words_item', WORD).startswith("**snake_case** [")
+
+    # Повторная отрисовка берется из кэша
+    assert renderer.render('answer', WORD) is answer
+    assert renderer.hits == 1 and renderer.misses == 2
+
+    # Слово изменилось в каталоге - кэш сбрасывается
+    catalog.version = 2
+    changed = renderer.render('answer', {**WORD, 'translation': 'новый перевод'})
+    assert 'новый перевод' in changed
+    print("✅ Карточки отрисовываются из кэша")
+
+if __name__ == "__main__":
+    test_card_rendering()
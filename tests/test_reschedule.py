@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Тестовый скрипт для проверки массового пересчета расписаний
+"""
+
+import os
+import random
+import tempfile
+from datetime import date, timedelta
+from sqlalchemy.orm import Session
+from database.engine import create_sqlite_engine
+from database.models import Base, SpacedRepetition, card_to_dict
+from database.reschedule import reschedule_cards
+from database.scheduling import get_scheduler
+
+TODAY = date(2024, 5, 1)
+
+def _build(engine, count):
+    Base.metadata.create_all(engine)
+    rnd = random.Random(3)
+    with Session(engine) as session:
+        for i in range(count):
+            total = rnd.randint(0, 12)
+            correct = rnd.randint(0, total)
+            last_review = TODAY - timedelta(days=rnd.randint(0, 60)) if total else None
+            interval = 3 if correct == 1 else 7 * max(correct - 1, 0) or 1
+            session.add(SpacedRepetition(
+                user_id=i % 7, word_id=i, word=f"word{i}",
+                interval_days=interval,
+                ease_factor=round(rnd.uniform(1.0, 2.6), 2),
+                consecutive_correct=correct,
+                consecutive_incorrect=0 if correct else total,
+                total_reviews=total,
+                last_review_date=last_review,
+                next_review_date=(last_review or TODAY) + timedelta(days=interval if total else 0)
+            ))
+        session.commit()
+
+def _cards(engine):
+    with Session(engine) as session:
+        return [card_to_dict(card) for card in session.query(SpacedRepetition).order_by(SpacedRepetition.id)]
+
+def test_reschedule_resumable():
+    """Тестирование пробного прогона, прерывания и продолжения пересчета"""
+    print("🔄 Тестирование массового пересчета расписаний...")
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_sqlite_engine(os.path.join(tmp, 'reschedule.db'))
+        checkpoint = os.path.join(tmp, 'checkpoint.json')
+        _build(engine, 250)
+        scheduler = get_scheduler('sm2')
+        before = _cards(engine)
+
+        # Пробный прогон ничего не меняет
+        dry = reschedule_cards(engine, scheduler, chunk_size=40, dry_run=True, checkpoint_path=checkpoint, today=TODAY)
+        assert dry.scanned == 250 and dry.changed > 0
+        assert _cards(engine) == before
+        assert not os.path.exists(checkpoint)
+        print(f"✅ Пробный прогон: {dry.as_dict()}")
+
+        # Прерываем после второй пачки
+        def stop(stats):
+            if stats.scanned >= 80:
+                raise KeyboardInterrupt
+
+        try:
+            reschedule_cards(engine, scheduler, chunk_size=40, checkpoint_path=checkpoint, today=TODAY, progress=stop)
+        except KeyboardInterrupt:
+            pass
+        assert os.path.exists(checkpoint)
+
+        # Продолжение с контрольной точки
+        resumed = reschedule_cards(engine, scheduler, chunk_size=40, checkpoint_path=checkpoint, today=TODAY)
+        assert resumed.scanned == 250 - 80
+        assert not os.path.exists(checkpoint)
+
+        expected = [scheduler.reschedule(card) for card in before]
+        after = _cards(engine)
+        for old, new, card in zip(before, after, expected):
+            assert new['interval_days'] == card['interval_days'], old
+            assert abs(new['ease_factor'] - card['ease_factor']) < 1e-9, old
+            assert new['next_review_date'] == card['next_review_date'], old
+            assert new['consecutive_correct'] == old['consecutive_correct']
+
+        # Повторный пересчет ничего не меняет
+        again = reschedule_cards(engine, scheduler, chunk_size=40, dry_run=True, today=TODAY)
+        assert again.changed == 0
+        engine.dispose()
+        print(f"✅ Пересчет продолжен с контрольной точки, изменено {dry.changed} карточек")
+
+if __name__ == "__main__":
+    test_reschedule_resumable()
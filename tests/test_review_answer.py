@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Тестовый скрипт для проверки ответа на тест повторения по ID карточки
+"""
+
+import asyncio
+from aiogram import Bot, Dispatcher
+from aiogram.methods import AnswerCallbackQuery
+from sqlalchemy import event
+from bot import register_all_handlers
+from database import async_models
+from database.models import (
+    engine, init_db, add_user, add_word, get_user, get_words_by_level, enroll_words,
+    get_words_for_review, update_spaced_repetition
+)
+from stubs import StubSession, callback_update
+
+def test_review_answer_by_id():
+    """Тестирование обновления карточки по ID с проверкой владельца"""
+    print("🔑 Тестирование ответа на повторение по ID карточки...")
+    
+    init_db()
+    if not get_words_by_level('A1', 1):
+        add_word("review", "[-]", "повторение", "Review the word.", 'A1')
+    
+    owner_id, other_id = 22222, 22223
+    for user_id in (owner_id, other_id):
+        if not get_user(user_id):
+            add_user(user_id, 'A1')
+    
+    word = get_words_by_level('A1', 1)[0]
+    enroll_words(owner_id, [word])
+    card = next(w for w in get_words_for_review(owner_id, 100) if w['word_id'] == word['word_id'])
+    
+    # Чужая карточка не обновляется
+    assert update_spaced_repetition(card['id'], True, user_id=other_id) is None
+    
+    statements = []
+    
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement.split()[0])
+    
+    event.listen(engine, "before_cursor_execute", count)
+    try:
+        updated = update_spaced_repetition(card['id'], False, user_id=owner_id)
+    finally:
+        event.remove(engine, "before_cursor_execute", count)
+    
+    assert updated['id'] == card['id']
+    assert updated['interval_days'] == 1
+    assert updated['total_reviews'] == card['total_reviews'] + 1
+    assert statements == ['SELECT', 'UPDATE']
+    print("✅ Ответ на повторение стоит одного чтения и одной записи")
+
+async def _send_forged_callback(user_id: int, card: dict, other_word_id: int):
+    await async_models.init_db()
+    session = StubSession()
+    bot = Bot(token="123456:TEST", session=session)
+    dp = Dispatcher()
+    register_all_handlers(dp)
+    # Ответ "правильный", но word_id в callback_data чужой: карточка не должна измениться
+    await dp.feed_update(bot, callback_update(1, user_id, f"review_{card['id']}_{other_word_id}_{other_word_id}"))
+    await bot.session.close()
+    return session.calls
+
+def test_forged_review_callback():
+    """Тестирование подделанного callback_data с чужим word_id"""
+    print("🛡 Тестирование подделанного ответа на повторение...")
+    
+    init_db()
+    for i, (word, translation) in enumerate((("forge", "подделка"), ("guard", "охрана"))):
+        if len(get_words_by_level('A1', 2)) <= i:
+            add_word(word, "[-]", translation, "Example.", 'A1')
+    
+    user_id = 22224
+    if not get_user(user_id):
+        add_user(user_id, 'A1')
+    
+    word, other = get_words_by_level('A1', 2)
+    enroll_words(user_id, [word])
+    card = next(w for w in get_words_for_review(user_id, 100) if w['word_id'] == word['word_id'])
+    
+    # Слой данных отклоняет карточку другого слова
+    assert update_spaced_repetition(card['id'], True, user_id=user_id, word_id=other['word_id']) is None
+    
+    calls = asyncio.run(_send_forged_callback(user_id, card, other['word_id']))
+    assert isinstance(calls[-1], AnswerCallbackQuery)
+    assert "устарел" in calls[-1].text
+    
+    after = next(w for w in get_words_for_review(user_id, 100) if w['id'] == card['id'])
+    assert after['total_reviews'] == card['total_reviews']
+    assert after['consecutive_correct'] == card['consecutive_correct']
+    print("✅ Подделанный ответ отклонен, карточка не изменилась")
+
+if __name__ == "__main__":
+    test_review_answer_by_id()
+    test_forged_review_callback()
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Тестовый скрипт для проверки алгоритмов интервального повторения
+"""
+
+import random
+from datetime import date, timedelta
+import numpy as np
+from database.scheduling import SCHEDULERS, BATCH_FIELDS, get_scheduler
+
+TODAY = date(2024, 5, 1)
+
+def _random_cards(count, seed=7):
+    rnd = random.Random(seed)
+    cards = []
+    for i in range(count):
+        total = rnd.randint(0, 30)
+        correct = rnd.randint(0, total)
+        cards.append({
+            'id': i,
+            'interval_days': rnd.randint(1, 200) if total else 1,
+            'ease_factor': round(rnd.uniform(1.3, 2.5), 2),
+            'consecutive_correct': correct,
+            'consecutive_incorrect': 0 if correct else rnd.randint(0, 3),
+            'total_reviews': total,
+            'last_review_date': TODAY - timedelta(days=rnd.randint(0, 300)) if total else None,
+            'next_review_date': TODAY
+        })
+    return cards
+
+def _batch(cards):
+    """Массивы карточек для schedule_batch (даты - номерами дней)"""
+    batch = {
+        field: np.array([
+            (card[field].toordinal() if card[field] else 0) if field == 'last_review_date' else card[field]
+            for card in cards
+        ])
+        for field in BATCH_FIELDS
+    }
+    batch['next_review_date'] = np.array([card['next_review_date'].toordinal() for card in cards])
+    return batch
+
+def test_ladder_intervals():
+    """Исходная лестница интервалов: 3, 7, 14, 21 и сброс до 1"""
+    print("🪜 Тестирование исходной лестницы интервалов...")
+    ladder = get_scheduler('ladder')
+    card = _random_cards(1)[0] | {'consecutive_correct': 0, 'ease_factor': 2.5}
+    intervals = []
+    for _ in range(4):
+        card = ladder.schedule(card, True, TODAY)
+        intervals.append(card['interval_days'])
+    assert intervals == [3, 7, 14, 21]
+    assert card['next_review_date'] == TODAY + timedelta(days=21)
+
+    card = ladder.schedule(card, False, TODAY)
+    assert card['interval_days'] == 1 and card['consecutive_correct'] == 0
+    assert card['ease_factor'] == 2.3
+    print("✅ Лестница совпадает с прежним поведением бота")
+
+def test_batch_matches_scalar():
+    """Векторный путь дает тот же результат, что и пересчет по одной карточке"""
+    print("🧮 Тестирование векторного пересчета...")
+    cards = _random_cards(500)
+    answers = np.array([random.Random(i).random() < 0.7 for i in range(len(cards))])
+    batch = _batch(cards)
+
+    for name in SCHEDULERS:
+        scheduler = get_scheduler(name)
+        result = scheduler.schedule_batch(batch, answers, TODAY)
+        for i, card in enumerate(cards):
+            expected = scheduler.schedule(card, bool(answers[i]), TODAY)
+            assert result['interval_days'][i] == expected['interval_days'], (name, card)
+            assert abs(result['ease_factor'][i] - expected['ease_factor']) < 1e-9, (name, card)
+            assert result['next_review_date'][i] == expected['next_review_date'].toordinal()
+            assert result['consecutive_correct'][i] == expected['consecutive_correct']
+            assert result['total_reviews'][i] == expected['total_reviews']
+
+        rescheduled = scheduler.reschedule_batch(batch)
+        for i, card in enumerate(cards):
+            expected = scheduler.reschedule(card)
+            assert rescheduled['interval_days'][i] == expected['interval_days'], (name, card)
+            assert rescheduled['next_review_date'][i] == expected['next_review_date'].toordinal()
+        print(f"✅ {name}: {len(cards)} карточек совпадают")
+
+def test_algorithms_use_ease():
+    """SM-2 и FSRS учитывают ease factor и стабильность карточки"""
+    print("📈 Тестирование SM-2 и FSRS...")
+    card = _random_cards(1)[0] | {
+        'interval_days': 10, 'consecutive_correct': 3, 'total_reviews': 5,
+        'last_review_date': TODAY - timedelta(days=10)
+    }
+    sm2 = get_scheduler('sm2')
+    assert sm2.predict_interval(card | {'ease_factor': 2.5}, True, TODAY) == 25
+    assert sm2.predict_interval(card | {'ease_factor': 1.3}, True, TODAY) == 13
+    assert sm2.predict_interval(card, False, TODAY) == 1
+
+    fsrs = get_scheduler('fsrs')
+    easy = fsrs.predict_interval(card | {'ease_factor': 2.5}, True, TODAY)
+    hard = fsrs.predict_interval(card | {'ease_factor': 1.3}, True, TODAY)
+    assert easy > hard > 10
+    assert fsrs.predict_interval(card, False, TODAY) < 10
+
+    try:
+        get_scheduler('unknown')
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("Неизвестный алгоритм должен вызывать ValueError")
+    print("✅ Интервалы зависят от ease factor")
+
+def test_fsrs_after_sm2_ease():
+    """FSRS после SM-2: ease выше EASE_MAX не ломает расчет сложности"""
+    print("🔀 Тестирование смены алгоритма с SM-2 на FSRS...")
+    sm2 = get_scheduler('sm2')
+    card = _random_cards(1)[0] | {
+        'interval_days': 1, 'ease_factor': 2.5, 'consecutive_correct': 0,
+        'consecutive_incorrect': 0, 'total_reviews': 0, 'last_review_date': None
+    }
+    for _ in range(3):
+        card = sm2.schedule(card, True, TODAY)
+    assert abs(card['ease_factor'] - 2.8) < 1e-9
+
+    fsrs = get_scheduler('fsrs')
+    later = TODAY + timedelta(days=card['interval_days'])
+    for is_correct in (False, True):
+        expected = fsrs.schedule(card, is_correct, later)
+        assert isinstance(expected['interval_days'], int) and 1 <= expected['interval_days']
+        result = fsrs.schedule_batch(_batch([card]), np.array([is_correct]), later)
+        assert result['interval_days'][0] == expected['interval_days']
+        assert abs(result['ease_factor'][0] - expected['ease_factor']) < 1e-9
+    print("✅ Сложность ограничена диапазоном 1..10")
+
+def test_help_uses_scheduler():
+    """Тестирование справки об интервалах: текст строится планировщиком"""
+    print("📖 Тестирование справки об интервалах...")
+    from bot.help import schedule_help
+    
+    assert get_scheduler('ladder').preview() == ([3, 7, 14, 21, 28], 1)
+    help_text = schedule_help()
+    intervals, after_mistake = get_scheduler().preview()
+    assert help_text.count("-й правильный ответ") == len(intervals)
+    assert f"1-й правильный ответ: повторение через {intervals[0]} " in help_text
+    assert f"Неправильный ответ: повторение через {after_mistake} " in help_text
+    print("✅ Справка совпадает с расписанием планировщика")
+
+if __name__ == "__main__":
+    test_ladder_intervals()
+    test_batch_matches_scalar()
+    test_algorithms_use_ease()
+    test_fsrs_after_sm2_ease()
+    test_help_uses_scheduler()
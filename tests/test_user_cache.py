@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Тестовый скрипт для проверки кэша профилей пользователей
+"""
+
+import asyncio
+from database import async_models
+from database.cache import UserCache, user_cache
+from database.models import init_db, add_user, get_user, update_user_level, update_test_results
+from stubs import FakeClock
+
+def test_lru_and_ttl():
+    """Тестирование вытеснения LRU и истечения TTL"""
+    print("🗂 Тестирование LRU и TTL кэша...")
+    
+    clock = FakeClock()
+    cache = UserCache(maxsize=2, ttl=10, clock=clock)
+    
+    cache.put(1, {'user_id': 1, 'test_results': {'correct': 0, 'incorrect': 0}})
+    cache.put(2, {'user_id': 2, 'test_results': {'correct': 0, 'incorrect': 0}})
+    assert cache.get(1)['user_id'] == 1   # 1 становится самым свежим
+    cache.put(3, {'user_id': 3, 'test_results': {'correct': 0, 'incorrect': 0}})
+    assert cache.get(2) is None           # 2 вытеснен
+    assert cache.stats()['evictions'] == 1
+    
+    # Изменение возвращенной копии не портит кэш
+    cache.get(1)['test_results']['correct'] = 100
+    assert cache.get(1)['test_results']['correct'] == 0
+    
+    clock.now = 11
+    assert cache.get(1) is None           # истек TTL
+    
+    stats = cache.stats()
+    assert stats['hits'] == 3 and stats['misses'] == 2
+    print("✅ LRU и TTL работают корректно")
+
+def test_write_invalidation():
+    """Тестирование обновления кэша при записи"""
+    print("🗂 Тестирование обновления кэша при записи...")
+    
+    init_db()
+    user_cache.clear()
+    
+    test_user_id = 33333
+    if not get_user(test_user_id):
+        add_user(test_user_id, 'A1')
+    update_user_level(test_user_id, 'A1')
+    
+    user = get_user(test_user_id)
+    hits = user_cache.hits
+    
+    update_user_level(test_user_id, 'B2')
+    update_test_results(test_user_id, False)
+    
+    cached = get_user(test_user_id)
+    assert user_cache.hits == hits + 1
+    assert cached['level'] == 'B2'
+    assert cached['test_results']['incorrect'] == user['test_results']['incorrect'] + 1
+    
+    # Кэш совпадает с базой данных
+    user_cache.invalidate(test_user_id)
+    assert get_user(test_user_id) == cached
+    print("✅ Кэш корректно обновляется при записи")
+
+class SlowFirstRead:
+    """Фабрика сессий, у которой первое чтение профиля возвращается с задержкой"""
+    
+    def __init__(self, factory, delay: float):
+        self.factory = factory
+        self.delay = delay
+        self.slowed = False
+    
+    def __call__(self):
+        session = self.factory()
+        get = session.get
+        
+        async def slow_get(*args, **kwargs):
+            result = await get(*args, **kwargs)
+            if not self.slowed:
+                self.slowed = True
+                await asyncio.sleep(self.delay)
+            return result
+        
+        session.get = slow_get
+        return session
+
+async def _read_during_write(user_id: int):
+    await async_models.update_user_level(user_id, 'A1')
+    user_cache.invalidate(user_id)
+    
+    async def write_later():
+        await asyncio.sleep(0.01)
+        await async_models.update_user_level(user_id, 'B1')
+    
+    original = async_models.AsyncSession
+    async_models.AsyncSession = SlowFirstRead(original, 0.1)
+    try:
+        # Чтение видит уровень A1, а кэшировать его пытается уже после записи B1
+        stale, _ = await asyncio.gather(async_models.get_user(user_id), write_later())
+    finally:
+        async_models.AsyncSession = original
+    return stale, await async_models.get_user(user_id)
+
+def test_stale_read_not_cached():
+    """Тестирование гонки: профиль изменили, пока шло чтение из базы"""
+    print("🗂 Тестирование записи во время чтения профиля...")
+    
+    cache = UserCache(maxsize=2, ttl=10)
+    generation = cache.generation()
+    cache.update(1, lambda user: user.update(level='B2'))   # записи в кэше еще нет
+    cache.put(1, {'user_id': 1, 'level': 'A1'}, generation)
+    assert cache.get(1) is None
+    
+    # Номер записи вытеснен - чтение, начатое до нее, тоже не кэшируется
+    generation = cache.generation()
+    for user_id in (1, 2, 3):
+        cache.invalidate(user_id)
+    cache.put(1, {'user_id': 1, 'level': 'A1'}, generation)
+    assert cache.get(1) is None
+    cache.put(1, {'user_id': 1, 'level': 'B2'}, cache.generation())
+    assert cache.get(1)['level'] == 'B2'
+    
+    init_db()
+    test_user_id = 33334
+    if not get_user(test_user_id):
+        add_user(test_user_id, 'A1')
+    stale, fresh = asyncio.run(_read_during_write(test_user_id))
+    assert stale['level'] == 'A1'
+    assert fresh['level'] == 'B1'
+    print("✅ Устаревший профиль не попадает в кэш")
+
+if __name__ == "__main__":
+    test_lru_and_ttl()
+    test_write_invalidation()
+    test_stale_read_not_cached()
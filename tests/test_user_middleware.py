@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Тестовый скрипт для проверки загрузки пользователя в middleware
+"""
+
+import asyncio
+from aiogram import Bot, Dispatcher
+from aiogram.methods import AnswerCallbackQuery
+from bot import register_all_handlers, middlewares
+from database import async_models
+from stubs import StubSession, message_update, callback_update
+
+async def _check_middleware():
+    await async_models.init_db()
+    session = StubSession()
+    bot = Bot(token="123456:TEST", session=session)
+    dp = Dispatcher()
+    register_all_handlers(dp)
+
+    loads = []
+    original_get_user = middlewares.get_user
+
+    async def counting_get_user(user_id, *args, **kwargs):
+        loads.append(user_id)
+        return await original_get_user(user_id, *args, **kwargs)
+
+    middlewares.get_user = counting_get_user
+    try:
+        # Незарегистрированный пользователь не доходит до обработчика
+        stranger = 31337
+        await dp.feed_update(bot, message_update(1, stranger, "/words"))
+        assert session.calls[-1].text == middlewares.NOT_REGISTERED_TEXT
+        await dp.feed_update(bot, callback_update(2, stranger, "test_1_1"))
+        assert isinstance(session.calls[-1], AnswerCallbackQuery)
+        assert session.calls[-1].text == middlewares.NOT_REGISTERED_TEXT
+
+        # /start и /help работают и без регистрации
+        await dp.feed_update(bot, message_update(3, stranger, "/help"))
+        assert session.calls[-1].text.startswith("🤖 Справка")
+
+        # Зарегистрированный пользователь загружается ровно один раз на апдейт
+        member = 31338
+        if not await async_models.get_user(member):
+            await async_models.add_user(member, 'A1')
+        loads.clear()
+        await dp.feed_update(bot, message_update(4, member, "/stats"))
+        assert loads == [member]
+        assert "Уровень: A1" in session.calls[-1].text
+    finally:
+        middlewares.get_user = original_get_user
+    return len(session.calls)
+
+def test_user_middleware():
+    """Тестирование загрузки пользователя и отсечения незарегистрированных"""
+    print("👤 Тестирование middleware пользователя...")
+    calls = asyncio.run(_check_middleware())
+    print(f"✅ Обработано вызовов API: {calls}")
+
+if __name__ == "__main__":
+    test_user_middleware()
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Тестовый скрипт для проверки режима вебхука (POST записанного апдейта на сервер)
+"""
+
+import asyncio
+import socket
+import warnings
+import aiohttp
+from aiohttp.test_utils import TestClient, TestServer
+from aiogram import Bot, Dispatcher, F, types
+from bot.webhook import create_webhook_app, run_webhook, WEBHOOK_HANDLER
+
+SECRET = "test-secret"
+
+# Апдейт в том виде, в котором его присылает Telegram
+RECORDED_UPDATE = {
+    "update_id": 100,
+    "message": {
+        "message_id": 1,
+        "date": 1700000000,
+        "chat": {"id": 12345, "type": "private", "first_name": "Test"},
+        "from": {"id": 12345, "is_bot": False, "first_name": "Test"},
+        "text": "/ping"
+    }
+}
+
+async def _check_webhook():
+    dp = Dispatcher()
+    bot = Bot(token="123456:TEST")
+    handled = []
+    active = 0
+    peak = 0
+
+    async def ping(message: types.Message):
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.05)
+        handled.append(message.text)
+        active -= 1
+
+    dp.message.register(ping, F.text == "/ping")
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        app = create_webhook_app(dp, bot, "/webhook", secret_token=SECRET, max_concurrency=2)
+
+    async with TestClient(TestServer(app)) as client:
+        headers = {"X-Telegram-Bot-Api-Secret-Token": SECRET}
+
+        # Неверный секрет отклоняется
+        response = await client.post("/webhook", json=RECORDED_UPDATE,
+                                     headers={"X-Telegram-Bot-Api-Secret-Token": "wrong"})
+        assert response.status == 401
+
+        responses = await asyncio.gather(*(
+            client.post("/webhook", json={**RECORDED_UPDATE, "update_id": 100 + i}, headers=headers)
+            for i in range(6)
+        ))
+        assert all(response.status == 200 for response in responses)
+
+        handler = app[WEBHOOK_HANDLER]
+        assert handler.in_flight <= 2
+        await handler.drain()
+
+    assert handled == ["/ping"] * 6
+    assert peak <= 2
+    return peak
+
+def test_webhook_bounded_concurrency():
+    """Тестирование вебхука: секрет, обработка апдейтов и ограничение параллельности"""
+    print("🌐 Тестирование режима вебхука...")
+    peak = asyncio.run(_check_webhook())
+    print(f"✅ Апдейты обработаны, одновременно не больше {peak}")
+
+async def _check_shutdown():
+    dp = Dispatcher()
+    bot = Bot(token="123456:TEST")
+    events = []
+    started = asyncio.Event()
+
+    async def slow(message: types.Message):
+        started.set()
+        await asyncio.sleep(0.2)
+        events.append("handled")
+
+    async def stuck(message: types.Message):
+        await asyncio.sleep(60)
+
+    dp.message.register(slow, F.text == "/ping")
+    dp.message.register(stuck, F.text == "/stuck")
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+
+    server = asyncio.create_task(run_webhook(dp, bot, "127.0.0.1", port, "/webhook", drain_timeout=5))
+    await asyncio.sleep(0.2)
+    async with aiohttp.ClientSession() as session:
+        response = await session.post(f"http://127.0.0.1:{port}/webhook", json=RECORDED_UPDATE)
+        assert response.status == 200
+    await started.wait()
+
+    # Остановка ждет апдейт в обработке: только после этого закрываются хранилище и база
+    server.cancel()
+    try:
+        await server
+    except asyncio.CancelledError:
+        pass
+    events.append("closed")
+    assert events == ["handled", "closed"]
+
+    # Зависший апдейт отменяется по таймауту, новые апдейты после начала остановки не принимаются
+    app = create_webhook_app(dp, bot, "/webhook")
+    async with TestClient(TestServer(app)) as client:
+        response = await client.post("/webhook", json={**RECORDED_UPDATE, "message": {
+            **RECORDED_UPDATE["message"], "text": "/stuck"}})
+        assert response.status == 200
+        await asyncio.sleep(0.05)
+        assert await app[WEBHOOK_HANDLER].drain(timeout=0.1) == 1
+        response = await client.post("/webhook", json=RECORDED_UPDATE)
+        assert response.status == 503
+    await bot.session.close()
+
+def test_webhook_graceful_shutdown():
+    """Тестирование остановки вебхука: апдейты в обработке дожидаются закрытия"""
+    print("🛑 Тестирование остановки вебхука...")
+    asyncio.run(_check_shutdown())
+    print("✅ Апдейты завершены до закрытия хранилища, зависшие отменены по таймауту")
+
+if __name__ == "__main__":
+    test_webhook_bounded_concurrency()
+    test_webhook_graceful_shutdown()
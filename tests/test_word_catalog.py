@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Тестовый скрипт для проверки каталога слов в памяти
+"""
+
+from database.models import add_word, get_words_by_level
+from database.catalog import WordCatalog
+from temp_database import temporary_database
+
+def test_catalog_matches_database():
+    """Тестирование совпадения каталога с базой данных"""
+    print("📖 Тестирование каталога слов...")
+    
+    with temporary_database() as engine:
+        for i in range(3):
+            add_word(f"catalog{i}", "[-]", f"перевод{i}", "Example.", 'A1')
+        add_word("catalog", "[-]", "перевод", "Example.", 'B1')
+        
+        catalog = WordCatalog(bind=engine)
+        catalog.load()
+        
+        assert catalog.levels() == ['A1', 'B1']
+        for level in catalog.levels():
+            assert catalog.get_words_by_level(level, 100) == get_words_by_level(level, 100)
+        
+        word = get_words_by_level('A1', 1)[0]
+        assert catalog.get_word_by_id(word['word_id']) == word
+        assert catalog.get_word_by_id(-1) is None
+    print(f"✅ Каталог совпадает с базой данных ({len(catalog)} слов)")
+
+def test_catalog_reload():
+    """Тестирование перезагрузки каталога после добавления слов"""
+    print("📖 Тестирование перезагрузки каталога...")
+    
+    with temporary_database() as engine:
+        add_word("catalog", "[-]", "каталог", "Load the catalog.", 'C1')
+        catalog = WordCatalog(bind=engine)
+        catalog.load()
+        
+        assert not catalog.refresh_if_changed()
+        
+        add_word("reload", "[-]", "перезагрузка", "Reload the catalog.", 'C1')
+        
+        assert catalog.refresh_if_changed()
+        assert len(catalog) == 2
+        assert catalog.get_words_by_level('C1', 100)[-1]['word'] == "reload"
+    print("✅ Каталог перезагружается после изменения таблицы words")
+
+if __name__ == "__main__":
+    test_catalog_matches_database()
+    test_catalog_reload()
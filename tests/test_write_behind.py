@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Тестовый скрипт для проверки отложенной записи ответов на повторение
+"""
+
+import asyncio
+from datetime import date
+from database import async_models
+from database.models import (
+    add_word, get_words_by_level, add_user, enroll_words, get_words_for_review,
+    Session, SpacedRepetition, card_to_dict
+)
+from database.scheduling import scheduler
+from database.write_behind import ReviewWriteBuffer
+from temp_database import temporary_database
+
+async def _check_write_behind(user_id, card_id, single_user_id, single_card_id):
+    buffer = ReviewWriteBuffer(async_models.AsyncSession, max_batch=100, flush_interval=60)
+    saved = async_models.review_buffer
+    async_models.review_buffer = buffer
+    try:
+        due_before = await async_models.get_due_words_count(user_id)
+        stats_before = await async_models.get_spaced_repetition_stats(user_id)
+
+        card = await async_models.update_spaced_repetition(card_id, True, user_id=user_id)
+        assert card['interval_days'] == 3
+        assert len(buffer) == 1
+
+        # В базе ничего не изменилось, но чтения учитывают overlay
+        assert card_id in [w['id'] for w in get_words_for_review(user_id, 100)]
+        queue = await async_models.get_words_for_review(user_id, 100)
+        assert card_id not in [w['id'] for w in queue]
+        assert await async_models.get_due_words_count(user_id) == due_before - 1
+        stats = await async_models.get_spaced_repetition_stats(user_id)
+        assert stats['due_today'] == stats_before['due_today'] - 1
+        assert stats['total_reviews'] == stats_before['total_reviews'] + 1
+
+        # Ближайшая дата не берется из устаревшей строки базы
+        single = await async_models.update_spaced_repetition(single_card_id, True, user_id=single_user_id)
+        assert await async_models.get_next_due_date(single_user_id) == single['next_review_date'] > date.today()
+
+        # Чужой пользователь не может ответить за карточку из overlay
+        assert await async_models.update_spaced_repetition(card_id, True, user_id=user_id + 1) is None
+
+        # Повторный ответ применяется к состоянию из overlay
+        card = await async_models.update_spaced_repetition(card_id, True, user_id=user_id)
+        assert card['consecutive_correct'] == 2
+
+        assert await buffer.flush() == 2
+        assert len(buffer) == 0
+        assert await buffer.flush() == 0
+
+        # После записи база и overlay согласованы
+        assert card_id not in [w['id'] for w in get_words_for_review(user_id, 100)]
+        stats_after = await async_models.get_spaced_repetition_stats(user_id)
+        assert stats_after['total_reviews'] == stats_before['total_reviews'] + 2
+        assert stats_after['due_today'] == stats_before['due_today'] - 1
+        assert await async_models.get_next_due_date(single_user_id) == single['next_review_date']
+    finally:
+        async_models.review_buffer = saved
+        await buffer.close()
+    return card
+
+def test_write_behind():
+    """Тестирование overlay и пакетной записи карточек"""
+    print("📝 Тестирование отложенной записи повторений...")
+
+    with temporary_database():
+        for i in range(2):
+            add_word(f"buffer{i}", "[-]", f"буфер{i}", "Write it later.", 'B2')
+        words = get_words_by_level('B2', 100)
+
+        user_id = 66666
+        add_user(user_id, 'B2')
+        enroll_words(user_id, words)
+        card_id = next(
+            card['id'] for card in get_words_for_review(user_id, 100) if card['word_id'] == words[0]['word_id']
+        )
+
+        # Пользователь с единственной карточкой: после ответа у него нет слов на сегодня
+        single_user_id = 66667
+        add_user(single_user_id, 'B2')
+        enroll_words(single_user_id, words[:1])
+        single_card_id = get_words_for_review(single_user_id, 100)[0]['id']
+
+        card = asyncio.run(_check_write_behind(user_id, card_id, single_user_id, single_card_id))
+    print(f"✅ Карточка записана: интервал {card['interval_days']} дн.")
+
+class FailingSessions:
+    """Фабрика сессий, которая отказывает, пока failing=True"""
+
+    def __init__(self):
+        self.failing = True
+        self.attempts = 0
+
+    def __call__(self):
+        self.attempts += 1
+        if self.failing:
+            raise OSError("database is unavailable")
+        return async_models.AsyncSession()
+
+async def _check_backpressure(cards):
+    sessions = FailingSessions()
+    buffer = ReviewWriteBuffer(sessions, max_batch=2, flush_interval=60, max_pending=3)
+    try:
+        for base in cards[:3]:
+            await buffer.record(base, scheduler.schedule(base, True))
+        assert len(buffer) == 3 and sessions.attempts == 0
+
+        # Overlay заполнен: новая карточка ждет записи и получает ее ошибку
+        for _ in range(2):
+            try:
+                await buffer.record(cards[3], scheduler.schedule(cards[3], True))
+                assert False, "запись сверх max_pending должна отклоняться"
+            except OSError:
+                pass
+        assert len(buffer) == 3 and sessions.attempts == 2
+
+        # Карточка, которая уже в overlay, места не занимает
+        card = buffer.get(cards[0]['id'])
+        await buffer.record(card, scheduler.schedule(card, True))
+        assert len(buffer) == 3 and sessions.attempts == 2
+
+        # База снова доступна: накопленное записывается, новая карточка принимается
+        sessions.failing = False
+        await buffer.record(cards[3], scheduler.schedule(cards[3], True))
+        assert len(buffer) == 1 and buffer.flushed_cards == 3
+    finally:
+        await buffer.close()
+
+def test_write_behind_backpressure():
+    """Тестирование ограничения overlay, пока база недоступна"""
+    print("📝 Тестирование ограничения отложенной записи...")
+
+    with temporary_database():
+        for i in range(4):
+            add_word(f"pending{i}", "[-]", f"ожидание{i}", "Wait for it.", 'B2')
+        user_id = 66668
+        add_user(user_id, 'B2')
+        enroll_words(user_id, get_words_by_level('B2', 100))
+        with Session() as session:
+            cards = [card_to_dict(card) for card in session.query(SpacedRepetition).filter_by(user_id=user_id)]
+
+        asyncio.run(_check_backpressure(cards))
+    print("✅ Overlay не растет больше max_pending")
+
+if __name__ == "__main__":
+    test_write_behind()
+    test_write_behind_backpressure()